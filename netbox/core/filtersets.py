@@ -81,6 +81,10 @@ class JobFilterSet(BaseFilterSet):
         label=_('Search'),
     )
     object_type = ContentTypeFilter()
+    parent_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=Job.objects.all(),
+        label=_('Parent job (ID)'),
+    )
     created = django_filters.DateTimeFilter()
     created__before = django_filters.DateTimeFilter(
         field_name='created',
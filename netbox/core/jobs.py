@@ -2,18 +2,21 @@ import sys
 from datetime import timedelta
 from importlib import import_module
 
+import django_rq
 import requests
 from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 from packaging import version
+from rq.exceptions import NoSuchJobError
+from rq.job import Job as RQ_Job, JobStatus
 
 from core.models import Job, ObjectChange
 from netbox.config import Config
 from netbox.jobs import JobRunner, system_job
 from netbox.search.backends import search_backend
 from utilities.proxy import resolve_proxies
-from .choices import DataSourceStatusChoices, JobIntervalChoices
+from .choices import DataSourceStatusChoices, JobIntervalChoices, JobStatusChoices
 from .models import DataSource
 
 
@@ -77,6 +80,7 @@ class SystemHousekeepingJob(JobRunner):
         self.clear_expired_sessions()
         self.prune_changelog()
         self.delete_expired_jobs()
+        self.terminate_lost_jobs()
         self.check_for_new_releases()
 
     def send_census_report(self):
@@ -157,6 +161,24 @@ class SystemHousekeepingJob(JobRunner):
         count = Job.objects.filter(created__lt=cutoff).delete()[0]
         self.logger.info(f"Deleted {count} expired jobs")
 
+    def terminate_lost_jobs(self):
+        """
+        Terminate any incomplete child jobs which have been lost by the task queue (e.g. because the worker executing
+        them was killed), so that their parent jobs can be completed.
+        """
+        self.logger.info("Terminating lost jobs...")
+        count = 0
+        for job in Job.objects.filter(parent__isnull=False, completed__isnull=True):
+            try:
+                rq_job = RQ_Job.fetch(str(job.job_id), connection=django_rq.get_connection())
+                if rq_job.get_status() not in (JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED):
+                    continue
+            except NoSuchJobError:
+                pass
+            job.terminate(status=JobStatusChoices.STATUS_ERRORED, error="Lost by the task queue")
+            count += 1
+        self.logger.info(f"Terminated {count} lost jobs")
+
     def check_for_new_releases(self):
         """
         Check for new releases and cache the latest release.
@@ -1,7 +1,10 @@
 import logging
 
+from django.core.management.base import CommandError
 from django_rq.management.commands.rqworker import Command as _Command
 
+from netbox.config import get_config
+from netbox.constants import RQ_QUEUE_DEFAULT
 from netbox.registry import registry
 
 
@@ -15,6 +18,21 @@ class Command(_Command):
     Subclass django_rq's built-in rqworker to listen on all configured queues if none are specified (instead
     of only the 'default' queue).
     """
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--webhook-dispatcher', action='store_true', dest='webhook_dispatcher',
+            help="Deliver webhooks concurrently over pooled connections (listens on the webhook queue by default)"
+        )
+        parser.add_argument(
+            '--concurrency', action='store', type=int, dest='concurrency', default=8,
+            help="Maximum number of concurrent webhook deliveries (with --webhook-dispatcher)"
+        )
+        parser.add_argument(
+            '--batch-size', action='store', type=int, dest='batch_size', default=100,
+            help="Maximum number of webhook jobs to dequeue at once (with --webhook-dispatcher)"
+        )
+
     def handle(self, *args, **options):
         # Setup system jobs.
         for job, kwargs in registry['system_jobs'].items():
@@ -28,6 +46,18 @@ class Command(_Command):
         # Run the worker with scheduler functionality
         options['with_scheduler'] = True
 
+        if options['webhook_dispatcher']:
+            from extras.webhooks import WebhookWorker
+            if options['concurrency'] < 1 or options['batch_size'] < 1:
+                raise CommandError("Concurrency and batch size must be positive integers.")
+            WebhookWorker.concurrency = options['concurrency']
+            WebhookWorker.batch_size = options['batch_size']
+            options['worker_class'] = WebhookWorker
+
+            # Listen only on the queue to which webhooks are dispatched, unless queues have been specified
+            if len(args) < 1:
+                args = (get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT),)
+
         # If no queues have been specified on the command line, listen on all configured queues.
         if len(args) < 1:
             queues = ', '.join(DEFAULT_QUEUES)
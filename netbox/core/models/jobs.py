@@ -52,6 +52,15 @@ class Job(models.Model):
         fk_field='object_id',
         for_concrete_model=False
     )
+    parent = models.ForeignKey(
+        to='core.Job',
+        on_delete=models.CASCADE,
+        related_name='children',
+        verbose_name=_('parent'),
+        blank=True,
+        null=True,
+        editable=False
+    )
     name = models.CharField(
         verbose_name=_('name'),
         max_length=200
@@ -254,6 +263,7 @@ class Job(models.Model):
             interval=None,
             immediate=False,
             queue_name=None,
+            parent=None,
             **kwargs
     ):
         """
@@ -268,6 +278,8 @@ class Job(models.Model):
             interval: Recurrence interval (in minutes)
             immediate: Run the job immediately without scheduling it in the background. Should be used for interactive
                 management commands only.
+            queue_name: The name of the queue to which the job is assigned (optional)
+            parent: The Job of which this job performs a part (optional)
         """
         if schedule_at and immediate:
             raise ValueError(_("enqueue() cannot be called with values for both schedule_at and immediate."))
@@ -283,6 +295,7 @@ class Job(models.Model):
         job = Job(
             object_type=object_type,
             object_id=object_id,
+            parent=parent,
             name=name,
             status=status,
             scheduled=schedule_at,
@@ -20,6 +20,7 @@ from netbox.config import get_config
 from netbox.context import current_request, events_queue
 from netbox.models.features import ChangeLoggingMixin, get_model_features, model_is_public
 from utilities.exceptions import AbortRequest
+from utilities.jinja2 import clear_template_cache
 from .models import ConfigRevision, DataSource, ObjectChange
 
 __all__ = (
@@ -280,6 +281,14 @@ def enqueue_sync_job(instance, created, **kwargs):
             job.delete()
 
 
+@receiver(post_sync)
+def clear_data_source_templates(instance, **kwargs):
+    """
+    Evict any cached templates which reference DataFiles belonging to a synchronized DataSource.
+    """
+    clear_template_cache(data_source=instance)
+
+
 @receiver(post_sync)
 def auto_sync(instance, **kwargs):
     """
@@ -24,6 +24,10 @@ class JobTable(NetBoxTable):
         linkify=True,
         orderable=False
     )
+    parent = tables.Column(
+        verbose_name=_('Parent'),
+        linkify=True
+    )
     status = columns.ChoiceFieldColumn(
         verbose_name=_('Status'),
     )
@@ -52,8 +56,8 @@ class JobTable(NetBoxTable):
     class Meta(NetBoxTable.Meta):
         model = Job
         fields = (
-            'pk', 'id', 'object_type', 'object', 'name', 'status', 'created', 'scheduled', 'interval', 'started',
-            'completed', 'user', 'error', 'job_id',
+            'pk', 'id', 'object_type', 'object', 'parent', 'name', 'status', 'created', 'scheduled', 'interval',
+            'started', 'completed', 'user', 'error', 'job_id',
         )
         default_columns = (
             'pk', 'id', 'object_type', 'object', 'name', 'status', 'created', 'started', 'completed', 'user',
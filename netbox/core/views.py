@@ -1,4 +1,5 @@
 import json
+import os
 import platform
 
 from django import __version__ as django_version
@@ -6,8 +7,9 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.core.cache import cache
+from django.core.files.storage import storages
 from django.db import connection, ProgrammingError
-from django.http import HttpResponse, HttpResponseForbidden, Http404
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, Http404
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -37,6 +39,7 @@ from utilities.views import (
     ContentTypePermissionRequiredMixin,
     GetRelatedModelsMixin,
     GetReturnURLMixin,
+    TokenConditionalLoginRequiredMixin,
     ViewTab,
     register_model_view,
 )
@@ -205,6 +208,26 @@ class JobLogView(generic.ObjectView):
         }
 
 
+@register_model_view(Job, 'file')
+class JobFileView(TokenConditionalLoginRequiredMixin, View):
+    """
+    Download the file saved by a Job (e.g. a rendered export template). The file was rendered subject to the
+    permissions of the user who requested the Job, so it may be retrieved only by that user (or by a superuser).
+    """
+    def get(self, request, pk):
+        if not request.user.is_authenticated:
+            raise Http404
+        jobs = Job.objects.all() if request.user.is_superuser else Job.objects.filter(user=request.user)
+        job = get_object_or_404(jobs, pk=pk)
+
+        name = job.data.get('file') if isinstance(job.data, dict) else None
+        storage = storages['job_files']
+        if not name or not storage.exists(name):
+            raise Http404
+
+        return FileResponse(storage.open(name), as_attachment=True, filename=os.path.basename(name))
+
+
 @register_model_view(Job, 'delete')
 class JobDeleteView(generic.ObjectDeleteView):
     queryset = Job.objects.defer('data')
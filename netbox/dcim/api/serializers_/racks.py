@@ -119,6 +119,10 @@ class RackSerializer(RackBaseSerializer):
         allow_null=True,
         default=None
     )
+    utilization = serializers.FloatField(
+        source='get_utilization',
+        read_only=True
+    )
 
     # Related object counts
     device_count = RelatedObjectCountField('devices')
@@ -131,7 +135,7 @@ class RackSerializer(RackBaseSerializer):
             'role', 'serial', 'asset_tag', 'rack_type', 'form_factor', 'width', 'u_height', 'starting_unit', 'weight',
             'max_weight', 'weight_unit', 'desc_units', 'outer_width', 'outer_height', 'outer_depth', 'outer_unit',
             'mounting_depth', 'airflow', 'description', 'comments', 'tags', 'custom_fields',
-            'created', 'last_updated', 'device_count', 'powerfeed_count',
+            'created', 'last_updated', 'device_count', 'powerfeed_count', 'utilization',
         ]
         brief_fields = ('id', 'url', 'display', 'name', 'description', 'device_count')
 
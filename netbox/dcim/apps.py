@@ -9,9 +9,9 @@ class DCIMConfig(AppConfig):
 
     def ready(self):
         from netbox.models.features import register_models
-        from utilities.counters import connect_counters
+        from utilities.counters import connect_counters, register_utilization
         from . import signals, search  # noqa: F401
-        from .models import CableTermination, Device, DeviceType, VirtualChassis
+        from .models import CableTermination, Device, DeviceType, Rack, VirtualChassis
 
         # Register models
         register_models(*self.get_models())
@@ -32,3 +32,6 @@ class DCIMConfig(AppConfig):
 
         # Register counters
         connect_counters(Device, DeviceType, VirtualChassis)
+
+        # Register cached utilization
+        register_utilization(Rack)
@@ -4,7 +4,7 @@ from django.db import models
 from django.utils.translation import gettext as _
 from netaddr import AddrFormatError, EUI, eui64_unix_expanded, mac_unix_expanded
 
-from .lookups import PathContains
+from .lookups import PathContains, PathOverlap
 
 __all__ = (
     'MACAddressField',
@@ -95,3 +95,4 @@ class PathField(ArrayField):
 
 
 PathField.register_lookup(PathContains)
+PathField.register_lookup(PathOverlap)
@@ -422,6 +422,9 @@ class RackFilterSet(NetBoxModelFilterSet, TenancyFilterSet, ContactModelFilterSe
     serial = MultiValueCharFilter(
         lookup_expr='iexact'
     )
+    utilization = MultiValueNumberFilter(
+        field_name='_utilization'
+    )
 
     class Meta:
         model = Rack
@@ -0,0 +1,220 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+
+from dcim.utils import decompile_path_node
+
+__all__ = (
+    'CableGraph',
+)
+
+
+class CableGraph:
+    """
+    An in-memory representation of the cabling among a set of objects, against which CablePaths can be traced. Cables
+    (together with their terminations), pass-through ports, and circuit terminations are retrieved in bulk as they are
+    first required, and retained for subsequent lookups. Objects may also be loaded in advance for a set of devices
+    using load_devices().
+
+    A CableGraph reflects the state of the database at the time each object was loaded. It should be used only for a
+    single batch of tracing, during which no cabling is modified.
+    """
+    def __init__(self):
+        self._objects = {}                                  # (content type ID, object ID) -> object
+        self._cables = {}                                   # cable ID -> Cable
+        self._cable_terminations = {}                       # cable ID -> list of CableTerminations
+        self._termination_cable_ends = {}                   # (content type ID, object ID) -> CableTermination
+        self._devices = set()                               # IDs of devices with all ports loaded
+        self._front_ports = defaultdict(list)               # rear port ID -> list of FrontPorts
+        self._port_order = {}                               # (content type ID, object ID) -> rank
+        self._circuit_terminations = {}                     # circuit ID -> {term_side: CircuitTermination}
+
+    @staticmethod
+    def _get_key(obj):
+        return ContentType.objects.get_for_model(obj).pk, obj.pk
+
+    def _register(self, obj):
+        """
+        Record an object in the graph, returning the instance already held (if any) for consistency.
+        """
+        return self._objects.setdefault(self._get_key(obj), obj)
+
+    #
+    # Loading
+    #
+
+    def load_devices(self, device_ids):
+        """
+        Load all cables attached to the specified devices, as well as the devices' front and rear ports.
+        """
+        from dcim.models import CableTermination
+
+        cable_ids = CableTermination.objects.filter(_device_id__in=device_ids).values_list('cable_id', flat=True)
+        self._load_cables(set(cable_ids))
+        self._load_device_ports(device_ids)
+
+    def _load_cables(self, cable_ids):
+        """
+        Retrieve the specified cables, along with all of their terminations and the terminating objects.
+        """
+        from dcim.models import Cable, CableTermination
+
+        cable_ids = {pk for pk in cable_ids if pk not in self._cables}
+        if not cable_ids:
+            return
+
+        for cable in Cable.objects.filter(pk__in=cable_ids):
+            self._cables[cable.pk] = cable
+            self._cable_terminations[cable.pk] = []
+
+        # Group termination IDs by type so that each type of terminating object can be retrieved in a single query
+        missing_objects = defaultdict(set)
+        for cable_termination in CableTermination.objects.filter(cable_id__in=cable_ids):
+            key = (cable_termination.termination_type_id, cable_termination.termination_id)
+            self._cable_terminations.setdefault(cable_termination.cable_id, []).append(cable_termination)
+            self._termination_cable_ends[key] = cable_termination
+            if key not in self._objects:
+                missing_objects[cable_termination.termination_type_id].add(cable_termination.termination_id)
+        self._load_objects(missing_objects)
+
+    def _load_objects(self, object_ids):
+        """
+        Retrieve objects from a mapping of content type IDs to sets of object IDs.
+        """
+        for ct_id, pks in object_ids.items():
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            for obj in model.objects.filter(pk__in=pks):
+                self._register(obj)
+
+    def _load_device_ports(self, device_ids):
+        """
+        Retrieve all front and rear ports belonging to the specified devices. Each port's position in the model's
+        default ordering is recorded so that subsets can be returned in the order in which the database would
+        return them.
+        """
+        from dcim.models import FrontPort, RearPort
+
+        device_ids = {pk for pk in device_ids if pk not in self._devices}
+        if not device_ids:
+            return
+        self._devices.update(device_ids)
+
+        for model in (RearPort, FrontPort):
+            for rank, port in enumerate(model.objects.filter(device_id__in=device_ids)):
+                port = self._register(port)
+                self._port_order[self._get_key(port)] = (port.device_id, rank)
+                if model is FrontPort:
+                    self._front_ports[port.rear_port_id].append(port)
+
+    def _sort_ports(self, ports):
+        return sorted(ports, key=lambda port: self._port_order[self._get_key(port)])
+
+    #
+    # Lookups
+    #
+
+    def get_objects(self, nodes):
+        """
+        Return the objects represented by an iterable of path nodes, omitting any which no longer exist.
+        """
+        nodes = [decompile_path_node(node) for node in nodes]
+        missing_objects = defaultdict(set)
+        for key in nodes:
+            if key not in self._objects:
+                missing_objects[key[0]].add(key[1])
+        self._load_objects(missing_objects)
+
+        return [self._objects[key] for key in nodes if key in self._objects]
+
+    def get_links(self, terminations):
+        """
+        Return the link (if any) attached to each of the given terminations.
+        """
+        self._load_cables([t.cable_id for t in terminations if t.cable_id])
+
+        links = []
+        for termination in terminations:
+            if cable := self._cables.get(termination.cable_id):
+                links.append(cable)
+            else:
+                # Fall back to the termination's link property (e.g. for wireless links)
+                links.append(termination.link)
+        return links
+
+    def get_parent_key(self, termination):
+        """
+        Return a value identifying the parent object of a termination, without retrieving it where possible.
+        """
+        for field in ('device_id', 'circuit_id'):
+            if hasattr(termination, field):
+                return field, getattr(termination, field)
+        return termination.parent_object
+
+    def get_far_end_terminations(self, terminations):
+        """
+        Return the objects attached to the opposite ends of the cables connected to the given terminations, ordered
+        by cable, cable end, and CableTermination ID. Returns None if no CableTerminations exist for the given
+        terminations.
+        """
+        self._load_cables([t.cable_id for t in terminations if t.cable_id])
+
+        far_ends = set()
+        for termination in terminations:
+            if cable_termination := self._termination_cable_ends.get(self._get_key(termination)):
+                far_ends.add((cable_termination.cable_id, 'A' if cable_termination.cable_end == 'B' else 'B'))
+        if not far_ends:
+            return None
+        self._load_cables([cable_id for cable_id, _ in far_ends])
+
+        cable_terminations = sorted(
+            (
+                ct for cable_id, cable_end in far_ends
+                for ct in self._cable_terminations.get(cable_id, []) if ct.cable_end == cable_end
+            ),
+            key=lambda ct: (ct.cable_id, ct.cable_end, ct.pk)
+        )
+        return [
+            self._objects.get((ct.termination_type_id, ct.termination_id)) for ct in cable_terminations
+        ]
+
+    def get_rear_ports(self, front_ports):
+        """
+        Return the rear ports to which the given front ports map.
+        """
+        from dcim.models import RearPort
+
+        self._load_device_ports({fp.device_id for fp in front_ports})
+        rear_port_type = ContentType.objects.get_for_model(RearPort).pk
+        rear_ports = {
+            self._objects[key] for fp in front_ports if (key := (rear_port_type, fp.rear_port_id)) in self._objects
+        }
+        return self._sort_ports(rear_ports)
+
+    def get_front_ports(self, positions):
+        """
+        Return the front ports which map to the given positions, expressed as an iterable of (rear port, position)
+        tuples. A position of None matches all front ports mapped to the rear port.
+        """
+        positions = list(positions)
+        self._load_device_ports({rear_port.device_id for rear_port, _ in positions})
+
+        front_ports = {
+            fp for rear_port, position in positions for fp in self._front_ports[rear_port.pk]
+            if position is None or fp.rear_port_position == position
+        }
+        return self._sort_ports(front_ports)
+
+    def get_peer_circuit_termination(self, circuit_termination):
+        """
+        Return the CircuitTermination on the opposite side of a circuit, if any.
+        """
+        from circuits.models import CircuitTermination
+
+        circuit_id = circuit_termination.circuit_id
+        if circuit_id not in self._circuit_terminations:
+            self._circuit_terminations[circuit_id] = {
+                ct.term_side: self._register(ct)
+                for ct in CircuitTermination.objects.filter(circuit_id=circuit_id).select_related('_provider_network')
+            }
+        peer_side = 'Z' if circuit_termination.term_side == 'A' else 'A'
+        return self._circuit_terminations[circuit_id].get(peer_side)
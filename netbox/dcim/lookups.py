@@ -1,4 +1,4 @@
-from django.contrib.postgres.fields.array import ArrayContains
+from django.contrib.postgres.fields.array import ArrayContains, ArrayOverlap
 
 from dcim.utils import object_to_path_node
 
@@ -8,3 +8,10 @@ class PathContains(ArrayContains):
     def get_prep_lookup(self):
         self.rhs = [object_to_path_node(self.rhs)]
         return super().get_prep_lookup()
+
+
+class PathOverlap(ArrayOverlap):
+
+    def __init__(self, lhs, rhs):
+        # Convert objects to path nodes before the RHS is compiled into an array expression
+        super().__init__(lhs, [object_to_path_node(obj) for obj in rhs])
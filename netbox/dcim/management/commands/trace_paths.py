@@ -1,10 +1,17 @@
-from django.core.management.base import BaseCommand
+import time
+from collections import defaultdict
+from functools import partial
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
 from django.core.management.color import no_style
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import Q
 
+from dcim.graph import CableGraph
 from dcim.models import CablePath, ConsolePort, ConsoleServerPort, Interface, PowerFeed, PowerOutlet, PowerPort
-from dcim.signals import create_cablepath
+from dcim.utils import save_cablepaths
+from utilities.parallel import get_pk_chunks, run_in_parallel
 
 ENDPOINT_MODELS = (
     ConsolePort,
@@ -16,6 +23,84 @@ ENDPOINT_MODELS = (
 )
 
 
+def get_origins(model, force=False):
+    """
+    Return all cabled instances of the given endpoint model. Unless force is True, only instances which have no
+    CablePath are returned.
+    """
+    params = Q(cable__isnull=False)
+    if hasattr(model, 'wireless_link'):
+        params |= Q(wireless_link__isnull=False)
+    origins = model.objects.filter(params)
+    if not force:
+        origins = origins.filter(_path__isnull=True)
+    return origins
+
+
+def _path_differences(stored, computed):
+    """
+    Return a list of the attributes which differ between a stored CablePath and a newly computed one.
+    """
+    if stored is None:
+        return ['missing'] if computed else []
+    if computed is None:
+        return ['obsolete']
+    return [
+        attr for attr in ('path', 'is_active', 'is_complete') if getattr(stored, attr) != getattr(computed, attr)
+    ]
+
+
+def _trace_chunk(model_label, start, end, force=False, dry_run=False):
+    """
+    Trace paths for all origins of the specified model with a primary key in the range [start, end). New CablePaths
+    are created in bulk. If dry_run is True, nothing is written; instead, each origin whose stored path differs from
+    the computed path is reported.
+    """
+    start_time = time.time()
+    model = apps.get_model(model_label)
+    origins = get_origins(model, force=force or dry_run).filter(pk__gte=start, pk__lt=end).order_by('pk')
+    if dry_run:
+        origins = origins.select_related('_path')
+    origins = list(origins)
+
+    # Preload the cabling of all parent devices
+    graph = CableGraph()
+    if hasattr(model, 'device_id'):
+        graph.load_devices({origin.device_id for origin in origins})
+
+    new_paths = []
+    differences = []
+    seen_paths = set()
+    for origin in origins:
+        if not dry_run:
+            new_paths.append(CablePath.from_origin([origin], graph=graph))
+            continue
+
+        # Retrace each stored path once, from all of its originating objects
+        stored = origin._path
+        if stored is not None:
+            if stored.pk in seen_paths:
+                continue
+            seen_paths.add(stored.pk)
+            computed = CablePath.from_origin(graph.get_objects(stored.path[0]), graph=graph)
+        else:
+            computed = CablePath.from_origin([origin], graph=graph)
+        if diff := _path_differences(stored, computed):
+            differences.append((origin.pk, str(origin), diff))
+
+    if not dry_run:
+        with transaction.atomic(using=CablePath.objects.db):
+            save_cablepaths([cp for cp in new_paths if cp])
+
+    return {
+        'model': model_label,
+        'origins': len(origins),
+        'differences': differences,
+        'start': start_time,
+        'end': time.time(),
+    }
+
+
 class Command(BaseCommand):
     help = "Generate any missing cable paths among all cable termination objects in NetBox"
 
@@ -28,6 +113,18 @@ class Command(BaseCommand):
             "--no-input", action='store_true', dest='no_input',
             help="Do not prompt user for any input/confirmation"
         )
+        parser.add_argument(
+            "--dry-run", action='store_true', dest='dry_run',
+            help="Report any existing or missing cable paths which differ from those computed, without saving changes"
+        )
+        parser.add_argument(
+            "--workers", type=int,
+            help="Trace paths in chunks of primary keys using the specified number of worker processes"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="The size of each chunk of primary keys (default: 1000)"
+        )
 
     def draw_progress_bar(self, percentage):
         """
@@ -37,6 +134,13 @@ class Command(BaseCommand):
         self.stdout.write(f"\r  [{'#' * bar_size}{' ' * (20 - bar_size)}] {int(percentage)}%", ending='')
 
     def handle(self, *model_names, **options):
+        workers = options['workers']
+        if workers is not None and workers < 1:
+            raise CommandError("The number of workers must be a positive integer.")
+        if options['chunk_size'] < 1:
+            raise CommandError("The chunk size must be a positive integer.")
+        if options['dry_run'] and options['force']:
+            raise CommandError("The --dry-run option cannot be used with --force.")
 
         # If --force was passed, first delete all existing CablePaths
         if options['force']:
@@ -66,25 +170,62 @@ class Command(BaseCommand):
                 for sql in sequence_sql:
                     cursor.execute(sql)
 
-        # Retrace paths
+        # Determine the chunks of origins to be traced for each model
+        force, dry_run = options['force'], options['dry_run']
+        chunks = {}
+        origins_count = 0
         for model in ENDPOINT_MODELS:
-            params = Q(cable__isnull=False)
-            if hasattr(model, 'wireless_link'):
-                params |= Q(wireless_link__isnull=False)
-            origins = model.objects.filter(params)
-            if not options['force']:
-                origins = origins.filter(_path__isnull=True)
-            origins_count = origins.count()
-            if not origins_count:
+            origins = get_origins(model, force=force or dry_run)
+            if model_chunks := get_pk_chunks(origins, options['chunk_size']):
+                chunks[model._meta.label_lower] = model_chunks
+                origins_count += origins.count()
+            elif dry_run:
+                self.stdout.write(f'Found no cabled {model._meta.verbose_name_plural}; skipping')
+            else:
                 self.stdout.write(f'Found no missing {model._meta.verbose_name} paths; skipping')
-                continue
-            self.stdout.write(f'Retracing {origins_count} cabled {model._meta.verbose_name_plural}...')
-            i = 0
-            for i, obj in enumerate(origins, start=1):
-                create_cablepath([obj])
-                if not i % 100:
-                    self.draw_progress_bar(i * 100 / origins_count)
-            self.draw_progress_bar(100)
-            self.stdout.write(self.style.SUCCESS(f'\n  Retraced {i} {model._meta.verbose_name_plural}'))
+        if not chunks:
+            self.stdout.write(self.style.SUCCESS('Finished.'))
+            return
+
+        # Retrace paths
+        if dry_run:
+            self.stdout.write(f'Checking paths for {origins_count} cabled endpoints...')
+        else:
+            self.stdout.write(f'Retracing paths for {origins_count} cabled endpoints...')
+        remaining = {model_label: len(model_chunks) for model_label, model_chunks in chunks.items()}
+        stats = defaultdict(lambda: {'origins': 0, 'differences': [], 'start': float('inf'), 'end': 0})
+        traced_count = 0
+        tasks = [
+            (model_label, start, end) for model_label, model_chunks in chunks.items() for start, end in model_chunks
+        ]
+        trace_chunk = partial(_trace_chunk, force=force, dry_run=dry_run)
+        for result in run_in_parallel(trace_chunk, tasks, workers):
+            model_label = result['model']
+            model_stats = stats[model_label]
+            model_stats['origins'] += result['origins']
+            model_stats['differences'].extend(result['differences'])
+            model_stats['start'] = min(model_stats['start'], result['start'])
+            model_stats['end'] = max(model_stats['end'], result['end'])
+            traced_count += result['origins']
+            self.draw_progress_bar(traced_count * 100 / origins_count)
+
+            # Report the throughput for each model once all of its chunks have been completed
+            remaining[model_label] -= 1
+            if not remaining[model_label]:
+                verbose_name_plural = apps.get_model(model_label)._meta.verbose_name_plural
+                elapsed = max(model_stats['end'] - model_stats['start'], 0.001)
+                self.stdout.write(self.style.SUCCESS(
+                    f'\n  {"Checked" if dry_run else "Retraced"} {model_stats["origins"]} {verbose_name_plural} in '
+                    f'{len(chunks[model_label])} chunks ({model_stats["origins"] / elapsed:.0f}/s)'
+                ))
+
+        # Report any paths which differ from those stored
+        if dry_run:
+            differences_count = 0
+            for model_label, model_stats in stats.items():
+                for pk, name, diff in sorted(model_stats['differences']):
+                    self.stdout.write(self.style.WARNING(f'  {model_label} {pk} ({name}): {", ".join(diff)}'))
+                differences_count += len(model_stats['differences'])
+            self.stdout.write(f'Found {differences_count} paths which differ from those computed')
 
         self.stdout.write(self.style.SUCCESS('Finished.'))
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dcim', '0216_cablepath_nodes_gin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rack',
+            name='_utilization',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
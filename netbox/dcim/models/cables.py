@@ -2,6 +2,7 @@ import itertools
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.dispatch import Signal
@@ -512,7 +513,9 @@ class CablePath(models.Model):
     if the instance represents a complete end-to-end path from origin(s) to destination(s). `is_split` is True if the
     path diverges across multiple cables.
 
-    `_nodes` retains a flattened list of all nodes within the path to enable simple filtering.
+    `_nodes` retains a flattened list of all nodes within the path to enable simple filtering. It is covered by a GIN
+    index, so that the paths which traverse a given object (`_nodes__contains`) or any of a set of objects
+    (`_nodes__overlap`) can be found without scanning the table.
     """
     path = models.JSONField(
         verbose_name=_('path'),
@@ -537,6 +540,9 @@ class CablePath(models.Model):
     class Meta:
         verbose_name = _('cable path')
         verbose_name_plural = _('cable paths')
+        indexes = [
+            GinIndex(fields=['_nodes']),
+        ]
 
     def __str__(self):
         return f"Path #{self.pk}: {len(self.path)} hops"
@@ -598,19 +604,25 @@ class CablePath(models.Model):
         return int(len(self.path) / 3)
 
     @classmethod
-    def from_origin(cls, terminations):
+    def from_origin(cls, terminations, graph=None):
         """
         Create a new CablePath instance as traced from the given termination objects. These can be any object to which a
         Cable or WirelessLink connects (interfaces, console ports, circuit termination, etc.). All terminations must be
         of the same type and must belong to the same parent object.
+
+        Related objects are retrieved through a CableGraph. A graph may be passed to share previously retrieved objects
+        among multiple traces.
         """
         from circuits.models import CircuitTermination
+        from dcim.graph import CableGraph
 
         if not terminations:
             return None
+        if graph is None:
+            graph = CableGraph()
 
         # Ensure all originating terminations are attached to the same link
-        if len(terminations) > 1 and not all(t.link == terminations[0].link for t in terminations[1:]):
+        if len(terminations) > 1 and len(set(graph.get_links(terminations))) > 1:
             raise UnsupportedCablePath(_("All originating terminations must be attached to the same link"))
 
         path = []
@@ -626,13 +638,14 @@ class CablePath(models.Model):
                 raise UnsupportedCablePath(_("All mid-span terminations must have the same termination type"))
 
             # All mid-span terminations must all be attached to the same device
-            if (not isinstance(terminations[0], PathEndpoint) and not
-                    all(t.parent_object == terminations[0].parent_object for t in terminations[1:])):
+            if (not isinstance(terminations[0], PathEndpoint) and
+                    len({graph.get_parent_key(t) for t in terminations}) > 1):
                 raise UnsupportedCablePath(_("All mid-span terminations must have the same parent object"))
 
             # Check for a split path (e.g. rear port fanning out to multiple front ports with
             # different cables attached)
-            if len(set(t.link for t in terminations)) > 1 and (
+            termination_links = graph.get_links(terminations)
+            if len(set(termination_links)) > 1 and (
                     position_stack and len(terminations) != len(position_stack[-1])
             ):
                 is_split = True
@@ -644,7 +657,7 @@ class CablePath(models.Model):
             ])
 
             # Step 2: Determine the attached links (Cable or WirelessLink), if any
-            links = [termination.link for termination in terminations if termination.link is not None]
+            links = [link for link in termination_links if link is not None]
             if len(links) == 0:
                 if len(path) == 1:
                     # If this is the start of the path and no link exists, return None
@@ -657,7 +670,7 @@ class CablePath(models.Model):
                 raise UnsupportedCablePath(_("All links must match first link type"))
 
             # Step 3: Record asymmetric paths as split
-            not_connected_terminations = [termination.link for termination in terminations if termination.link is None]
+            not_connected_terminations = [link for link in termination_links if link is None]
             if len(not_connected_terminations) > 0:
                 is_complete = False
                 is_split = True
@@ -676,23 +689,11 @@ class CablePath(models.Model):
 
             # Step 6: Determine the far-end terminations
             if isinstance(links[0], Cable):
-                termination_type = ObjectType.objects.get_for_model(terminations[0])
-                local_cable_terminations = CableTermination.objects.filter(
-                    termination_type=termination_type,
-                    termination_id__in=[t.pk for t in terminations]
-                )
+                remote_terminations = graph.get_far_end_terminations(terminations)
 
-                q_filter = Q()
-                for lct in local_cable_terminations:
-                    cable_end = 'A' if lct.cable_end == 'B' else 'B'
-                    q_filter |= Q(cable=lct.cable, cable_end=cable_end)
-
-                # Make sure this filter has been populated; if not, we have probably been given invalid data
-                if not q_filter:
+                # Make sure the far end has been found; if not, we have probably been given invalid data
+                if remote_terminations is None:
                     break
-
-                remote_cable_terminations = CableTermination.objects.filter(q_filter)
-                remote_terminations = [ct.termination for ct in remote_cable_terminations]
             else:
                 # WirelessLink
                 remote_terminations = [
@@ -716,9 +717,7 @@ class CablePath(models.Model):
 
             if isinstance(remote_terminations[0], FrontPort):
                 # Follow FrontPorts to their corresponding RearPorts
-                rear_ports = RearPort.objects.filter(
-                    pk__in=[t.rear_port_id for t in remote_terminations]
-                )
+                rear_ports = graph.get_rear_ports(remote_terminations)
                 if len(rear_ports) > 1 or rear_ports[0].positions > 1:
                     position_stack.append([fp.rear_port_position for fp in remote_terminations])
 
@@ -726,10 +725,7 @@ class CablePath(models.Model):
 
             elif isinstance(remote_terminations[0], RearPort):
                 if len(remote_terminations) == 1 and remote_terminations[0].positions == 1:
-                    front_ports = FrontPort.objects.filter(
-                        rear_port_id__in=[rp.pk for rp in remote_terminations],
-                        rear_port_position=1
-                    )
+                    front_ports = graph.get_front_ports([(remote_terminations[0], 1)])
                 # Obtain the individual front ports based on the termination and all positions
                 elif len(remote_terminations) > 1 and position_stack:
                     positions = position_stack.pop()
@@ -741,22 +737,15 @@ class CablePath(models.Model):
                         )
 
                     # Get our front ports
-                    q_filter = Q()
-                    for rt in remote_terminations:
-                        position = positions.pop()
-                        q_filter |= Q(rear_port_id=rt.pk, rear_port_position=position)
-                    if q_filter is Q():
-                        raise UnsupportedCablePath(_("Remote termination position filter is missing"))
-                    front_ports = FrontPort.objects.filter(q_filter)
+                    front_ports = graph.get_front_ports([(rt, positions.pop()) for rt in remote_terminations])
                 # Obtain the individual front ports based on the termination and position
                 elif position_stack:
-                    front_ports = FrontPort.objects.filter(
-                        rear_port_id=remote_terminations[0].pk,
-                        rear_port_position__in=position_stack.pop()
-                    )
+                    front_ports = graph.get_front_ports([
+                        (remote_terminations[0], position) for position in position_stack.pop()
+                    ])
                 # If all rear ports have a single position, we can just get the front ports
                 elif all([rp.positions == 1 for rp in remote_terminations]):
-                    front_ports = FrontPort.objects.filter(rear_port_id__in=[rp.pk for rp in remote_terminations])
+                    front_ports = graph.get_front_ports([(rp, None) for rp in remote_terminations])
 
                     if len(front_ports) != len(remote_terminations):
                         # Some rear ports does not have a front port
@@ -774,10 +763,7 @@ class CablePath(models.Model):
                 if len(remote_terminations) > 1:
                     is_split = True
                     break
-                circuit_termination = CircuitTermination.objects.filter(
-                    circuit=remote_terminations[0].circuit,
-                    term_side='Z' if remote_terminations[0].term_side == 'A' else 'A'
-                ).first()
+                circuit_termination = graph.get_peer_circuit_termination(remote_terminations[0])
                 if circuit_termination is None:
                     break
                 elif circuit_termination._provider_network:
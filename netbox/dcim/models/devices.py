@@ -20,7 +20,7 @@ from dcim.choices import *
 from dcim.constants import *
 from dcim.fields import MACAddressField
 from dcim.utils import update_interface_bridges
-from extras.models import ConfigContextModel, CustomField
+from extras.models import CachedConfigContextModel, CustomField
 from extras.querysets import ConfigContextModelQuerySet
 from netbox.choices import ColorChoices
 from netbox.config import ConfigItem
@@ -218,6 +218,9 @@ class DeviceType(ImageAttachmentsMixin, PrimaryModel, WeightMixin):
         # Save a copy of u_height for validation in clean()
         self._original_u_height = self.__dict__.get('u_height')
 
+        # Save a copy of exclude_from_utilization so we can check if it has changed on post_save
+        self._original_exclude_from_utilization = self.__dict__.get('exclude_from_utilization')
+
         # Save references to the original front/rear images
         self._original_front_image = self.__dict__.get('front_image')
         self._original_rear_image = self.__dict__.get('rear_image')
@@ -480,7 +483,7 @@ class Device(
     ContactsMixin,
     ImageAttachmentsMixin,
     RenderConfigMixin,
-    ConfigContextModel,
+    CachedConfigContextModel,
     TrackingModelMixin,
     PrimaryModel
 ):
@@ -742,6 +745,12 @@ class Device(
         verbose_name = _('device')
         verbose_name_plural = _('devices')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Cache the original rack so we can check if it has changed on post_save
+        self._original_rack_id = self.__dict__.get('rack_id')
+
     def __str__(self):
         if self.label and self.asset_tag:
             return f'{self.label} ({self.asset_tag})'
@@ -12,6 +12,7 @@ from django.utils.translation import gettext_lazy as _
 
 from dcim.choices import *
 from dcim.constants import *
+from dcim.querysets import RackQuerySet
 from dcim.svg import RackElevationSVG
 from netbox.choices import ColorChoices
 from netbox.models import OrganizationalModel, PrimaryModel
@@ -325,6 +326,13 @@ class Rack(ContactsMixin, ImageAttachmentsMixin, RackBase):
         null=True
     )
 
+    # Cached utilization (null if not yet calculated)
+    _utilization = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False
+    )
+
     # Generic relations
     vlan_groups = GenericRelation(
         to='ipam.VLANGroup',
@@ -333,6 +341,8 @@ class Rack(ContactsMixin, ImageAttachmentsMixin, RackBase):
         related_query_name='rack'
     )
 
+    objects = RackQuerySet.as_manager()
+
     clone_fields = (
         'site', 'location', 'tenant', 'status', 'role', 'form_factor', 'width', 'airflow', 'u_height', 'desc_units',
         'outer_width', 'outer_height', 'outer_depth', 'outer_unit', 'mounting_depth', 'weight', 'max_weight',
@@ -603,6 +613,15 @@ class Rack(ContactsMixin, ImageAttachmentsMixin, RackBase):
         return self.devices.filter(position=0)
 
     def get_utilization(self):
+        """
+        Return the utilization rate of the rack as a percentage, using the cached value if present.
+        """
+        if self._utilization is not None:
+            return self._utilization
+
+        return self.calculate_utilization()
+
+    def calculate_utilization(self):
         """
         Determine the utilization rate of the rack and return it as a percentage. Occupied and reserved units both count
         as utilized.
@@ -705,6 +724,12 @@ class RackReservation(PrimaryModel):
         verbose_name = _('rack reservation')
         verbose_name_plural = _('rack reservations')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Cache the original rack so we can check if it has changed on post_save
+        self._original_rack_id = self.__dict__.get('rack_id')
+
     def __str__(self):
         return "Reservation for rack {}".format(self.rack)
 
@@ -0,0 +1,19 @@
+from utilities.querysets import RestrictedQuerySet
+
+__all__ = (
+    'RackQuerySet',
+)
+
+
+class RackQuerySet(RestrictedQuerySet):
+
+    def update_utilization(self):
+        """
+        Recalculate and save the utilization of each Rack. Rack utilization is calculated per instance (see
+        Rack.calculate_utilization()), so this requires several queries for each Rack.
+        """
+        racks = list(self)
+        for rack in racks:
+            rack._utilization = rack.calculate_utilization()
+
+        return self.model.objects.bulk_update(racks, ['_utilization'], batch_size=100)
@@ -6,9 +6,9 @@ from django.dispatch import receiver
 from dcim.choices import CableEndChoices, LinkStatusChoices
 from virtualization.models import VMInterface
 from .models import (
-    Cable, CablePath, CableTermination, ConsolePort, ConsoleServerPort, Device, DeviceBay, FrontPort, Interface,
-    InventoryItem, ModuleBay, PathEndpoint, PowerOutlet, PowerPanel, PowerPort, Rack, RearPort, Location,
-    VirtualChassis,
+    Cable, CablePath, CableTermination, ConsolePort, ConsoleServerPort, Device, DeviceBay, DeviceType, FrontPort,
+    Interface, InventoryItem, ModuleBay, PathEndpoint, PowerOutlet, PowerPanel, PowerPort, Rack, RackReservation,
+    RearPort, Location, VirtualChassis,
 )
 from .models.cables import trace_paths
 from .utils import create_cablepath, rebuild_paths
@@ -69,6 +69,58 @@ def handle_device_site_change(instance, created, **kwargs):
             )
 
 
+#
+# Rack utilization
+#
+
+def update_rack_utilization(*rack_ids):
+    """
+    Recalculate the cached utilization of the specified Racks.
+    """
+    if rack_ids := {pk for pk in rack_ids if pk is not None}:
+        Rack.objects.filter(pk__in=rack_ids).update_utilization()
+
+
+@receiver(post_save, sender=Rack)
+def handle_rack_saved(instance, **kwargs):
+    """
+    Recalculate a Rack's utilization whenever it is saved (e.g. its height may have changed).
+    """
+    instance._utilization = instance.calculate_utilization()
+    Rack.objects.filter(pk=instance.pk).update(_utilization=instance._utilization)
+
+
+@receiver(post_save, sender=Device)
+@receiver(post_delete, sender=Device)
+def handle_device_rack_change(instance, **kwargs):
+    """
+    Recalculate the utilization of the Device's current and previous Racks.
+    """
+    update_rack_utilization(instance.rack_id, instance._original_rack_id)
+
+
+@receiver(post_save, sender=RackReservation)
+@receiver(post_delete, sender=RackReservation)
+def handle_rackreservation_change(instance, **kwargs):
+    """
+    Recalculate the utilization of the RackReservation's current and previous Racks.
+    """
+    update_rack_utilization(instance.rack_id, instance._original_rack_id)
+
+
+@receiver(post_save, sender=DeviceType)
+def handle_devicetype_height_change(instance, created, **kwargs):
+    """
+    Recalculate the utilization of all Racks containing Devices of this type if its height or exclusion from
+    utilization has changed.
+    """
+    if not created and (
+        instance.u_height != instance._original_u_height or
+        instance.exclude_from_utilization != instance._original_exclude_from_utilization
+    ):
+        Rack.objects.filter(devices__device_type=instance).distinct().update_utilization()
+
+
 #
 # Virtual chassis
 #
@@ -153,7 +153,7 @@ class RackTable(TenancyColumnsMixin, ContactsColumnMixin, NetBoxTable):
         verbose_name=_('Devices')
     )
     get_utilization = columns.UtilizationColumn(
-        orderable=False,
+        order_by=('_utilization',),
         verbose_name=_('Space')
     )
     get_power_utilization = columns.UtilizationColumn(
@@ -1,10 +1,20 @@
 import json
-
+import tarfile
+import tempfile
+import zipfile
+from io import BytesIO
+
+import django_rq
+from django.conf import settings
+from django.core.files.storage import storages
 from django.test import override_settings, tag
 from django.urls import reverse
 from django.utils.translation import gettext as _
 from rest_framework import status
+from rq.job import Job as RQ_Job
 
+from core.choices import JobStatusChoices
+from core.models import Job
 from dcim.choices import *
 from dcim.constants import *
 from dcim.models import *
@@ -13,7 +23,7 @@ from ipam.choices import VLANQinQRoleChoices
 from ipam.models import ASN, RIR, VLAN, VRF
 from netbox.api.serializers import GenericObjectSerializer
 from tenancy.models import Tenant
-from users.models import User
+from users.models import Token, User
 from utilities.testing import APITestCase, APIViewTestCases, create_test_device, disable_logging
 from virtualization.models import Cluster, ClusterType
 from wireless.choices import WirelessChannelChoices
@@ -1492,6 +1502,107 @@ class DeviceTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_200_OK)
         self.assertEqual(response.data['content'], f'Config for device {device.name}')
 
+    def test_render_configs(self):
+        configtemplate = ConfigTemplate.objects.create(
+            name='Config Template 1',
+            template_code='Config for device {{ device.name }}{{ suffix }}',
+            file_extension='cfg'
+        )
+        device1, device2 = Device.objects.order_by('pk')[:2]
+        device1.config_template = configtemplate
+        device1.save()
+
+        self.add_permissions('dcim.add_device')
+        url = reverse('dcim-api:device-render-configs') + f'?id={device1.pk}&id={device2.pk}'
+
+        # NDJSON
+        response = self.client.post(url, {'data': {'suffix': '!'}}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        results = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(results, [
+            {
+                'id': device1.pk,
+                'name': device1.name,
+                'configtemplate': configtemplate.pk,
+                'content': f'Config for device {device1.name}!',
+            },
+            {
+                'id': device2.pk,
+                'name': device2.name,
+                'configtemplate': None,
+                'error': 'No config template found for this device.',
+            },
+        ])
+
+        # Archives include a file for each rendered configuration, followed by any errors
+        file_name = f'{device1.name.replace(" ", "_")}_{device1.pk}.cfg'
+        response = self.client.post(url, {'format': 'tar'}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        with tarfile.open(fileobj=BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.getnames(), [file_name, 'errors.json'])
+            self.assertEqual(archive.extractfile(file_name).read().decode(), f'Config for device {device1.name}')
+            self.assertEqual(json.load(archive.extractfile('errors.json'))[0]['id'], device2.pk)
+
+        response = self.client.post(url, {'format': 'zip'}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), [file_name, 'errors.json'])
+            self.assertEqual(archive.read(file_name).decode(), f'Config for device {device1.name}')
+
+    def test_render_configs_background(self):
+        configtemplate = ConfigTemplate.objects.create(
+            name='Config Template 1',
+            template_code='Config for device {{ device.name }}',
+            file_extension='cfg'
+        )
+        device1, device2 = Device.objects.order_by('pk')[:2]
+        device1.config_template = configtemplate
+        device1.save()
+
+        self.add_permissions('dcim.add_device')
+        url = reverse('dcim-api:device-render-configs') + f'?id={device1.pk}&id={device2.pk}'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'format': 'zip', 'background': True}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Render Configs')
+        self.assertEqual(response.data['status']['value'], 'pending')
+
+        # Execute the enqueued job
+        job = Job.objects.get(pk=response.data['id'])
+        with tempfile.TemporaryDirectory() as job_files_root, override_settings(STORAGES={
+            **settings.STORAGES,
+            'job_files': {'BACKEND': 'extras.storage.JobFileSystemStorage', 'OPTIONS': {'location': job_files_root}},
+        }):
+            RQ_Job.fetch(str(job.job_id), connection=django_rq.get_connection()).perform()
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+            self.assertEqual(job.data['rendered'], 1)
+            self.assertEqual(job.data['errors'], 1)
+            self.assertTrue(job.data['file'].endswith('/netbox_devices_configs.zip'))
+
+            # The rendered configurations are saved to a file outside MEDIA_ROOT, rather than in the job's data
+            file_name = f'{device1.name.replace(" ", "_")}_{device1.pk}.cfg'
+            with storages['job_files'].open(job.data['file']) as f:
+                self.assertEqual(len(f.read()), job.data['size'])
+                with zipfile.ZipFile(f) as archive:
+                    self.assertEqual(archive.namelist(), [file_name, 'errors.json'])
+                    self.assertEqual(archive.read(file_name).decode(), f'Config for device {device1.name}')
+
+            # The file may be downloaded only by the user who requested it
+            response = self.client.get(job.data['url'], **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+            self.assertEqual(len(b''.join(response.streaming_content)), job.data['size'])
+            other_token = Token.objects.create(user=User.objects.create_user(username='otheruser'))
+            response = self.client.get(job.data['url'], HTTP_AUTHORIZATION=f'Token {other_token.key}')
+            self.assertHttpStatus(response, status.HTTP_404_NOT_FOUND)
+
+            # Deleting the job deletes the saved file
+            with self.captureOnCommitCallbacks(execute=True):
+                job.delete()
+            self.assertFalse(storages['job_files'].exists(job.data['file']))
+
 
 class ModuleTest(APIViewTestCases.APIViewTestCase):
     model = Module
@@ -1,10 +1,15 @@
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import CommandError, call_command
 from django.test import TestCase
 
 from circuits.models import *
 from dcim.choices import LinkStatusChoices
+from dcim.graph import CableGraph
 from dcim.models import *
 from dcim.svg import CableTraceSVG
-from dcim.utils import object_to_path_node
+from dcim.utils import compile_path_node, object_to_path_node, rebuild_paths
 from utilities.exceptions import AbortRequest
 
 
@@ -17,6 +22,9 @@ class CablePathTestCase(TestCase):
         2XX: Test different cable topologies
         3XX: Test responses to changes in existing objects
         4XX: Test to exclude specific cable topologies
+        5XX: Test tracing against a shared CableGraph
+        6XX: Test the trace_paths management command
+        7XX: Test lookups and rebuilding of paths by node
     """
     @classmethod
     def setUpTestData(cls):
@@ -2510,3 +2518,158 @@ class CablePathTestCase(TestCase):
             is_active=True
         )
         self.assertEqual(CablePath.objects.count(), 0)
+
+    def test_501_trace_with_preloaded_graph(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C5-- [RP2] [FP2:1] --C6-- [IF5]
+        [IF2] --C2-- [FP1:2]                    [FP2:2] --C7-- [IF6]
+        [IF3] --C3-- [FP1:3]                    [FP2:3] --C8-- [IF7]
+        [IF4] --C4-- [FP1:4]                    [FP2:4] --C9-- [IF8]
+        """
+        interfaces = [
+            Interface.objects.create(device=self.device, name=f'Interface {i}') for i in range(1, 9)
+        ]
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=4)
+        rearport2 = RearPort.objects.create(device=self.device, name='Rear Port 2', positions=4)
+        for i in range(1, 5):
+            Cable(
+                a_terminations=[interfaces[i - 1]],
+                b_terminations=[FrontPort.objects.create(
+                    device=self.device, name=f'Front Port 1:{i}', rear_port=rearport1, rear_port_position=i
+                )]
+            ).save()
+            Cable(
+                a_terminations=[FrontPort.objects.create(
+                    device=self.device, name=f'Front Port 2:{i}', rear_port=rearport2, rear_port_position=i
+                )],
+                b_terminations=[interfaces[i + 3]]
+            ).save()
+        Cable(a_terminations=[rearport1], b_terminations=[rearport2]).save()
+        self.assertEqual(CablePath.objects.filter(is_complete=True).count(), 8)
+
+        # Once the device has been loaded, tracing should require no further queries
+        interfaces = list(Interface.objects.filter(device=self.device))
+        graph = CableGraph()
+        graph.load_devices([self.device.pk])
+        with self.assertNumQueries(0):
+            paths = [CablePath.from_origin([interface], graph=graph) for interface in interfaces]
+        for interface, cablepath in zip(interfaces, paths):
+            stored_path = CablePath.objects.get(pk=interface._path_id)
+            self.assertEqual(cablepath.path, stored_path.path)
+            self.assertEqual(cablepath.is_complete, stored_path.is_complete)
+            self.assertEqual(cablepath.is_active, stored_path.is_active)
+            self.assertEqual(cablepath.is_split, stored_path.is_split)
+
+        # Rebuild all paths which traverse the trunk cable
+        rebuild_paths([rearport1])
+        self.assertEqual(CablePath.objects.count(), 8)
+        for interface, cablepath in zip(interfaces, paths):
+            interface.refresh_from_db()
+            self.assertPathIsSet(
+                interface, self.assertPathExists(cablepath.path_objects, is_complete=True, is_active=True)
+            )
+
+    def _create_interface_pairs(self, count):
+        """
+        Create the specified number of interface pairs, each connected by a cable.
+        """
+        interfaces = [
+            Interface.objects.create(device=self.device, name=f'Interface {i}') for i in range(1, count * 2 + 1)
+        ]
+        for i in range(0, len(interfaces), 2):
+            Cable(a_terminations=[interfaces[i]], b_terminations=[interfaces[i + 1]]).save()
+        for interface in interfaces:
+            interface.refresh_from_db()
+
+        return interfaces
+
+    def test_601_trace_paths_chunked(self):
+        interfaces = self._create_interface_pairs(3)
+        CablePath.objects.all().delete()
+
+        stdout = StringIO()
+        call_command('trace_paths', chunk_size=2, no_input=True, stdout=stdout)
+        self.assertIn('Retraced 6 interfaces in 3 chunks', stdout.getvalue())
+
+        self.assertEqual(CablePath.objects.count(), 6)
+        for a, b in zip(interfaces[::2], interfaces[1::2]):
+            a.refresh_from_db()
+            b.refresh_from_db()
+            self.assertPathIsSet(a, self.assertPathExists((a, a.cable, b), is_complete=True, is_active=True))
+            self.assertPathIsSet(b, self.assertPathExists((b, b.cable, a), is_complete=True, is_active=True))
+
+    def test_602_trace_paths_dry_run(self):
+        interfaces = self._create_interface_pairs(3)
+
+        # Introduce a missing path, a changed path, and an obsolete path
+        CablePath.objects.filter(pk=interfaces[0]._path_id).delete()
+        CablePath.objects.filter(pk=interfaces[2]._path_id).update(is_active=False)
+        obsolete_path = CablePath.objects.get(pk=interfaces[4]._path_id)
+        obsolete_path.path[0] = [compile_path_node(ContentType.objects.get_for_model(Interface).pk, 0)]
+        obsolete_path.save()
+        paths = {cp.pk: (cp.path, cp.is_active) for cp in CablePath.objects.all()}
+
+        stdout = StringIO()
+        call_command('trace_paths', dry_run=True, chunk_size=2, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn(f'dcim.interface {interfaces[0].pk} ({interfaces[0]}): missing', output)
+        self.assertIn(f'dcim.interface {interfaces[2].pk} ({interfaces[2]}): is_active', output)
+        self.assertIn(f'dcim.interface {interfaces[4].pk} ({interfaces[4]}): obsolete', output)
+        self.assertIn('Found 3 paths which differ from those computed', output)
+
+        # Nothing has been written
+        self.assertEqual({cp.pk: (cp.path, cp.is_active) for cp in CablePath.objects.all()}, paths)
+        interfaces[0].refresh_from_db()
+        self.assertPathIsNotSet(interfaces[0])
+
+    def test_603_trace_paths_dry_run_with_force(self):
+        with self.assertRaisesMessage(CommandError, 'cannot be used with --force'):
+            call_command('trace_paths', dry_run=True, force=True, no_input=True, stdout=StringIO())
+
+    def test_701_path_overlap_lookup(self):
+        interfaces = self._create_interface_pairs(3)
+        cable = interfaces[0].cable
+
+        def get_expected_paths(*nodes):
+            nodes = {object_to_path_node(node) for node in nodes}
+            return {cp.pk for cp in CablePath.objects.all() if nodes.intersection(cp._nodes)}
+
+        for nodes in ([interfaces[0]], [interfaces[0], interfaces[2]], [cable], [interfaces[1], interfaces[5]]):
+            paths = set(CablePath.objects.filter(_nodes__overlap=nodes).values_list('pk', flat=True))
+            self.assertEqual(paths, get_expected_paths(*nodes), msg=f'Paths traversing {nodes}')
+        self.assertEqual(CablePath.objects.filter(_nodes__overlap=[interfaces[0]]).count(), 2)
+        self.assertFalse(CablePath.objects.filter(_nodes__overlap=[self.device]).exists())
+
+    def test_702_rebuild_paths_by_node(self):
+        interfaces = self._create_interface_pairs(2)
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=1)
+        rearport2 = RearPort.objects.create(device=self.device, name='Rear Port 2', positions=1)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1', rear_port=rearport1, rear_port_position=1
+        )
+        frontport2 = FrontPort.objects.create(
+            device=self.device, name='Front Port 2', rear_port=rearport2, rear_port_position=1
+        )
+        interface5 = Interface.objects.create(device=self.device, name='Interface 5')
+        interface6 = Interface.objects.create(device=self.device, name='Interface 6')
+        Cable(a_terminations=[interface5], b_terminations=[frontport1]).save()
+        Cable(a_terminations=[rearport1], b_terminations=[rearport2]).save()
+        Cable(a_terminations=[frontport2], b_terminations=[interface6]).save()
+
+        # Mark all paths as inactive; only those which traverse the rebuilt node should be retraced
+        node = object_to_path_node(rearport1)
+        affected_paths = {cp.pk for cp in CablePath.objects.all() if node in cp._nodes}
+        self.assertEqual(len(affected_paths), 2)
+        CablePath.objects.update(is_active=False)
+
+        rebuild_paths([rearport1])
+        self.assertFalse(CablePath.objects.filter(pk__in=affected_paths).exists())
+        for interface in (interface5, interface6):
+            interface.refresh_from_db()
+            cablepath = CablePath.objects.get(pk=interface._path_id)
+            self.assertIn(node, cablepath._nodes)
+            self.assertTrue(cablepath.is_active)
+            self.assertTrue(cablepath.is_complete)
+        for interface in interfaces:
+            interface.refresh_from_db()
+            self.assertFalse(CablePath.objects.get(pk=interface._path_id).is_active)
@@ -8,6 +8,7 @@ from dcim.models import *
 from extras.models import CustomField
 from netbox.choices import WeightUnitChoices
 from tenancy.models import Tenant
+from users.models import User
 from utilities.data import drange
 from virtualization.models import Cluster, ClusterType
 
@@ -368,6 +369,52 @@ class RackTestCase(TestCase):
         rack.refresh_from_db()
         self.assertEqual(rack.get_utilization(), 1 / 42 * 100)
 
+    def test_cached_utilization(self):
+        site = Site.objects.first()
+        rack1 = Rack.objects.first()
+        rack2 = Rack.objects.create(name='Rack 2', site=site, u_height=42)
+        device_type = DeviceType.objects.first()
+
+        device = Device.objects.create(
+            name='Device 1',
+            role=DeviceRole.objects.first(),
+            device_type=device_type,
+            site=site,
+            rack=rack1,
+            position=1
+        )
+        rack1.refresh_from_db()
+        self.assertEqual(rack1._utilization, 1 / 42 * 100)
+
+        # Reserve units in the rack
+        RackReservation.objects.create(
+            rack=rack1,
+            units=[10, 11],
+            user=User.objects.create_user(username='testuser'),
+            description='Reservation'
+        )
+        rack1.refresh_from_db()
+        self.assertEqual(rack1._utilization, 3 / 42 * 100)
+
+        # Change the height of the device type
+        device_type.u_height = 2
+        device_type.save()
+        rack1.refresh_from_db()
+        self.assertEqual(rack1._utilization, 4 / 42 * 100)
+
+        # Move the device to another rack
+        device.rack = rack2
+        device.save()
+        rack1.refresh_from_db()
+        rack2.refresh_from_db()
+        self.assertEqual(rack1._utilization, 2 / 42 * 100)
+        self.assertEqual(rack2._utilization, 2 / 42 * 100)
+
+        # Delete the device
+        device.delete()
+        rack2.refresh_from_db()
+        self.assertEqual(rack2._utilization, 0)
+
 
 class DeviceTestCase(TestCase):
 
@@ -1,6 +1,10 @@
+import itertools
+from collections import defaultdict
+
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.db import router, transaction
+from django.db.models import Case, Value, When
 
 
 def compile_path_node(ct_id, object_id):
@@ -31,32 +35,68 @@ def path_node_to_object(repr):
     return ct.model_class().objects.filter(pk=object_id).first()
 
 
-def create_cablepath(terminations):
+def create_cablepath(terminations, graph=None):
     """
     Create CablePaths for all paths originating from the specified set of nodes.
 
     :param terminations: Iterable of CableTermination objects
+    :param graph: A CableGraph to use for tracing (optional)
     """
     from dcim.models import CablePath
 
-    cp = CablePath.from_origin(terminations)
+    cp = CablePath.from_origin(terminations, graph=graph)
     if cp:
         cp.save()
 
 
+def save_cablepaths(cable_paths):
+    """
+    Create the given (unsaved) CablePaths in bulk, and record a reference to each on its originating object(s).
+    """
+    from dcim.models import CablePath
+
+    if not cable_paths:
+        return
+    for cp in cable_paths:
+        cp._nodes = list(itertools.chain(*cp.path))
+    CablePath.objects.bulk_create(cable_paths)
+
+    # Group origins by model so that each model's references can be updated in bulk
+    origin_ids = defaultdict(list)
+    for cp in cable_paths:
+        for node in cp.path[0]:
+            ct_id, object_id = decompile_path_node(node)
+            origin_ids[ct_id].append((object_id, cp.pk))
+    for ct_id, pairs in origin_ids.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        model.objects.filter(pk__in=[object_id for object_id, _ in pairs]).update(
+            _path=Case(*[When(pk=object_id, then=Value(path_id)) for object_id, path_id in pairs])
+        )
+
+
 def rebuild_paths(terminations):
     """
-    Rebuild all CablePaths which traverse the specified nodes.
+    Rebuild all CablePaths which traverse the specified nodes. Affected paths are retraced against a shared CableGraph,
+    and replaced in bulk.
     """
+    from dcim.graph import CableGraph
     from dcim.models import CablePath
 
-    for obj in terminations:
-        cable_paths = CablePath.objects.filter(_nodes__contains=obj)
+    if not terminations:
+        return
+
+    with transaction.atomic(using=router.db_for_write(CablePath)):
+        graph = CableGraph()
+        cable_paths = list(CablePath.objects.filter(_nodes__overlap=terminations))
+
+        # Retrieve all originating objects in bulk before retracing
+        graph.get_objects(itertools.chain.from_iterable(cp.path[0] for cp in cable_paths))
+        new_paths = [
+            CablePath.from_origin(graph.get_objects(cp.path[0]), graph=graph) for cp in cable_paths
+        ]
 
-        with transaction.atomic(using=router.db_for_write(CablePath)):
-            for cp in cable_paths:
-                cp.delete()
-                create_cablepath(cp.origins)
+        CablePath.objects.filter(pk__in=[cp.pk for cp in cable_paths]).delete()
+        save_cablepaths([cp for cp in new_paths if cp])
 
 
 def update_interface_bridges(device, interface_templates, module=None):
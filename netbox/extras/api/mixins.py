@@ -1,11 +1,20 @@
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
 from jinja2.exceptions import TemplateError
 from rest_framework.decorators import action
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
 
+from core.api.serializers import JobSerializer
+from extras.choices import RenderConfigFormatChoices
+from extras.jobs import RenderConfigsJob
+from extras.models import ConfigTemplate
+from extras.rendering import RENDER_CONFIG_CONTENT_TYPES, render_configs, stream_rendered_configs
+from extras.utils import filename_from_model
 from netbox.api.renderers import TextRenderer
-from .serializers import ConfigTemplateSerializer
+from .serializers import ConfigTemplateSerializer, RenderConfigsSerializer
 
 __all__ = (
     'ConfigContextQuerySetMixin',
@@ -62,7 +71,8 @@ class ConfigTemplateRenderMixin:
 
 class RenderConfigMixin(ConfigTemplateRenderMixin):
     """
-    Provides a /render-config/ endpoint for REST API views whose model may have a ConfigTemplate assigned.
+    Provides /render-config/ endpoints for REST API views whose model may have a ConfigTemplate assigned, both for
+    individual objects and for all objects matching the specified filters.
     """
     @action(detail=True, methods=['post'], url_path='render-config', renderer_classes=[JSONRenderer, TextRenderer])
     def render_config(self, request, pk):
@@ -83,3 +93,45 @@ class RenderConfigMixin(ConfigTemplateRenderMixin):
         context_data.update({object_type: instance})
 
         return self.render_configtemplate(request, configtemplate, context_data)
+
+    @extend_schema(
+        methods=['post'],
+        request=RenderConfigsSerializer,
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=['post'], url_path='render-config', url_name='render-configs')
+    def render_configs(self, request):
+        """
+        Render the preferred ConfigTemplate for all objects matching the specified filters. The rendered configurations
+        are streamed as NDJSON or as a tar or ZIP archive. Alternatively, a background job can be enqueued to render
+        them, in which case the Job is returned.
+        """
+        serializer = RenderConfigsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        output_format = serializer.validated_data['format']
+        context = serializer.validated_data['data']
+
+        queryset = self.filter_queryset(self.queryset)
+        model = queryset.model
+
+        if serializer.validated_data['background']:
+            job = RenderConfigsJob.enqueue(
+                user=request.user,
+                model=model._meta.label_lower,
+                pks=list(queryset.values_list('pk', flat=True)),
+                output_format=output_format,
+                context=context
+            )
+            return Response(JobSerializer(job, context={'request': request}).data)
+
+        results = render_configs(queryset, context)
+        extensions = dict(ConfigTemplate.objects.values_list('pk', 'file_extension'))
+        response = StreamingHttpResponse(
+            stream_rendered_configs(results, output_format, model._meta.model_name, extensions),
+            content_type=RENDER_CONFIG_CONTENT_TYPES[output_format]
+        )
+        if output_format != RenderConfigFormatChoices.FORMAT_NDJSON:
+            filename = f'{filename_from_model(model)}_configs.{output_format}'
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        return response
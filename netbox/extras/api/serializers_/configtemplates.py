@@ -1,10 +1,15 @@
+from rest_framework import serializers
+
 from core.api.serializers_.data import DataFileSerializer, DataSourceSerializer
+from extras.choices import RenderConfigFormatChoices
 from extras.models import ConfigTemplate
+from netbox.api.fields import ChoiceField
 from netbox.api.serializers import ChangeLogMessageSerializer, ValidatedModelSerializer
 from netbox.api.serializers.features import TaggableModelSerializer
 
 __all__ = (
     'ConfigTemplateSerializer',
+    'RenderConfigsSerializer',
 )
 
 
@@ -26,3 +31,13 @@ class ConfigTemplateSerializer(ChangeLogMessageSerializer, TaggableModelSerializ
             'data_synced', 'tags', 'created', 'last_updated',
         ]
         brief_fields = ('id', 'url', 'display', 'name', 'description')
+
+
+class RenderConfigsSerializer(serializers.Serializer):
+    """
+    A request to render the configurations of many objects at once, either streamed in the specified format or (if
+    background is true) by a background job. Any data provided is applied to each template as additional context.
+    """
+    format = ChoiceField(choices=RenderConfigFormatChoices, default=RenderConfigFormatChoices.FORMAT_NDJSON)
+    background = serializers.BooleanField(default=False)
+    data = serializers.DictField(required=False, default=dict)
@@ -3,13 +3,16 @@ from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from core.api.serializers_.jobs import JobSerializer
-from extras.models import Script
-from netbox.api.serializers import ValidatedModelSerializer
+from extras.choices import LogLevelChoices
+from extras.models import Script, ScriptLogEntry
+from netbox.api.fields import ChoiceField, ContentTypeField
+from netbox.api.serializers import BaseModelSerializer, ValidatedModelSerializer
 from utilities.datetime import local_now
 
 __all__ = (
     'ScriptDetailSerializer',
     'ScriptInputSerializer',
+    'ScriptLogEntrySerializer',
     'ScriptSerializer',
 )
 
@@ -95,3 +98,22 @@ class ScriptInputSerializer(serializers.Serializer):
             data['schedule_at'] = local_now()
 
         return super().validate(data)
+
+
+class ScriptLogEntrySerializer(BaseModelSerializer):
+    level = ChoiceField(choices=LogLevelChoices, read_only=True)
+    object_type = ContentTypeField(
+        read_only=True
+    )
+    object_url = serializers.CharField(
+        read_only=True,
+        allow_null=True
+    )
+
+    class Meta:
+        model = ScriptLogEntry
+        fields = [
+            'id', 'url', 'display', 'job', 'index', 'time', 'level', 'test', 'object_type', 'object_id', 'object_repr',
+            'object_url', 'message',
+        ]
+        brief_fields = ('id', 'url', 'display', 'job', 'index', 'level', 'message')
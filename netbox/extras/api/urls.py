@@ -28,6 +28,7 @@ router.register('config-contexts', views.ConfigContextViewSet)
 router.register('config-context-profiles', views.ConfigContextProfileViewSet)
 router.register('config-templates', views.ConfigTemplateViewSet)
 router.register('scripts', views.ScriptViewSet, basename='script')
+router.register('script-log-entries', views.ScriptLogEntryViewSet)
 
 # TODO: Remove in NetBox v4.5
 router.register('object-types', ObjectTypeViewSet)
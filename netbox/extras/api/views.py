@@ -321,6 +321,12 @@ class ScriptViewSet(ModelViewSet):
         return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class ScriptLogEntryViewSet(RetrieveModelMixin, ListModelMixin, BaseViewSet):
+    queryset = ScriptLogEntry.objects.all()
+    serializer_class = serializers.ScriptLogEntrySerializer
+    filterset_class = filtersets.ScriptLogEntryFilterSet
+
+
 #
 # User dashboard
 #
@@ -148,6 +148,23 @@ class JournalEntryKindChoices(ChoiceSet):
     ]
 
 
+#
+# Config templates
+#
+
+class RenderConfigFormatChoices(ChoiceSet):
+
+    FORMAT_NDJSON = 'ndjson'
+    FORMAT_TAR = 'tar'
+    FORMAT_ZIP = 'zip'
+
+    CHOICES = (
+        (FORMAT_NDJSON, 'NDJSON'),
+        (FORMAT_TAR, 'tar'),
+        (FORMAT_ZIP, 'ZIP'),
+    )
+
+
 #
 # Reports and Scripts
 #
@@ -65,6 +65,7 @@ class Condition:
             raise ValueError(_("Invalid type for {op} operation: {value}").format(op=op, value=type(value)))
 
         self.attr = attr
+        self.path = attr.split('.')
         self.value = value
         self.op = op
         self.eval_func = getattr(self, f'eval_{op}')
@@ -80,7 +81,7 @@ class Condition:
             return operator.getitem(obj or {}, key)
 
         try:
-            value = functools.reduce(_get, self.attr.split('.'), data)
+            value = functools.reduce(_get, self.path, data)
         except KeyError:
             raise InvalidCondition(f"Invalid key path: {self.attr}")
         try:
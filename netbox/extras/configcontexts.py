@@ -0,0 +1,177 @@
+import logging
+from collections import Counter, defaultdict
+from copy import deepcopy
+
+from utilities.caching import VersionedCache
+
+__all__ = (
+    'CONFIG_CONTEXT_ASSIGNMENTS',
+    'ConfigContextIndex',
+    'get_assigned_objects',
+    'get_config_context_index',
+    'invalidate_config_context_index',
+)
+
+CONFIG_CONTEXT_INDEX_CACHE_KEY = 'config_context_index_version'
+
+# The fields by which a ConfigContext is assigned to objects, mapped to the attribute of a Device or VirtualMachine
+# which each is matched against. (Tags are matched separately.)
+CONFIG_CONTEXT_ASSIGNMENTS = {
+    'regions': 'site__region',
+    'site_groups': 'site__group',
+    'sites': 'site',
+    'locations': 'location',
+    'device_types': 'device_type',
+    'roles': 'role',
+    'platforms': 'platform',
+    'cluster_types': 'cluster__type',
+    'cluster_groups': 'cluster__group',
+    'clusters': 'cluster',
+    'tenant_groups': 'tenant__group',
+    'tenants': 'tenant',
+}
+
+# Assignment fields for which a ConfigContext assigned to an object also applies to all of its descendants
+HIERARCHICAL_ASSIGNMENTS = ('regions', 'site_groups', 'locations', 'roles')
+
+logger = logging.getLogger('netbox.config_contexts')
+
+
+class ConfigContextIndex:
+    """
+    An inverted index of all active ConfigContexts, mapping each object to which ConfigContexts may be assigned (e.g.
+    a Site) to the ConfigContexts which apply to it. Assignments to a Region, SiteGroup, Location, or DeviceRole are
+    expanded to all of its descendants.
+
+    A ConfigContext applies to an object if, for every field to which the ConfigContext has been assigned, at least
+    one of its assigned objects matches the object. Matching is performed entirely in memory.
+    """
+    def __init__(self, contexts, assignments):
+        # ConfigContexts by ID, ordered by weight and name
+        self.contexts = contexts
+        self.ranks = {pk: rank for rank, pk in enumerate(contexts)}
+
+        # A mapping of each assignment field to {object ID: set of ConfigContext IDs}
+        self.assignments = assignments
+
+        # The number of fields to which each ConfigContext has been assigned
+        self.assignment_counts = Counter()
+        for field_assignments in assignments.values():
+            self.assignment_counts.update(set().union(*field_assignments.values()))
+
+        # ConfigContexts which have not been assigned to any object apply to all objects
+        self.unassigned = [pk for pk in contexts if pk not in self.assignment_counts]
+
+    @classmethod
+    def build(cls):
+        """
+        Build the index from all active ConfigContexts.
+        """
+        from extras.models import ConfigContext
+
+        contexts = ConfigContext.objects.filter(
+            is_active=True
+        ).order_by('weight', 'name').only('weight', 'name', 'data', 'last_updated').in_bulk()
+
+        assignments = {}
+        for field_name in (*CONFIG_CONTEXT_ASSIGNMENTS, 'tags'):
+            field = ConfigContext._meta.get_field(field_name)
+            field_assignments = defaultdict(set)
+            for context_id, object_id in field.remote_field.through.objects.filter(**{
+                f'{field.m2m_field_name()}__is_active': True
+            }).values_list(field.m2m_column_name(), field.m2m_reverse_name()):
+                field_assignments[object_id].add(context_id)
+            if field_name in HIERARCHICAL_ASSIGNMENTS and field_assignments:
+                field_assignments = cls._expand_descendants(field.related_model, field_assignments)
+            assignments[field_name] = dict(field_assignments)
+
+        return cls(contexts, assignments)
+
+    @staticmethod
+    def _expand_descendants(model, assignments):
+        """
+        Extend the ConfigContexts assigned to each node of a tree to all of its descendants.
+        """
+        children = defaultdict(list)
+        for pk, parent_id in model.objects.filter(
+            tree_id__in=model.objects.filter(pk__in=list(assignments)).values('tree_id')
+        ).values_list('pk', 'parent_id'):
+            children[parent_id].append(pk)
+
+        expanded = defaultdict(set)
+        for object_id, context_ids in assignments.items():
+            nodes = [object_id]
+            while nodes:
+                node = nodes.pop()
+                expanded[node].update(context_ids)
+                nodes.extend(children.get(node, []))
+
+        return expanded
+
+    def get_context_ids(self, assigned_objects):
+        """
+        Return the IDs of all ConfigContexts which apply to an object, ordered by weight and name.
+
+        Args:
+            assigned_objects: A mapping of each assignment field (e.g. "sites") to the IDs of the matching objects
+                related to the object (see get_assigned_objects())
+        """
+        matches = Counter()
+        for field_name, field_assignments in self.assignments.items():
+            context_ids = set()
+            for object_id in assigned_objects.get(field_name, ()):
+                context_ids.update(field_assignments.get(object_id, ()))
+            matches.update(context_ids)
+
+        context_ids = [pk for pk, count in matches.items() if count == self.assignment_counts[pk]]
+        return sorted([*self.unassigned, *context_ids], key=self.ranks.__getitem__)
+
+    def get_data(self, context_ids):
+        """
+        Return a copy of the data of each of the specified ConfigContexts.
+        """
+        return [deepcopy(self.contexts[pk].data) for pk in context_ids]
+
+
+def get_assigned_objects(obj):
+    """
+    Return a mapping of each ConfigContext assignment field to the IDs of the matching objects related to the given
+    Device or VirtualMachine.
+    """
+    assigned_objects = {}
+    for field_name, attr in CONFIG_CONTEXT_ASSIGNMENTS.items():
+        *path, attr = attr.split('__')
+        related_obj = obj
+        for name in path:
+            related_obj = getattr(related_obj, name, None)
+        object_id = getattr(related_obj, f'{attr}_id', None)
+        assigned_objects[field_name] = () if object_id is None else (object_id,)
+    assigned_objects['tags'] = tuple(tag.pk for tag in obj.tags.all())
+
+    return assigned_objects
+
+
+def load_config_context_index():
+    index = ConfigContextIndex.build()
+    logger.debug(f"Indexed {len(index.contexts)} config contexts")
+    return index
+
+
+# A local copy of the index of all active ConfigContexts
+_config_context_index = VersionedCache(CONFIG_CONTEXT_INDEX_CACHE_KEY, load_config_context_index)
+
+
+def get_config_context_index():
+    """
+    Return the ConfigContextIndex of all active ConfigContexts. The index is retained in memory until it is
+    invalidated (see invalidate_config_context_index()).
+    """
+    return _config_context_index.get()
+
+
+def invalidate_config_context_index():
+    """
+    Invalidate the ConfigContextIndex held in memory by all processes once the current transaction has been
+    committed.
+    """
+    _config_context_index.invalidate()
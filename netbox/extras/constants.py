@@ -7,6 +7,12 @@ CUSTOMFIELD_EMPTY_VALUES = (None, '', [])
 # Template Export
 DEFAULT_MIME_TYPE = 'text/plain; charset=utf-8'
 
+# The storage path beneath which export templates rendered in the background are saved
+EXPORT_TEMPLATE_FILE_PATH = 'export-templates'
+
+# The storage path beneath which configurations rendered in the background are saved
+RENDER_CONFIG_FILE_PATH = 'rendered-configs'
+
 # Webhooks
 HTTP_CONTENT_TYPE_JSON = 'application/json'
 
@@ -152,3 +158,6 @@ LOG_LEVEL_RANK = {
     LogLevelChoices.LOG_WARNING: 3,
     LogLevelChoices.LOG_FAILURE: 4,
 }
+
+# The default number of items in each shard of a partitioned script's input
+SCRIPT_SHARD_SIZE = 1000
@@ -13,13 +13,17 @@ from netbox.config import get_config
 from netbox.constants import RQ_QUEUE_DEFAULT
 from netbox.models.features import has_feature
 from users.models import User
-from utilities.api import get_serializer_for_model
+from utilities.api import get_prefetches_for_serializer, get_serializer_for_model
+from utilities.caching import VersionedCache
 from utilities.request import copy_safe_request
 from utilities.rqworker import get_rq_retry
 from utilities.serialization import serialize_object
 from .choices import EventRuleActionChoices
 from .models import EventRule
 
+EVENT_RULES_CACHE_KEY = 'event_rules_version'
+EVENTS_SERIALIZATION_BATCH_SIZE = 1000
+
 logger = logging.getLogger('netbox.events_processor')
 
 
@@ -51,10 +55,45 @@ def get_snapshots(instance, event_type):
     return snapshots
 
 
+def load_event_rules():
+    """
+    Return a mapping of (object type ID, event type) to the list of enabled EventRules which apply to it.
+    """
+    rules = defaultdict(list)
+    for event_rule in EventRule.objects.filter(enabled=True).prefetch_related('object_types', 'action_object'):
+        for object_type in event_rule.object_types.all():
+            for event_type in event_rule.event_types:
+                rules[(object_type.pk, event_type)].append(event_rule)
+    logger.debug(f"Loaded {len(rules)} event rule mappings")
+
+    return dict(rules)
+
+
+# A local copy of all enabled EventRules, indexed by object type and event type
+_event_rules = VersionedCache(EVENT_RULES_CACHE_KEY, load_event_rules)
+
+
+def get_event_rules():
+    """
+    Return a mapping of (object type ID, event type) to the list of enabled EventRules which apply to it. All enabled
+    EventRules are loaded from the database and retained in memory until they are invalidated (see
+    invalidate_event_rules()), so that each rule's conditions are compiled only once.
+    """
+    return _event_rules.get()
+
+
+def invalidate_event_rules():
+    """
+    Invalidate the EventRules held in memory by all processes once the current transaction has been committed.
+    """
+    _event_rules.invalidate()
+
+
 def enqueue_event(queue, instance, request, event_type):
     """
-    Enqueue a serialized representation of a created/updated/deleted object for the processing of
-    events once the request has completed.
+    Enqueue a created/updated/deleted object for the processing of events once the request has completed. Objects are
+    serialized only when the queue is flushed (see serialize_events()), with the exception of deleted objects, which
+    must be serialized immediately if the event may be consumed.
     """
     # Bail if this type of object does not support event rules
     if not has_feature(instance, 'event_rules'):
@@ -66,8 +105,7 @@ def enqueue_event(queue, instance, request, event_type):
     assert instance.pk is not None
     key = f'{app_label}.{model_name}:{instance.pk}'
     if key in queue:
-        queue[key]['data'] = serialize_for_event(instance)
-        queue[key]['snapshots']['postchange'] = get_snapshots(instance, event_type)['postchange']
+        queue[key]['instance'] = instance
         # If the object is being deleted, update any prior "update" event to "delete"
         if event_type == OBJECT_DELETED:
             queue[key]['event_type'] = event_type
@@ -76,17 +114,100 @@ def enqueue_event(queue, instance, request, event_type):
             'object_type': ObjectType.objects.get_for_model(instance),
             'object_id': instance.pk,
             'event_type': event_type,
-            'data': serialize_for_event(instance),
-            'snapshots': get_snapshots(instance, event_type),
+            'instance': instance,
+            'data': None,
+            'snapshots': {
+                'prechange': getattr(instance, '_prechange_snapshot', None),
+                'postchange': None,
+            },
             'request': request,
             # Legacy request attributes for backward compatibility
             'username': request.user.username,
             'request_id': request.id,
         }
 
+    if event_type == OBJECT_DELETED and is_consumable(queue[key]):
+        queue[key]['data'] = serialize_for_event(instance)
+
+
+def is_consumable(event, event_rules=None):
+    """
+    Return True if the given event might be consumed by the events pipeline. If the pipeline consists solely of
+    EventRule processing, this is the case only if at least one enabled EventRule applies to the event's object type
+    and event type.
+    """
+    if settings.EVENTS_PIPELINE != ['extras.events.process_event_queue']:
+        return True
+    if event_rules is None:
+        event_rules = get_event_rules()
+    return (event['object_type'].pk, event['event_type']) in event_rules
+
+
+def serialize_events(events):
+    """
+    Populate the serialized data and post-change snapshot for each of the given queued events, and return only those
+    events which may be consumed by the events pipeline. Objects which have not been deleted are re-fetched in bulk
+    for each model, prefetching any related objects required by the model's REST API serializer.
+    """
+    event_rules = get_event_rules()
+    events = [event for event in events if is_consumable(event, event_rules)]
+
+    # Group events pending serialization by model
+    pending = defaultdict(dict)
+    for event in events:
+        if event['data'] is not None:
+            continue
+        if event['event_type'] == OBJECT_DELETED:
+            event['data'] = serialize_for_event(event['instance'])
+        else:
+            pending[event['instance']._meta.model][event['object_id']] = event
+
+    for model, model_events in pending.items():
+        serializer_class = get_serializer_for_model(model)
+        prefetches = get_prefetches_for_serializer(serializer_class)
+        object_ids = list(model_events.keys())
+        for i in range(0, len(object_ids), EVENTS_SERIALIZATION_BATCH_SIZE):
+            queryset = model.objects.filter(pk__in=object_ids[i:i + EVENTS_SERIALIZATION_BATCH_SIZE])
+            instances = {instance.pk: instance for instance in queryset.prefetch_related(*prefetches)}
+            for object_id in object_ids[i:i + EVENTS_SERIALIZATION_BATCH_SIZE]:
+                event = model_events[object_id]
+                # Fall back to the queued instance if it can no longer be retrieved
+                instance = instances.get(object_id, event['instance'])
+                event['data'] = serialize_for_event(instance)
+                event['snapshots']['postchange'] = get_snapshots(instance, event['event_type'])['postchange']
+
+    return events
+
+
+def enqueue_webhook(event_rule, username=None, request=None, **params):
+    """
+    Enqueue a job to send the given EventRule's webhook. Parameters for either send_webhook() (a single event) or
+    send_webhook_batch() (if events are passed) are accepted.
+    """
+    queue_name = get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT)
+    rq_queue = get_queue(queue_name)
+    func = 'extras.webhooks.send_webhook_batch' if 'events' in params else 'extras.webhooks.send_webhook'
+
+    params.update({
+        "event_rule": event_rule,
+        "timestamp": timezone.now().isoformat(),
+        "username": username,
+        "retry": get_rq_retry()
+    })
+    if request:
+        params["request"] = copy_safe_request(request)
 
-def process_event_rules(event_rules, object_type, event_type, data, username=None, snapshots=None, request=None):
-    user = User.objects.get(username=username) if username else None
+    rq_queue.enqueue(func, **params)
+
+
+def process_event_rules(event_rules, object_type, event_type, data, username=None, snapshots=None, request=None,
+                        webhook_batches=None):
+    """
+    Carry out the actions of the given EventRules for an event. If webhook_batches is passed, events destined for
+    webhooks which support batching are appended to the list of pending events for their EventRule rather than
+    being enqueued immediately.
+    """
+    user = None
 
     for event_rule in event_rules:
 
@@ -94,44 +215,38 @@ def process_event_rules(event_rules, object_type, event_type, data, username=Non
         if not event_rule.eval_conditions(data):
             continue
 
-        # Compile event data
-        event_data = event_rule.action_data or {}
-        event_data.update(data)
+        # Compile event data (without modifying the EventRule's action data, which may be reused)
+        event_data = {**(event_rule.action_data or {}), **data}
 
         # Webhooks
         if event_rule.action_type == EventRuleActionChoices.WEBHOOK:
-
-            # Select the appropriate RQ queue
-            queue_name = get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT)
-            rq_queue = get_queue(queue_name)
-
-            # Compile the task parameters
-            params = {
-                "event_rule": event_rule,
-                "object_type": object_type,
-                "event_type": event_type,
-                "data": event_data,
-                "snapshots": snapshots,
-                "timestamp": timezone.now().isoformat(),
-                "username": username,
-                "retry": get_rq_retry()
-            }
-            if snapshots:
-                params["snapshots"] = snapshots
-            if request:
-                params["request"] = copy_safe_request(request)
-
-            # Enqueue the task
-            rq_queue.enqueue(
-                "extras.webhooks.send_webhook",
-                **params
-            )
+            if webhook_batches is not None and event_rule.action_object.batch_size:
+                webhook_batches[event_rule].append({
+                    "object_type": object_type,
+                    "event_type": event_type,
+                    "data": event_data,
+                    "snapshots": snapshots,
+                })
+            else:
+                enqueue_webhook(
+                    event_rule,
+                    username=username,
+                    request=request,
+                    object_type=object_type,
+                    event_type=event_type,
+                    data=event_data,
+                    snapshots=snapshots
+                )
 
         # Scripts
         elif event_rule.action_type == EventRuleActionChoices.SCRIPT:
             # Resolve the script from action parameters
             script = event_rule.action_object.python_class()
 
+            # Resolve the user (if any) who triggered the event
+            if username and user is None:
+                user = User.objects.get(username=username)
+
             # Enqueue a Job to record the script's execution
             from extras.jobs import ScriptJob
             ScriptJob.enqueue(
@@ -161,36 +276,48 @@ def process_event_queue(events):
     """
     Flush a list of object representation to RQ for EventRule processing.
     """
-    events_cache = defaultdict(dict)
+    event_rules = get_event_rules()
+    webhook_batches = defaultdict(list)
 
     for event in events:
         event_type = event['event_type']
         object_type = event['object_type']
 
-        # Cache applicable Event Rules
-        if object_type not in events_cache[event_type]:
-            events_cache[event_type][object_type] = EventRule.objects.filter(
-                event_types__contains=[event['event_type']],
-                object_types=object_type,
-                enabled=True
-            )
-        event_rules = events_cache[event_type][object_type]
+        # Skip events to which no EventRules apply
+        if not (applicable_rules := event_rules.get((object_type.pk, event_type))):
+            continue
 
         process_event_rules(
-            event_rules=event_rules,
+            event_rules=applicable_rules,
             object_type=object_type,
-            event_type=event['event_type'],
+            event_type=event_type,
             data=event['data'],
             username=event['username'],
             snapshots=event['snapshots'],
             request=event['request'],
+            webhook_batches=webhook_batches,
         )
 
+    # Enqueue batched webhooks. All queued events originate from the same request or job.
+    if webhook_batches:
+        for event_rule, webhook_events in webhook_batches.items():
+            batch_size = event_rule.action_object.batch_size
+            for i in range(0, len(webhook_events), batch_size):
+                enqueue_webhook(
+                    event_rule,
+                    username=events[0]['username'],
+                    request=events[0]['request'],
+                    events=webhook_events[i:i + batch_size]
+                )
+
 
 def flush_events(events):
     """
     Flush a list of object representations to RQ for event processing.
     """
+    if events:
+        # Serialize queued objects, discarding any events which cannot be consumed
+        events = serialize_events(events)
     if events:
         for name in settings.EVENTS_PIPELINE:
             try:
@@ -3,7 +3,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.utils.translation import gettext as _
 
-from core.models import DataSource, ObjectType
+from core.models import DataSource, Job, ObjectType
 from dcim.models import DeviceRole, DeviceType, Location, Platform, Region, Site, SiteGroup
 from netbox.filtersets import BaseFilterSet, ChangeLoggedModelFilterSet, NetBoxModelFilterSet
 from tenancy.models import Tenant, TenantGroup
@@ -32,6 +32,7 @@ __all__ = (
     'NotificationGroupFilterSet',
     'SavedFilterFilterSet',
     'ScriptFilterSet',
+    'ScriptLogEntryFilterSet',
     'TableConfigFilterSet',
     'TagFilterSet',
     'TaggedItemFilterSet',
@@ -61,6 +62,43 @@ class ScriptFilterSet(BaseFilterSet):
         )
 
 
+class ScriptLogEntryFilterSet(BaseFilterSet):
+    q = django_filters.CharFilter(
+        method='search',
+        label=_('Search'),
+    )
+    job_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=Job.objects.all(),
+        method='filter_job',
+        label=_('Job (ID)'),
+    )
+    level = django_filters.MultipleChoiceFilter(
+        choices=LogLevelChoices
+    )
+    object_type = ContentTypeFilter()
+    object_type_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=ContentType.objects.all()
+    )
+
+    class Meta:
+        model = ScriptLogEntry
+        fields = ('id', 'index', 'time', 'test', 'object_id', 'object_repr')
+
+    def search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return queryset.filter(
+            Q(message__icontains=value) |
+            Q(object_repr__icontains=value)
+        )
+
+    def filter_job(self, queryset, name, value):
+        # Include the entries logged by any child jobs which executed shards of the script
+        if not value:
+            return queryset
+        return queryset.filter(Q(job__in=value) | Q(job__parent__in=value))
+
+
 class WebhookFilterSet(NetBoxModelFilterSet):
     q = django_filters.CharFilter(
         method='search',
@@ -77,7 +115,7 @@ class WebhookFilterSet(NetBoxModelFilterSet):
         model = Webhook
         fields = (
             'id', 'name', 'payload_url', 'http_method', 'http_content_type', 'secret', 'ssl_verification',
-            'ca_file_path', 'description',
+            'ca_file_path', 'batch_size', 'description',
         )
 
     def search(self, queryset, name, value):
@@ -267,8 +267,13 @@ class WebhookBulkEditForm(NetBoxModelBulkEditForm):
         required=False,
         label=_('CA file path')
     )
+    batch_size = forms.IntegerField(
+        label=_('Batch size'),
+        min_value=1,
+        required=False
+    )
 
-    nullable_fields = ('secret', 'ca_file_path')
+    nullable_fields = ('secret', 'ca_file_path', 'batch_size')
 
 
 class EventRuleBulkEditForm(NetBoxModelBulkEditForm):
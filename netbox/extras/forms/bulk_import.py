@@ -189,7 +189,7 @@ class WebhookImportForm(NetBoxModelImportForm):
         model = Webhook
         fields = (
             'name', 'payload_url', 'http_method', 'http_content_type', 'additional_headers', 'body_template',
-            'secret', 'ssl_verification', 'ca_file_path', 'description', 'tags'
+            'secret', 'ssl_verification', 'ca_file_path', 'batch_size', 'description', 'tags'
         )
 
 
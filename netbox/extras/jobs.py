@@ -1,16 +1,122 @@
+import itertools
 import logging
+import os
+import tempfile
 import traceback
+from collections import Counter
 from contextlib import ExitStack
 
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import storages
 from django.db import transaction
+from django.db.models import QuerySet
+from django.urls import reverse
 from django.utils.translation import gettext as _
 
+from core.choices import JobStatusChoices
+from core.models import Job
 from core.signals import clear_events
-from extras.models import Script as ScriptModel
+from extras.models import ConfigTemplate, Script as ScriptModel
 from netbox.jobs import JobRunner
 from netbox.registry import registry
 from utilities.exceptions import AbortScript, AbortTransaction
-from .utils import is_report
+from utilities.rqworker import get_queue_for_model
+from .choices import RenderConfigFormatChoices
+from .constants import EXPORT_TEMPLATE_FILE_PATH, RENDER_CONFIG_FILE_PATH
+from .rendering import render_configs, stream_rendered_configs
+from .utils import filename_from_model, is_report
+
+
+def get_shards(items, size):
+    """
+    Divide a QuerySet or list of items into shards of the given size. A QuerySet is divided by primary key, such that
+    each shard can be restored as a QuerySet by get_shard_items(); the QuerySet must not be sliced or combined (e.g. by
+    union()). All other items must support pickling.
+    """
+    if isinstance(items, QuerySet):
+        pks = items.values_list('pk', flat=True).iterator(chunk_size=size)
+        while batch := list(itertools.islice(pks, size)):
+            yield {
+                'model': items.model._meta.label_lower,
+                'query': items.query,
+                'prefetch_related': items._prefetch_related_lookups,
+                'pks': batch,
+            }
+    else:
+        items = iter(items)
+        while batch := list(itertools.islice(items, size)):
+            yield {
+                'items': batch,
+            }
+
+
+def get_shard_items(shard):
+    """
+    Return the QuerySet or list of items represented by a shard.
+    """
+    if 'items' in shard:
+        return shard['items']
+
+    queryset = apps.get_model(shard['model']).objects.all()
+    queryset.query = shard['query']
+    if shard['prefetch_related']:
+        queryset = queryset.prefetch_related(*shard['prefetch_related'])
+
+    return queryset.filter(pk__in=shard['pks'])
+
+
+def save_job_file(job, name, f):
+    """
+    Save the contents of a file produced by the given Job to the job files storage. Unlike media files, job files are
+    not served directly: a job file can be downloaded only by the user who requested the Job (see JobFileView), as its
+    contents were rendered subject to that user's permissions.
+
+    Returns a dictionary of the saved file's name, size, and download URL, for inclusion in the Job's data.
+
+    Args:
+        job: The Job which produced the file
+        name: The path at which to save the file
+        f: A file-like object holding the file's contents
+    """
+    size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    name = storages['job_files'].save(name, File(f))
+
+    return {
+        'file': name,
+        'size': size,
+        'url': reverse('core:job_file', kwargs={'pk': job.pk}),
+    }
+
+
+def aggregate_job_data(data, shard_data):
+    """
+    Combine the job data of a Script with that of each of its shards.
+    """
+    data = dict(data or {})
+    log_counts = Counter(data.get('log_counts'))
+    log_discarded = Counter(data.get('log_discarded'))
+    output = [str(data['output'])] if data.get('output') else []
+    tests = data.get('tests') or {}
+
+    for shard in filter(None, shard_data):
+        log_counts.update(shard.get('log_counts', {}))
+        log_discarded.update(shard.get('log_discarded', {}))
+        if shard.get('output'):
+            output.append(str(shard['output']))
+        for test, results in (shard.get('tests') or {}).items():
+            tests.setdefault(test, dict.fromkeys(results, 0))
+            for level, count in results.items():
+                tests[test][level] = tests[test].get(level, 0) + count
+
+    return {
+        **data,
+        'log_counts': dict(log_counts),
+        'log_discarded': dict(log_discarded),
+        'output': '\n'.join(output),
+        'tests': tests,
+    }
 
 
 class ScriptJob(JobRunner):
@@ -81,20 +187,18 @@ class ScriptJob(JobRunner):
         # Update the job data regardless of the execution status of the job. Successes should be reported as well as
         # failures.
         finally:
+            script.script_log.save(self.job)
             self.job.data = script.get_job_data()
 
-    def run(self, data, request=None, commit=True, **kwargs):
+    def load_script(self, script_model, data, request):
         """
-        Run the script.
+        Instantiate the Script for execution.
 
         Args:
-            job: The Job associated with this execution
+            script_model: The Script model instance
             data: A dictionary of data to be passed to the script upon execution
             request: The WSGI request associated with this execution (if any)
-            commit: Passed through to Script.run()
         """
-        script_model = ScriptModel.objects.get(pk=self.job.object_id)
-        self.logger.debug(f"Found ScriptModel ID {script_model.pk}")
         script = script_model.python_class()
         self.logger.debug(f"Loaded script {script.full_name}")
 
@@ -108,8 +212,13 @@ class ScriptJob(JobRunner):
         script.request = request
         self.logger.debug(f"Request ID: {request.id if request else None}")
 
-        # Execute the script. If commit is True, wrap it with the event_tracking context manager to ensure we process
-        # change logging, event rules, etc.
+        return script
+
+    def execute_script(self, script, request, data, commit):
+        """
+        Execute the script. If commit is True, wrap it with the event_tracking context manager to ensure we process
+        change logging, event rules, etc.
+        """
         if commit:
             self.logger.info("Executing script (commit enabled)")
             with ExitStack() as stack:
@@ -119,3 +228,199 @@ class ScriptJob(JobRunner):
         else:
             self.logger.warning("Executing script (commit disabled)")
             self.run_script(script, request, data, commit)
+
+    def enqueue_shards(self, script, shards, data, request, commit):
+        """
+        Enqueue a child job to execute the script for each shard of its input. Child jobs are distributed among the
+        script's shard queues (if defined) in turn.
+        """
+        queues = script.shard_queues or [get_queue_for_model(self.job.object_type.model)]
+
+        with transaction.atomic():
+            for i, (shard, queue_name) in enumerate(zip(shards, itertools.cycle(queues)), start=1):
+                ScriptShardJob.enqueue(
+                    name=f'{self.job.name} ({i}/{len(shards)})',
+                    parent=self.job,
+                    user=self.job.user,
+                    queue_name=queue_name,
+                    job_timeout=script.job_timeout,
+                    data=data,
+                    shard=shard,
+                    request=request,
+                    commit=commit,
+                )
+            self.logger.info(f"Divided input into {len(shards)} shards")
+
+            script.script_log.save(self.job)
+            self.job.data = script.get_job_data()
+            self.job.save()
+
+    def run(self, data, request=None, commit=True, **kwargs):
+        """
+        Run the script.
+
+        Args:
+            job: The Job associated with this execution
+            data: A dictionary of data to be passed to the script upon execution
+            request: The WSGI request associated with this execution (if any)
+            commit: Passed through to Script.run()
+        """
+        script_model = ScriptModel.objects.get(pk=self.job.object_id)
+        self.logger.debug(f"Found ScriptModel ID {script_model.pk}")
+        shard_data = dict(data)
+        script = self.load_script(script_model, data, request)
+
+        # If the script's input has been partitioned, divide it among child jobs to be executed in parallel
+        items = script.partition(data)
+        if items is not None:
+            # Each shard of a QuerySet is restored by filtering the QuerySet by primary key, which is not possible once
+            # it has been sliced or combined with another QuerySet
+            if isinstance(items, QuerySet) and (items.query.is_sliced or items.query.combinator):
+                raise ValueError(_("A partitioned QuerySet cannot be sliced or combined with another QuerySet."))
+            shards = list(get_shards(items, script.shard_size))
+            if len(shards) > 1:
+                self.enqueue_shards(script, shards, shard_data, request, commit)
+                return
+            script.shard = items
+
+        self.execute_script(script, request, data, commit)
+
+
+class ScriptShardJob(ScriptJob):
+    """
+    Execute a Script for one shard of its partitioned input, as a child of the Script's Job. Once all of its children
+    have completed (or have been deleted), the parent Job is terminated with the aggregated results of its children
+    (see terminate_parent()).
+    """
+
+    class Meta:
+        name = 'Run Script Shard'
+
+    @staticmethod
+    def terminate_parent(job, lost=False):
+        """
+        Terminate the parent of the given Job if all of its children have completed. The parent's status reflects the
+        least successful of its children. If `lost` is true, the given Job has been deleted without completing, and
+        the parent is deemed to have errored.
+        """
+        with transaction.atomic():
+            # Lock the parent to ensure only the last child to complete terminates it
+            parent = Job.objects.select_for_update().filter(pk=job.parent_id).first()
+            if parent is None or parent.completed:
+                return
+            if lost:
+                # Record the loss, to be reported once the remaining children have completed
+                parent.error = _("Shard {name} was deleted before completing").format(name=job.name)
+                parent.save(update_fields=['error'])
+            shards = list(parent.children.order_by('pk'))
+            if any(shard.completed is None for shard in shards):
+                return
+
+            parent.data = aggregate_job_data(parent.data, [shard.data for shard in shards])
+
+            statuses = [shard.status for shard in shards]
+            if parent.error:
+                parent.terminate(status=JobStatusChoices.STATUS_ERRORED)
+            elif errored := statuses.count(JobStatusChoices.STATUS_ERRORED):
+                parent.terminate(
+                    status=JobStatusChoices.STATUS_ERRORED,
+                    error=_("{count} of {total} shards errored").format(count=errored, total=len(shards))
+                )
+            elif JobStatusChoices.STATUS_FAILED in statuses:
+                parent.terminate(status=JobStatusChoices.STATUS_FAILED)
+            else:
+                parent.terminate()
+
+    def run(self, data, shard, request=None, commit=True, **kwargs):
+        """
+        Run the script for a single shard of its input.
+
+        Args:
+            data: A dictionary of data to be passed to the script upon execution
+            shard: The shard of the script's input to be processed (see get_shards())
+            request: The WSGI request associated with this execution (if any)
+            commit: Passed through to Script.run()
+        """
+        script_model = ScriptModel.objects.get(pk=self.job.parent.object_id)
+        self.logger.debug(f"Found ScriptModel ID {script_model.pk}")
+        script = self.load_script(script_model, data, request)
+        script.shard = get_shard_items(shard)
+
+        self.execute_script(script, request, data, commit)
+
+
+class RenderConfigsJob(JobRunner):
+    """
+    Render the preferred ConfigTemplate for each of the specified Devices or VirtualMachines, saving the output as a job
+    file (see save_job_file()). The job's data records the name, size, and URL of the saved file, and the number of
+    objects which could not be rendered.
+    """
+
+    class Meta:
+        name = 'Render Configs'
+
+    def run(self, model, pks, output_format=RenderConfigFormatChoices.FORMAT_NDJSON, context=None, *args, **kwargs):
+        """
+        Args:
+            model: The label of the model for which configurations are to be rendered (e.g. "dcim.device")
+            pks: A list of primary keys identifying the objects to render
+            output_format: The format of the saved file (see RenderConfigFormatChoices)
+            context: Additional context data to be applied to each template (optional)
+        """
+        model = apps.get_model(model)
+        queryset = model.objects.filter(pk__in=pks)
+        self.logger.debug(f"Rendering configurations for {len(pks)} objects")
+
+        counts = Counter()
+
+        def count_results(results):
+            for result in results:
+                counts['errors' if 'error' in result else 'rendered'] += 1
+                yield result
+
+        # Stream the rendered configurations to a temporary file, then save it to storage
+        results = count_results(render_configs(queryset, context))
+        extensions = dict(ConfigTemplate.objects.values_list('pk', 'file_extension'))
+        with tempfile.TemporaryFile() as f:
+            for output in stream_rendered_configs(results, output_format, model._meta.model_name, extensions):
+                f.write(output)
+            filename = f'{filename_from_model(model)}_configs.{output_format}'
+            self.job.data = save_job_file(self.job, f'{RENDER_CONFIG_FILE_PATH}/{self.job.job_id}/{filename}', f)
+
+        self.job.data.update({
+            'rendered': counts['rendered'],
+            'errors': counts['errors'],
+        })
+        self.logger.info(f"Rendered {counts['rendered']} configurations ({counts['errors']} errors)")
+        self.logger.info(f"Saved {self.job.data['size']} bytes to {self.job.data['file']}")
+
+
+class ExportTemplateJob(JobRunner):
+    """
+    Render an ExportTemplate for a set of objects, saving the output to storage. The job's data records the name,
+    size, and URL of the saved file.
+    """
+
+    class Meta:
+        name = 'Export Template'
+
+    def run(self, model, query, prefetch_related=None, *args, **kwargs):
+        """
+        Args:
+            model: The label of the model whose objects are to be exported (e.g. "dcim.interface")
+            query: The Query identifying the objects to export
+            prefetch_related: A list of related objects to prefetch for each object (optional)
+        """
+        export_template = self.job.object
+        queryset = apps.get_model(model).objects.all()
+        queryset.query = query
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        # Render the template to a temporary file, then save it to storage
+        with tempfile.TemporaryFile() as f:
+            for output in export_template.render_stream(queryset=queryset):
+                f.write(output.encode())
+            filename = export_template.get_filename(queryset=queryset)
+            self.job.data = save_job_file(self.job, f'{EXPORT_TEMPLATE_FILE_PATH}/{self.job.job_id}/{filename}', f)
+        self.logger.info(f"Saved {self.job.data['size']} bytes to {self.job.data['file']}")
@@ -0,0 +1,38 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from extras.models import CachedConfigContextModel
+
+
+class Command(BaseCommand):
+    help = "Render and cache the config context of all devices and virtual machines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="The number of objects to render per batch (default: 1000)"
+        )
+
+    def handle(self, *model_names, **options):
+        if not settings.CONFIG_CONTEXT_CACHE_ENABLED:
+            raise CommandError("Config context caching is not enabled (see CONFIG_CONTEXT_CACHE_ENABLED).")
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("The batch size must be a positive integer.")
+
+        start_time = time.time()
+        for model in apps.get_models():
+            if not issubclass(model, CachedConfigContextModel):
+                continue
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            self.stdout.write(f'Rendering config contexts for {len(pks)} {model._meta.verbose_name_plural}...')
+
+            # Clear the fingerprint of each object to force its config context to be rendered
+            model.objects.update(_config_context_fingerprint=None)
+            for i in range(0, len(pks), batch_size):
+                model.objects.filter(pk__in=pks[i:i + batch_size]).update_config_context()
+
+        self.stdout.write(self.style.SUCCESS(f'Finished in {time.time() - start_time:.2f} seconds.'))
@@ -1,9 +1,38 @@
+import time
+from collections import defaultdict
+
+from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandError
 from django.utils.translation import gettext as _
 
 from netbox.registry import registry
 from netbox.search.backends import search_backend
+from utilities.parallel import get_pk_chunks, run_in_parallel
+
+PROGRESS_CACHE_KEY = 'reindex_progress'
+
+
+def _index_chunk(model_label, start, end):
+    """
+    Cache all objects of the specified model with a primary key in the range [start, end). Any existing cached values
+    for this range (e.g. from an interrupted run, or for objects which have since been deleted) are replaced.
+    """
+    start_time = time.time()
+    model = apps.get_model(model_label)
+    content_type = ContentType.objects.get_for_model(model)
+    object_count = model.objects.filter(pk__gte=start, pk__lt=end).count()
+    row_count = search_backend.refresh_range(content_type, start, end)
+
+    return {
+        'model': model_label,
+        'chunk': start,
+        'objects': object_count,
+        'rows': row_count,
+        'start': start_time,
+        'end': time.time(),
+    }
 
 
 class Command(BaseCommand):
@@ -21,6 +50,22 @@ class Command(BaseCommand):
             action='store_true',
             help="For each model, reindex objects only if no cache entries already exist"
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help="Index each model in chunks of primary keys using the specified number of worker processes"
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help="The size of each chunk of primary keys when indexing with --workers (default: 10000)"
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help="Resume an interrupted run of --workers, skipping any objects which have already been indexed"
+        )
 
     def _get_indexers(self, *model_names):
         indexers = {}
@@ -59,7 +104,76 @@ class Command(BaseCommand):
 
         return indexers
 
+    def _index_parallel(self, indexers, workers, chunk_size, resume=False):
+        """
+        Index the specified models in chunks using a pool of worker processes. For each model, the primary key below
+        which all objects have been indexed is recorded so that an interrupted run may be resumed.
+        """
+        progress = cache.get(PROGRESS_CACHE_KEY) if resume else None
+        if progress is None:
+            if resume:
+                self.stdout.write('No progress found for a previous run; indexing all objects.')
+            progress = {}
+        cache.set(PROGRESS_CACHE_KEY, progress, timeout=None)
+
+        # Determine the outstanding chunks for each model
+        chunks = {}
+        for model in indexers.keys():
+            model_label = model._meta.label_lower
+            if model_chunks := get_pk_chunks(model.objects.all(), chunk_size, start=progress.get(model_label)):
+                chunks[model_label] = model_chunks
+            elif model_label in progress:
+                self.stdout.write(f'  {model_label}... Skipping (already completed).')
+            else:
+                self.stdout.write(f'  {model_label}... No objects found.')
+
+        tasks = [
+            (model_label, start, end) for model_label, model_chunks in chunks.items() for start, end in model_chunks
+        ]
+        completed = defaultdict(set)
+        position = defaultdict(int)
+        stats = defaultdict(lambda: {'objects': 0, 'rows': 0, 'start': float('inf'), 'end': 0})
+
+        for result in run_in_parallel(_index_chunk, tasks, workers):
+            model_label = result['model']
+            model_stats = stats[model_label]
+            model_stats['objects'] += result['objects']
+            model_stats['rows'] += result['rows']
+            model_stats['start'] = min(model_stats['start'], result['start'])
+            model_stats['end'] = max(model_stats['end'], result['end'])
+
+            # Chunks may complete out of order; advance the recorded primary key past each consecutive completed chunk
+            model_chunks = chunks[model_label]
+            completed[model_label].add(result['chunk'])
+            if result['chunk'] == model_chunks[position[model_label]][0]:
+                while position[model_label] < len(model_chunks) and \
+                        model_chunks[position[model_label]][0] in completed[model_label]:
+                    position[model_label] += 1
+                progress[model_label] = model_chunks[position[model_label] - 1][1]
+                cache.set(PROGRESS_CACHE_KEY, progress, timeout=None)
+
+            # Report the throughput for each model once all of its chunks have been completed
+            if position[model_label] == len(model_chunks):
+                elapsed = max(model_stats['end'] - model_stats['start'], 0.001)
+                self.stdout.write(
+                    f'  {model_label}... {model_stats["rows"]} entries cached for {model_stats["objects"]} '
+                    f'objects in {len(model_chunks)} chunks ({model_stats["objects"] / elapsed:.0f} '
+                    f'objects/s, {model_stats["rows"] / elapsed:.0f} rows/s).'
+                )
+
+        # Indexing has completed; discard the recorded progress
+        cache.delete(PROGRESS_CACHE_KEY)
+
     def handle(self, *model_labels, **kwargs):
+        workers = kwargs['workers']
+        if kwargs['resume'] and not workers:
+            workers = 1
+        if workers is not None and workers < 1:
+            raise CommandError(_("The number of workers must be a positive integer."))
+        if kwargs['chunk_size'] < 1:
+            raise CommandError(_("The chunk size must be a positive integer."))
+        if workers and kwargs['lazy']:
+            raise CommandError(_("The --lazy option cannot be used with --workers or --resume."))
 
         # Determine which models to reindex
         indexers = self._get_indexers(*model_labels)
@@ -67,8 +181,8 @@ class Command(BaseCommand):
             raise CommandError(_("No indexers found!"))
         self.stdout.write(f'Reindexing {len(indexers)} models.')
 
-        # Clear cached values for the specified models (if not being lazy)
-        if not kwargs['lazy']:
+        # Clear cached values for the specified models (if not being lazy or resuming a previous run)
+        if not kwargs['lazy'] and not kwargs['resume']:
             if model_labels:
                 content_types = [ContentType.objects.get_for_model(model) for model in indexers.keys()]
             else:
@@ -81,23 +195,26 @@ class Command(BaseCommand):
 
         # Index models
         self.stdout.write('Indexing models')
-        for model, idx in indexers.items():
-            app_label = model._meta.app_label
-            model_name = model._meta.model_name
-            self.stdout.write(f'  {app_label}.{model_name}... ', ending='')
-            self.stdout.flush()
-
-            if kwargs['lazy']:
-                content_type = ContentType.objects.get_for_model(model)
-                if cached_count := search_backend.count(object_types=[content_type]):
-                    self.stdout.write(f'Skipping (found {cached_count} existing).')
-                    continue
-
-            i = search_backend.cache(model.objects.iterator(), remove_existing=False)
-            if i:
-                self.stdout.write(f'{i} entries cached.')
-            else:
-                self.stdout.write('No objects found.')
+        if workers:
+            self._index_parallel(indexers, workers, kwargs['chunk_size'], resume=kwargs['resume'])
+        else:
+            for model, idx in indexers.items():
+                app_label = model._meta.app_label
+                model_name = model._meta.model_name
+                self.stdout.write(f'  {app_label}.{model_name}... ', ending='')
+                self.stdout.flush()
+
+                if kwargs['lazy']:
+                    content_type = ContentType.objects.get_for_model(model)
+                    if cached_count := search_backend.count(object_types=[content_type]):
+                        self.stdout.write(f'Skipping (found {cached_count} existing).')
+                        continue
+
+                i = search_backend.cache(model.objects.iterator(), remove_existing=False)
+                if i:
+                    self.stdout.write(f'{i} entries cached.')
+                else:
+                    self.stdout.write('No objects found.')
 
         msg = 'Completed.'
         if total_count := search_backend.size:
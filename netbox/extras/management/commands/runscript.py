@@ -104,4 +104,7 @@ class Command(BaseCommand):
             commit=commit,
         )
 
-        logger.info(f"Script completed in {job.duration}")
+        if job.completed:
+            logger.info(f"Script completed in {job.duration}")
+        else:
+            logger.info(f"Script divided into {job.children.count()} shards for execution by background workers")
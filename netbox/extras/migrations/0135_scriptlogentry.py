@@ -0,0 +1,55 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0020_alter_datafile_hash'),
+        ('extras', '0134_webhook_batch_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScriptLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('index', models.PositiveIntegerField(editable=False)),
+                ('time', models.DateTimeField(editable=False)),
+                ('level', models.CharField(editable=False, max_length=30)),
+                ('test', models.CharField(blank=True, editable=False, max_length=100)),
+                ('object_id', models.PositiveBigIntegerField(blank=True, editable=False, null=True)),
+                ('object_repr', models.CharField(blank=True, editable=False, max_length=200)),
+                ('message', models.TextField(blank=True, editable=False)),
+                (
+                    'job',
+                    models.ForeignKey(
+                        editable=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name='script_log_entries',
+                        to='core.job',
+                    ),
+                ),
+                (
+                    'object_type',
+                    models.ForeignKey(
+                        blank=True,
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='contenttypes.contenttype',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'script log entry',
+                'verbose_name_plural': 'script log entries',
+                'ordering': ('job_id', 'index'),
+                'constraints': [
+                    models.UniqueConstraint(fields=('job', 'index'), name='extras_scriptlogentry_unique_job_index')
+                ],
+            },
+        ),
+    ]
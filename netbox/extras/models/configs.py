@@ -3,6 +3,7 @@ from collections import defaultdict
 from jsonschema.exceptions import ValidationError as JSONValidationError
 
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
 from django.core.validators import ValidationError
 from django.db import models
 from django.urls import reverse
@@ -17,6 +18,7 @@ from utilities.data import deepmerge
 from utilities.jsonschema import validate_schema
 
 __all__ = (
+    'CachedConfigContextModel',
     'ConfigContext',
     'ConfigContextModel',
     'ConfigContextProfile',
@@ -261,6 +263,45 @@ class ConfigContextModel(models.Model):
             )
 
 
+class CachedConfigContextModel(ConfigContextModel):
+    """
+    A ConfigContextModel whose rendered config context can be cached (if CONFIG_CONTEXT_CACHE_ENABLED is set). The
+    cache is maintained by ConfigContextModelQuerySet.update_config_context().
+    """
+    # Cached rendered config context (null if not yet calculated), along with the IDs of the applicable
+    # ConfigContexts and a fingerprint of the data from which it was rendered
+    _config_context = models.JSONField(
+        blank=True,
+        null=True,
+        editable=False
+    )
+    _config_context_ids = ArrayField(
+        base_field=models.BigIntegerField(),
+        blank=True,
+        null=True,
+        editable=False
+    )
+    _config_context_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def get_config_context(self):
+        if settings.CONFIG_CONTEXT_CACHE_ENABLED and self._config_context is not None:
+            return dict(self._config_context)
+        return super().get_config_context()
+
+    def serialize_object(self, exclude=None):
+        # Omit the cached config context from change records
+        exclude = [*(exclude or []), '_config_context', '_config_context_ids', '_config_context_fingerprint']
+        return super().serialize_object(exclude=exclude)
+
+
 #
 # Config templates
 #
@@ -1,23 +1,31 @@
 import importlib.abc
 import importlib.util
+import itertools
 import os
 import sys
 
 from django.core.files.storage import storages
 from django.db import models
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 
 from extras.constants import DEFAULT_MIME_TYPE, JINJA_ENV_PARAMS_WITH_PATH_IMPORT
 from extras.utils import filename_from_model, filename_from_object
-from utilities.jinja2 import render_jinja2
+from utilities.jinja2 import get_template, render_jinja2
+from utilities.querysets import StreamingQuerySet
 
 __all__ = (
     'PythonModuleMixin',
     'RenderTemplateMixin',
 )
 
+# The minimum size (in characters) of each chunk of output yielded when streaming a rendered template
+RENDER_STREAM_CHUNK_SIZE = 64 * 1024
+
+# The size (in characters) beyond which a rendered template is streamed to the client, rather than returned whole
+RENDER_STREAM_BUFFER_SIZE = 1024 * 1024
+
 
 class CustomStoragesLoader(importlib.abc.Loader):
     """
@@ -141,6 +149,13 @@ class RenderTemplateMixin(models.Model):
         Render the template with the provided context. The context is passed to the Jinja2 environment as a dictionary.
         """
         context = self.get_context(context=context, queryset=queryset)
+
+        return self.render_template(context)
+
+    def render_template(self, context):
+        """
+        Render the template with a complete context, as returned by get_context().
+        """
         env_params = self.get_environment_params()
         output = render_jinja2(self.template_code, context, env_params, getattr(self, 'data_file', None))
 
@@ -149,23 +164,73 @@ class RenderTemplateMixin(models.Model):
 
         return output
 
-    def render_to_response(self, context=None, queryset=None):
-        output = self.render(context=context, queryset=queryset)
+    def render_stream(self, context=None, queryset=None):
+        """
+        Render the template incrementally, yielding the output in chunks. If a QuerySet is provided, its objects are
+        retrieved from the database in chunks as the template iterates over them, rather than all at once.
+        """
+        if queryset is not None:
+            queryset = StreamingQuerySet(queryset)
+        context = self.get_context(context=context, queryset=queryset)
+        template = get_template(self.template_code, self.get_environment_params(), getattr(self, 'data_file', None))
+
+        chunks, size = [], 0
+        for output in template.generate(**context):
+            chunks.append(output)
+            size += len(output)
+            if size >= RENDER_STREAM_CHUNK_SIZE:
+                output = ''.join(chunks)
+                # Defer a trailing carriage return, which may be followed by a line feed in the next chunk
+                remainder = '\r' if output.endswith('\r') else ''
+                yield output[:len(output) - len(remainder)].replace('\r\n', '\n')
+                chunks, size = [remainder], len(remainder)
+
+        if output := ''.join(chunks):
+            yield output.replace('\r\n', '\n')
+
+    def get_filename(self, context=None, queryset=None):
+        """
+        Return the name of the file (including its extension) to which the rendered template is saved.
+        """
+        extension = f'.{self.file_extension}' if self.file_extension else ''
+        if self.file_name:
+            filename = self.file_name
+        elif queryset is not None:
+            filename = filename_from_model(queryset.model)
+        elif context:
+            filename = filename_from_object(context)
+        else:
+            filename = "output"
+
+        return f'{filename}{extension}'
+
+    def render_to_response(self, context=None, queryset=None, stream=False):
+        """
+        Render the template and return it as an HTTP response. If `stream` is true, output exceeding
+        RENDER_STREAM_BUFFER_SIZE is streamed to the client as it is rendered (see render_stream()).
+        """
         mime_type = self.mime_type or DEFAULT_MIME_TYPE
 
         # Build the response
-        response = HttpResponse(output, content_type=mime_type)
+        if stream:
+            output = self.render_stream(context=context, queryset=queryset)
+            # Buffer the output until it grows large enough to warrant streaming. A smaller template is thus rendered
+            # in full before the response is returned, so that any error is raised rather than truncating the output.
+            chunks, size = [], 0
+            for chunk in output:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= RENDER_STREAM_BUFFER_SIZE:
+                    response = StreamingHttpResponse(itertools.chain(chunks, output), content_type=mime_type)
+                    break
+            else:
+                response = HttpResponse(''.join(chunks), content_type=mime_type)
+        else:
+            output = self.render(context=context, queryset=queryset)
+            response = HttpResponse(output, content_type=mime_type)
 
         if self.as_attachment:
-            extension = f'.{self.file_extension}' if self.file_extension else ''
-            if self.file_name:
-                filename = self.file_name
-            elif queryset:
-                filename = filename_from_model(queryset.model)
-            elif context:
-                filename = filename_from_object(context)
-            else:
-                filename = "output"
-            response['Content-Disposition'] = f'attachment; filename="{filename}{extension}"'
+            filename = self.get_filename(context=context, queryset=queryset)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
         return response
@@ -5,7 +5,7 @@ from pathlib import Path
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.postgres.fields import ArrayField
-from django.core.validators import ValidationError
+from django.core.validators import MinValueValidator, ValidationError
 from django.db import models
 from django.urls import reverse
 from django.utils import timezone
@@ -23,7 +23,8 @@ from netbox.config import get_config
 from netbox.events import get_event_type_choices
 from netbox.models import ChangeLoggedModel
 from netbox.models.features import (
-    CloningMixin, CustomFieldsMixin, CustomLinksMixin, ExportTemplatesMixin, SyncedDataMixin, TagsMixin, has_feature
+    CloningMixin, CustomFieldsMixin, CustomLinksMixin, ExportTemplatesMixin, JobsMixin, SyncedDataMixin, TagsMixin,
+    has_feature,
 )
 from utilities.html import clean_html
 from utilities.jinja2 import render_jinja2
@@ -136,6 +137,22 @@ class EventRule(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLogged
             except ValueError as e:
                 raise ValidationError({'conditions': e})
 
+    def __getstate__(self):
+        # Omit the compiled ConditionSet (if any) when pickling
+        state = super().__getstate__()
+        state.pop('_condition_set', None)
+        return state
+
+    def get_condition_set(self):
+        """
+        Return the compiled ConditionSet for the event rule's conditions. This is compiled only once and reused for
+        subsequent evaluations (unless the conditions are reassigned).
+        """
+        compiled = getattr(self, '_condition_set', None)
+        if compiled is None or compiled[0] is not self.conditions:
+            compiled = self._condition_set = (self.conditions, ConditionSet(self.conditions))
+        return compiled[1]
+
     def eval_conditions(self, data):
         """
         Test whether the given data meets the conditions of the event rule (if any). Return True
@@ -147,7 +164,7 @@ class EventRule(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLogged
         logger = logging.getLogger('netbox.event_rules')
 
         try:
-            result = ConditionSet(self.conditions).eval(data)
+            result = self.get_condition_set().eval(data)
             logger.debug(f'{self.name}: Evaluated as {result}')
             return result
         except InvalidCondition as e:
@@ -235,6 +252,16 @@ class Webhook(CustomFieldsMixin, ExportTemplatesMixin, TagsMixin, ChangeLoggedMo
             "The specific CA certificate file to use for SSL verification. Leave blank to use the system defaults."
         )
     )
+    batch_size = models.PositiveIntegerField(
+        verbose_name=_('batch size'),
+        validators=(MinValueValidator(1),),
+        blank=True,
+        null=True,
+        help_text=_(
+            "Combine the events resulting from a single request or job into batches of up to this many events, each "
+            "delivered in a single request. Leave blank to send a separate request for each event."
+        )
+    )
     events = GenericRelation(
         EventRule,
         content_type_field='action_object_type',
@@ -394,7 +421,9 @@ class CustomLink(CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
         }
 
 
-class ExportTemplate(SyncedDataMixin, CloningMixin, ExportTemplatesMixin, ChangeLoggedModel, RenderTemplateMixin):
+class ExportTemplate(
+    SyncedDataMixin, CloningMixin, ExportTemplatesMixin, JobsMixin, ChangeLoggedModel, RenderTemplateMixin
+):
     object_types = models.ManyToManyField(
         to='contenttypes.ContentType',
         related_name='export_templates',
@@ -3,22 +3,26 @@ import logging
 from functools import cached_property
 
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.urls import reverse
+from django.urls import NoReverseMatch, reverse
 from django.utils.translation import gettext_lazy as _
 
 from core.choices import ManagedFileRootPathChoices
 from core.models import ManagedFile
+from extras.choices import LogLevelChoices
 from extras.utils import is_script
 from netbox.models.features import JobsMixin, EventRulesMixin
 from utilities.querysets import RestrictedQuerySet
+from utilities.views import get_viewname
 from .mixins import PythonModuleMixin
 
 __all__ = (
     'Script',
+    'ScriptLogEntry',
     'ScriptModule',
 )
 
@@ -84,6 +88,98 @@ class Script(EventRulesMixin, JobsMixin):
             self.id = None
 
 
+class ScriptLogEntry(models.Model):
+    """
+    A message logged by a Script during its execution. Log entries are stored apart from the data of the Job so that
+    they can be retrieved incrementally.
+    """
+    job = models.ForeignKey(
+        to='core.Job',
+        # Log entries are deleted in bulk by a pre_delete signal handler on Job
+        on_delete=models.DO_NOTHING,
+        related_name='script_log_entries',
+        editable=False
+    )
+    index = models.PositiveIntegerField(
+        verbose_name=_('index'),
+        editable=False
+    )
+    time = models.DateTimeField(
+        verbose_name=_('time'),
+        editable=False
+    )
+    level = models.CharField(
+        verbose_name=_('level'),
+        max_length=30,
+        choices=LogLevelChoices,
+        editable=False
+    )
+    test = models.CharField(
+        verbose_name=_('test'),
+        max_length=100,
+        blank=True,
+        editable=False,
+        help_text=_('The test method which logged the message (legacy reports only)')
+    )
+    object_type = models.ForeignKey(
+        to='contenttypes.ContentType',
+        on_delete=models.CASCADE,
+        related_name='+',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    object_id = models.PositiveBigIntegerField(
+        blank=True,
+        null=True,
+        editable=False
+    )
+    object_repr = models.CharField(
+        max_length=200,
+        blank=True,
+        editable=False
+    )
+    message = models.TextField(
+        verbose_name=_('message'),
+        blank=True,
+        editable=False
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    _netbox_private = True
+
+    class Meta:
+        ordering = ('job_id', 'index')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('job', 'index'),
+                name='extras_scriptlogentry_unique_job_index'
+            ),
+        )
+        verbose_name = _('script log entry')
+        verbose_name_plural = _('script log entries')
+
+    def __str__(self):
+        return f'{self.job_id} #{self.index}'
+
+    @property
+    def object_url(self):
+        """
+        Return the URL of the object to which the message pertains (if any). The URL is resolved from the object's
+        type and ID, as the object itself may no longer exist.
+        """
+        if self.object_type_id is None or self.object_id is None:
+            return None
+        model = ContentType.objects.get_for_id(self.object_type_id).model_class()
+        if model is None:
+            return None
+        try:
+            return reverse(get_viewname(model), kwargs={'pk': self.object_id})
+        except NoReverseMatch:
+            return None
+
+
 class ScriptModuleManager(models.Manager.from_queryset(RestrictedQuerySet)):
 
     def get_queryset(self):
@@ -0,0 +1,171 @@
+import json
+import tarfile
+import time
+import zipfile
+from io import BytesIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.text import get_valid_filename
+from django.utils.translation import gettext as _
+
+from .choices import RenderConfigFormatChoices
+from .models import ConfigTemplate
+
+__all__ = (
+    'render_configs',
+    'stream_rendered_configs',
+)
+
+# The number of objects retrieved from the database at once
+RENDER_BATCH_SIZE = 100
+
+RENDER_CONFIG_CONTENT_TYPES = {
+    RenderConfigFormatChoices.FORMAT_NDJSON: 'application/x-ndjson',
+    RenderConfigFormatChoices.FORMAT_TAR: 'application/x-tar',
+    RenderConfigFormatChoices.FORMAT_ZIP: 'application/zip',
+}
+
+
+def _render_config(obj, configtemplate, context):
+    """
+    Render a ConfigTemplate for a single object. Any error raised while rendering is reported in the result.
+    """
+    result = {
+        'id': obj.pk,
+        'name': obj.name,
+        'configtemplate': configtemplate.pk if configtemplate else None,
+    }
+    if configtemplate is None:
+        result['error'] = _('No config template found for this {object_type}.').format(
+            object_type=obj._meta.model_name
+        )
+        return result
+
+    try:
+        result['content'] = configtemplate.render_template(context)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+
+    return result
+
+
+def render_configs(queryset, context=None):
+    """
+    Render the preferred ConfigTemplate for each Device or VirtualMachine in the given QuerySet, yielding a result for
+    each object in order of primary key. Objects are retrieved in batches, together with their config context data and
+    assigned ConfigTemplates.
+
+    Each result is a dictionary with the object's ID and name, the ID of its ConfigTemplate, and either the rendered
+    `content` or an `error` message.
+
+    Args:
+        queryset: A QuerySet of Devices or VirtualMachines
+        context: Additional context data to be applied to each template (optional)
+    """
+    object_type = queryset.model._meta.model_name
+    queryset = queryset.select_related(
+        'config_template', 'role__config_template', 'platform__config_template'
+    ).annotate_config_context_data().order_by('pk')
+
+    # Each ConfigTemplate (and its base context) is shared among all objects to which it is assigned
+    configtemplates = {}
+    base_contexts = {}
+
+    for obj in queryset.iterator(chunk_size=RENDER_BATCH_SIZE):
+        if configtemplate := obj.get_config_template():
+            if configtemplate.pk not in configtemplates:
+                configtemplates[configtemplate.pk] = ConfigTemplate.objects.select_related(
+                    'data_file__source'
+                ).get(pk=configtemplate.pk)
+                base_contexts[configtemplate.pk] = configtemplates[configtemplate.pk].get_context()
+            configtemplate = configtemplates[configtemplate.pk]
+            obj_context = {
+                **base_contexts[configtemplate.pk],
+                **obj.get_config_context(),
+                **(context or {}),
+                object_type: obj,
+            }
+            yield _render_config(obj, configtemplate, obj_context)
+        else:
+            yield _render_config(obj, None, None)
+
+
+class StreamBuffer:
+    """
+    A write-only file-like object from which written data can be retrieved incrementally, for streaming the output
+    of tarfile and zipfile.
+    """
+    def __init__(self):
+        self.buffer = BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+    def read(self):
+        """
+        Return (and discard) all data written since the last read.
+        """
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def _get_file_name(result, object_type, extensions):
+    name = get_valid_filename(result['name'] or object_type)
+    extension = extensions.get(result['configtemplate']) or 'txt'
+    return f"{name}_{result['id']}.{extension}"
+
+
+def stream_rendered_configs(results, output_format, object_type, extensions=None):
+    """
+    Yield the given results of render_configs() encoded in the specified format, as a series of bytestrings.
+
+    NDJSON output includes a line for each result. Archives include a file for each successfully rendered
+    configuration, named for its object and the ConfigTemplate's file extension (if any), followed by an
+    "errors.json" file listing any objects which could not be rendered.
+
+    Args:
+        results: An iterable of results from render_configs()
+        output_format: The output format (see RenderConfigFormatChoices)
+        object_type: The name of the model for which configurations were rendered (e.g. "device")
+        extensions: A mapping of ConfigTemplate IDs to file extensions (optional)
+    """
+    if output_format == RenderConfigFormatChoices.FORMAT_NDJSON:
+        for result in results:
+            yield (json.dumps(result, cls=DjangoJSONEncoder) + '\n').encode()
+        return
+
+    extensions = extensions or {}
+    errors = []
+    buffer = StreamBuffer()
+
+    if output_format == RenderConfigFormatChoices.FORMAT_TAR:
+        archive = tarfile.open(fileobj=buffer, mode='w|')
+
+        def add_file(name, content):
+            data = content.encode()
+            tarinfo = tarfile.TarInfo(name)
+            tarinfo.size = len(data)
+            tarinfo.mtime = time.time()
+            archive.addfile(tarinfo, BytesIO(data))
+    else:
+        archive = zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED)
+
+        def add_file(name, content):
+            archive.writestr(name, content)
+
+    with archive:
+        for result in results:
+            if 'error' in result:
+                errors.append(result)
+            else:
+                add_file(_get_file_name(result, object_type, extensions), result['content'])
+            if data := buffer.read():
+                yield data
+        if errors:
+            add_file('errors.json', json.dumps(errors, indent=4))
+    yield buffer.read()
@@ -0,0 +1,128 @@
+import itertools
+import json
+import tempfile
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+from .models import ScriptLogEntry
+
+__all__ = (
+    'ScriptLog',
+)
+
+# The maximum number of log records held in memory (and written to the database) at once
+SCRIPT_LOG_BATCH_SIZE = 1000
+
+
+class ScriptLog:
+    """
+    A bounded buffer for the messages logged by a Script. Up to SCRIPT_LOG_BATCH_SIZE records are held in memory;
+    beyond that, records are spilled in batches to a temporary file. Once the Script has finished, save() writes all
+    records to the database as ScriptLogEntries, again in batches.
+
+    Records are not written to the database as they are logged, because the Script runs within a transaction which
+    may be rolled back.
+
+    Args:
+        retention: A mapping of log levels to the maximum number of messages of each level to retain (optional).
+            Defaults to the SCRIPT_LOG_RETENTION configuration parameter.
+    """
+    def __init__(self, retention=None):
+        self.retention = settings.SCRIPT_LOG_RETENTION if retention is None else retention
+
+        # The number of messages logged, and the number discarded, for each level
+        self.counts = Counter()
+        self.discarded = Counter()
+
+        self._buffer = []
+        self._file = None
+
+    def __len__(self):
+        """
+        Return the number of records retained.
+        """
+        return sum(self.counts.values()) - sum(self.discarded.values())
+
+    def __iter__(self):
+        """
+        Iterate over all retained records in the order in which they were logged.
+        """
+        if self._file is not None:
+            self._file.seek(0)
+            for line in self._file:
+                yield json.loads(line)
+        yield from self._buffer
+
+    def append(self, level, message, obj=None, test=None):
+        """
+        Record a message, unless the maximum number of messages of its level have already been retained.
+
+        Args:
+            level: The message's log level (see LogLevelChoices)
+            message: The message text
+            obj: The object to which the message pertains (optional)
+            test: The name of the test method which logged the message (legacy reports only)
+        """
+        self.counts[level] += 1
+        limit = self.retention.get(level)
+        if limit is not None and self.counts[level] > limit:
+            self.discarded[level] += 1
+            return
+
+        # Reference model instances by type & ID, deferring resolution of their URLs until they are displayed
+        object_type_id = object_id = None
+        if isinstance(obj, models.Model) and obj.pk is not None:
+            object_type_id = ContentType.objects.get_for_model(obj).pk
+            object_id = obj.pk
+
+        self._buffer.append({
+            'time': timezone.now().isoformat(),
+            'level': level,
+            'test': test or '',
+            'object_type_id': object_type_id,
+            'object_id': object_id,
+            'object_repr': str(obj)[:200] if obj else '',
+            'message': str(message),
+        })
+        if len(self._buffer) >= SCRIPT_LOG_BATCH_SIZE:
+            self._spill()
+
+    def _spill(self):
+        """
+        Move all records held in memory to the temporary file.
+        """
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(mode='w+')
+        self._file.seek(0, 2)
+        self._file.writelines(json.dumps(record) + '\n' for record in self._buffer)
+        self._buffer = []
+
+    def save(self, job):
+        """
+        Write all retained records to the database as ScriptLogEntries assigned to the given Job, and discard them.
+        Any entries saved previously for the Job (e.g. by an earlier attempt to run it) are replaced.
+        """
+        entries = ScriptLogEntry.objects.filter(job=job)
+        entries._raw_delete(using=entries.db)
+
+        records = enumerate(self, start=1)
+        while batch := list(itertools.islice(records, SCRIPT_LOG_BATCH_SIZE)):
+            ScriptLogEntry.objects.bulk_create([
+                ScriptLogEntry(job=job, index=index, **{**record, 'time': datetime.fromisoformat(record['time'])})
+                for index, record in batch
+            ])
+        self.close()
+
+    def close(self):
+        """
+        Discard all records and release the temporary file (if any).
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._buffer = []
@@ -9,11 +9,11 @@ from django import forms
 from django.conf import settings
 from django.core.files.storage import storages
 from django.core.validators import RegexValidator
-from django.utils import timezone
 from django.utils.functional import classproperty
 from django.utils.translation import gettext as _
 
 from extras.choices import LogLevelChoices
+from extras.constants import SCRIPT_SHARD_SIZE
 from extras.models import ScriptModule
 from ipam.formfields import IPAddressFormField, IPNetworkFormField
 from ipam.validators import MaxPrefixLengthValidator, MinPrefixLengthValidator, prefix_validator
@@ -21,6 +21,7 @@ from utilities.forms import add_blank_choice
 from utilities.forms.fields import DynamicModelChoiceField, DynamicModelMultipleChoiceField
 from utilities.forms.widgets import DatePicker, DateTimePicker
 from .forms import ScriptForm
+from .scriptlog import ScriptLog
 
 
 __all__ = (
@@ -317,7 +318,7 @@ class BaseScript:
         pass
 
     def __init__(self):
-        self.messages = []  # Primary script log
+        self.script_log = ScriptLog()  # Primary script log
         self.tests = {}  # Mapping of logs for test methods
         self.output = ''
         self.failed = False
@@ -329,6 +330,9 @@ class BaseScript:
         # Declare the placeholder for the current request
         self.request = None
 
+        # The portion of the script's partitioned input (if any) to be processed by this execution
+        self.shard = None
+
         # Initiate the storage backend (local, S3, etc) as a class attr
         self.storage = storages.create_storage(storages.backends["scripts"])
 
@@ -340,7 +344,6 @@ class BaseScript:
                     LogLevelChoices.LOG_INFO: 0,
                     LogLevelChoices.LOG_WARNING: 0,
                     LogLevelChoices.LOG_FAILURE: 0,
-                    'log': [],
                 }
 
     def __str__(self):
@@ -392,6 +395,14 @@ class BaseScript:
     def scheduling_enabled(self):
         return getattr(self.Meta, 'scheduling_enabled', True)
 
+    @classproperty
+    def shard_size(self):
+        return getattr(self.Meta, 'shard_size', SCRIPT_SHARD_SIZE)
+
+    @classproperty
+    def shard_queues(self):
+        return getattr(self.Meta, 'shard_queues', None)
+
     @property
     def filename(self):
         return inspect.getfile(self.__class__)
@@ -470,12 +481,22 @@ class BaseScript:
         self.run_tests()
         self.post_run()
 
+    def partition(self, data):
+        """
+        Override this method to return the input (a QuerySet or a list of items) over which the script's work may be
+        divided. If the input exceeds the script's shard size, it is divided into shards, each of which is processed
+        by a separate execution of run() in parallel. The portion of the input to be processed is available to run()
+        as self.shard.
+        """
+        return None
+
     def get_job_data(self):
         """
         Return a dictionary of data to attach to the script's Job.
         """
         return {
-            'log': self.messages,
+            'log_counts': dict(self.script_log.counts),
+            'log_discarded': dict(self.script_log.discarded),
             'output': self.output,
             'tests': self.tests,
         }
@@ -541,25 +562,12 @@ class BaseScript:
 
             # Record message (if any) to the report log
             if message:
-                # TODO: Use a dataclass for test method logs
-                self.tests[self._current_test]['log'].append((
-                    timezone.now().isoformat(),
-                    level,
-                    str(obj) if obj else None,
-                    obj.get_absolute_url() if hasattr(obj, 'get_absolute_url') else None,
-                    str(message),
-                ))
+                self.script_log.append(level, message, obj, test=self._current_test)
 
         elif message:
 
             # Record to the script's log
-            self.messages.append({
-                'time': timezone.now().isoformat(),
-                'status': level,
-                'message': str(message),
-                'obj': str(obj) if obj else None,
-                'url': obj.get_absolute_url() if hasattr(obj, 'get_absolute_url') else None,
-            })
+            self.script_log.append(level, message, obj)
 
             # Record to the system log
             if obj:
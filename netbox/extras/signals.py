@@ -1,11 +1,22 @@
+from django.apps import apps
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from core.events import *
+from core.models import Job
 from core.signals import job_end, job_start
-from extras.events import process_event_rules
-from extras.models import EventRule, Notification, Subscription
+from extras.configcontexts import invalidate_config_context_index
+from extras.events import get_event_rules, invalidate_event_rules, process_event_rules
+from extras.jobs import ExportTemplateJob, RenderConfigsJob, ScriptShardJob
+from extras.models import (
+    CachedConfigContextModel, ConfigContext, EventRule, Notification, NotificationGroup, Script, ScriptLogEntry,
+    ScriptModule, Subscription, Webhook,
+)
 from netbox.config import get_config
 from netbox.models.features import has_feature
 from netbox.signals import post_clean
@@ -88,20 +99,216 @@ def validate_assigned_tags(sender, instance, action, model, pk_set, **kwargs):
             raise AbortRequest(f"Tag {tag} cannot be assigned to {ct.model} objects.")
 
 
+#
+# Config context index
+#
+
+# Models whose hierarchy determines the objects to which a ConfigContext applies
+CONFIG_CONTEXT_HIERARCHICAL_MODELS = ('dcim.region', 'dcim.sitegroup', 'dcim.location', 'dcim.devicerole')
+
+
+@receiver((post_save, post_delete), sender=ConfigContext)
+def handle_config_context_index_changed(sender, **kwargs):
+    """
+    Invalidate the ConfigContextIndex when a ConfigContext is changed, when an object within a hierarchy to which
+    ConfigContexts may be assigned is changed, or when any object to which ConfigContexts may be assigned is deleted.
+    """
+    invalidate_config_context_index()
+
+
+for label in CONFIG_CONTEXT_HIERARCHICAL_MODELS:
+    post_save.connect(handle_config_context_index_changed, sender=label)
+
+
+def handle_config_context_index_assignments_changed(sender, action, **kwargs):
+    """
+    Invalidate the ConfigContextIndex when the objects to which a ConfigContext is assigned are changed.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_config_context_index()
+
+
+for field in ConfigContext._meta.many_to_many:
+    m2m_changed.connect(handle_config_context_index_assignments_changed, sender=field.remote_field.through)
+    post_delete.connect(handle_config_context_index_changed, sender=field.related_model)
+
+
+#
+# Config context caching
+#
+
+# Models which determine the ConfigContexts applicable to a Device or VirtualMachine, mapped to the field by which
+# each refers to them.
+CONFIG_CONTEXT_RELATED_FIELDS = {
+    'dcim.region': 'site__region',
+    'dcim.sitegroup': 'site__group',
+    'dcim.site': 'site',
+    'dcim.location': 'location',
+    'dcim.platform': 'platform',
+    'dcim.devicerole': 'role',
+    'tenancy.tenantgroup': 'tenant__group',
+    'tenancy.tenant': 'tenant',
+    'virtualization.cluster': 'cluster',
+    'extras.tag': 'tags',
+}
+
+# Related models whose own assignments have no bearing on the applicable ConfigContexts. These need to be handled
+# only upon deletion, which removes them from their assigned objects without calling save() on those objects.
+CONFIG_CONTEXT_DELETE_ONLY_MODELS = ('dcim.platform', 'tenancy.tenantgroup', 'extras.tag')
+
+
+def get_config_context_models():
+    return [model for model in apps.get_models() if issubclass(model, CachedConfigContextModel)]
+
+
+def update_object_config_context(instance):
+    """
+    Re-render the cached config context of a single Device or VirtualMachine.
+    """
+    type(instance).objects.filter(pk=instance.pk).update_config_context()
+
+    # The cached values held by the instance itself are now stale
+    instance._config_context = instance._config_context_ids = instance._config_context_fingerprint = None
+
+
+def get_related_config_context_filters(instance):
+    """
+    Return a mapping of each config context model to the filters which select the objects assigned to the given
+    related object (or to any of its descendants).
+    """
+    field = CONFIG_CONTEXT_RELATED_FIELDS[instance._meta.label_lower]
+    if hasattr(instance, 'get_descendants'):
+        filters = {f'{field}__in': instance.get_descendants(include_self=True)}
+    else:
+        filters = {field: instance}
+
+    return {
+        model: filters for model in get_config_context_models()
+        if any(f.name == field.split('__')[0] for f in model._meta.get_fields())
+    }
+
+
+@receiver(post_save)
+def handle_config_context_object_saved(sender, instance, **kwargs):
+    """
+    Re-render the cached config context of a Device or VirtualMachine when it is saved.
+    """
+    if settings.CONFIG_CONTEXT_CACHE_ENABLED and isinstance(instance, CachedConfigContextModel):
+        update_object_config_context(instance)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def handle_config_context_object_tags_changed(sender, instance, action, **kwargs):
+    """
+    Re-render the cached config context of a Device or VirtualMachine when its assigned tags are changed.
+    """
+    if (
+        settings.CONFIG_CONTEXT_CACHE_ENABLED and
+        isinstance(instance, CachedConfigContextModel) and
+        action in ('post_add', 'post_remove', 'post_clear')
+    ):
+        update_object_config_context(instance)
+
+
+def handle_config_context_related_object_saved(sender, instance, created, **kwargs):
+    """
+    Re-render the cached config context of all Devices and VirtualMachines assigned to a related object (e.g. a Site)
+    when it is modified, as its own assignments (e.g. to a Region) determine the applicable ConfigContexts.
+    """
+    if settings.CONFIG_CONTEXT_CACHE_ENABLED and not created:
+        for model, filters in get_related_config_context_filters(instance).items():
+            model.objects.filter(**filters).update_config_context()
+
+
+def handle_config_context_related_object_deleting(sender, instance, **kwargs):
+    """
+    Record the Devices and VirtualMachines assigned to a related object which is about to be deleted.
+    """
+    if settings.CONFIG_CONTEXT_CACHE_ENABLED:
+        instance._config_context_objects = {
+            model: list(model.objects.filter(**filters).values_list('pk', flat=True))
+            for model, filters in get_related_config_context_filters(instance).items()
+        }
+
+
+def handle_config_context_related_object_deleted(sender, instance, **kwargs):
+    """
+    Re-render the cached config context of all Devices and VirtualMachines formerly assigned to a deleted object.
+    """
+    for model, pks in getattr(instance, '_config_context_objects', {}).items():
+        model.objects.filter(pk__in=pks).update_config_context()
+
+
+for label in CONFIG_CONTEXT_RELATED_FIELDS:
+    if label not in CONFIG_CONTEXT_DELETE_ONLY_MODELS:
+        post_save.connect(handle_config_context_related_object_saved, sender=label)
+    pre_delete.connect(handle_config_context_related_object_deleting, sender=label)
+    post_delete.connect(handle_config_context_related_object_deleted, sender=label)
+
+
+@receiver(post_save, sender=ConfigContext)
+@receiver(post_delete, sender=ConfigContext)
+def handle_config_context_changed(sender, instance, **kwargs):
+    """
+    Re-render the cached config context of all Devices and VirtualMachines to which a ConfigContext applied or now
+    applies when it is modified or deleted.
+    """
+    if not settings.CONFIG_CONTEXT_CACHE_ENABLED:
+        return
+
+    for model in get_config_context_models():
+        queryset = model.objects.filter(_config_context_ids__contains=[instance.pk])
+        if instance.pk and ConfigContext.objects.filter(pk=instance.pk).exists():
+            # Include any objects to which the ConfigContext now applies
+            queryset |= model.objects.filter(Exists(
+                ConfigContext.objects.filter(pk=instance.pk).filter(model.objects.all()._get_config_context_filters())
+            ))
+        queryset.update_config_context()
+
+
+def handle_config_context_assignments_changed(sender, instance, action, **kwargs):
+    """
+    Re-render the cached config contexts affected by a change to the objects to which a ConfigContext is assigned.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, ConfigContext):
+        handle_config_context_changed(sender, instance)
+
+
+for field in ConfigContext._meta.many_to_many:
+    m2m_changed.connect(handle_config_context_assignments_changed, sender=field.remote_field.through)
+
+
 #
 # Event rules
 #
 
+@receiver((post_save, post_delete), sender=EventRule)
+@receiver((post_save, post_delete), sender=NotificationGroup)
+@receiver((post_save, post_delete), sender=Script)
+@receiver((post_save, post_delete), sender=ScriptModule)
+@receiver((post_save, post_delete), sender=Webhook)
+def handle_event_rule_changed(sender, **kwargs):
+    """
+    Invalidate cached EventRules when an EventRule (or an object which may serve as its action) is changed.
+    """
+    invalidate_event_rules()
+
+
+@receiver(m2m_changed, sender=EventRule.object_types.through)
+def handle_event_rule_object_types_changed(sender, action, **kwargs):
+    """
+    Invalidate cached EventRules when the object types assigned to an EventRule are changed.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_event_rules()
+
+
 @receiver(job_start)
 def process_job_start_event_rules(sender, **kwargs):
     """
     Process event rules for jobs starting.
     """
-    event_rules = EventRule.objects.filter(
-        event_types__contains=[JOB_STARTED],
-        enabled=True,
-        object_types=sender.object_type
-    )
+    event_rules = get_event_rules().get((sender.object_type_id, JOB_STARTED), [])
     username = sender.user.username if sender.user else None
     process_event_rules(
         event_rules=event_rules,
@@ -117,11 +324,7 @@ def process_job_end_event_rules(sender, **kwargs):
     """
     Process event rules for jobs terminating.
     """
-    event_rules = EventRule.objects.filter(
-        event_types__contains=[JOB_COMPLETED],
-        enabled=True,
-        object_types=sender.object_type
-    )
+    event_rules = get_event_rules().get((sender.object_type_id, JOB_COMPLETED), [])
     username = sender.user.username if sender.user else None
     process_event_rules(
         event_rules=event_rules,
@@ -132,6 +335,59 @@ def process_job_end_event_rules(sender, **kwargs):
     )
 
 
+#
+# Script logs
+#
+
+@receiver(pre_delete, sender=Job)
+def handle_script_job_deleted(sender, instance, **kwargs):
+    """
+    Delete all log entries of a Job before the Job itself is deleted. Entries are deleted directly, without loading
+    them into memory.
+    """
+    entries = ScriptLogEntry.objects.filter(job=instance)
+    entries._raw_delete(using=entries.db)
+
+
+#
+# Script shards
+#
+
+@receiver(job_end)
+def handle_script_shard_end(sender, **kwargs):
+    """
+    Terminate the parent of a script shard once all of its children have completed.
+    """
+    if sender.parent_id:
+        ScriptShardJob.terminate_parent(sender)
+
+
+@receiver(post_delete, sender=Job)
+def handle_script_shard_deleted(sender, instance, **kwargs):
+    """
+    Account for a script shard which has been deleted before completing, so that its parent is not left running.
+    """
+    if instance.parent_id and instance.completed is None:
+        ScriptShardJob.terminate_parent(instance, lost=True)
+
+
+#
+# Job output files
+#
+
+@receiver(pre_delete, sender=Job)
+def handle_job_file_deleted(sender, instance, **kwargs):
+    """
+    Delete the file saved by an ExportTemplateJob or RenderConfigsJob once the job has been deleted.
+    """
+    if (
+        instance.name in (ExportTemplateJob.name, RenderConfigsJob.name) and
+        isinstance(instance.data, dict) and
+        instance.data.get('file')
+    ):
+        transaction.on_commit(lambda: storages['job_files'].delete(instance.data['file']))
+
+
 #
 # Notifications
 #
@@ -12,3 +12,13 @@ class ScriptFileSystemStorage(FileSystemStorage):
     @cached_property
     def base_location(self):
         return settings.SCRIPTS_ROOT
+
+
+class JobFileSystemStorage(FileSystemStorage):
+    """
+    Storage for the output of background jobs (such as rendered export templates). Unlike media files, these are not
+    served directly: each file may be retrieved only through its job (see JobFileView).
+    """
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.JOB_FILES_ROOT)
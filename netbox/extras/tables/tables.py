@@ -31,6 +31,7 @@ __all__ = (
     'ReportResultsTable',
     'ScriptResultsTable',
     'ScriptJobTable',
+    'ScriptLogEntryTable',
     'SubscriptionTable',
     'TableConfigTable',
     'TaggedItemTable',
@@ -458,7 +459,7 @@ class WebhookTable(NetBoxTable):
         model = Webhook
         fields = (
             'pk', 'id', 'name', 'http_method', 'payload_url', 'http_content_type', 'secret', 'ssl_verification',
-            'ca_file_path', 'description', 'tags', 'created', 'last_updated',
+            'ca_file_path', 'batch_size', 'description', 'tags', 'created', 'last_updated',
         )
         default_columns = (
             'pk', 'name', 'http_method', 'payload_url', 'description',
@@ -756,6 +757,46 @@ class ScriptResultsTable(BaseTable):
         return format_html("<a href='{}'>{}</a>", value, value)
 
 
+class ScriptLogEntryTable(BaseTable):
+    index = tables.Column(
+        verbose_name=_('Line')
+    )
+    test = tables.Column(
+        verbose_name=_('Method')
+    )
+    time = columns.DateTimeColumn(
+        verbose_name=_('Time'),
+        timespec='seconds'
+    )
+    level = tables.TemplateColumn(
+        template_code="""{% load log_levels %}{% log_level record.level %}""",
+        verbose_name=_('Level')
+    )
+    object = tables.Column(
+        accessor='object_repr',
+        verbose_name=_('Object'),
+        orderable=False
+    )
+    message = columns.MarkdownColumn(
+        verbose_name=_('Message')
+    )
+
+    class Meta(BaseTable.Meta):
+        model = ScriptLogEntry
+        empty_text = _(EMPTY_TABLE_TEXT)
+        fields = (
+            'index', 'test', 'time', 'level', 'object', 'message',
+        )
+        default_columns = (
+            'index', 'test', 'time', 'level', 'object', 'message',
+        )
+
+    def render_object(self, value, record):
+        if url := record.object_url:
+            return format_html("<a href='{}'>{}</a>", url, value)
+        return value
+
+
 class ScriptJobTable(JobTable):
     id = tables.TemplateColumn(
         template_code="""<a href="{% url 'extras:script_result' job_pk=record.pk %}">{{ record.id }}</a>""",
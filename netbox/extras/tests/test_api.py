@@ -1,19 +1,27 @@
 import datetime
+import tempfile
+import uuid
+from unittest.mock import patch
 
+import django_rq
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import storages
+from django.test import override_settings
 from django.urls import reverse
 from django.utils.timezone import make_aware, now
 from rest_framework import status
+from rq.job import Job as RQ_Job
 
-from core.choices import ManagedFileRootPathChoices
+from core.choices import JobStatusChoices, ManagedFileRootPathChoices
 from core.events import *
-from core.models import ObjectType
+from core.models import Job, ObjectType
 from dcim.models import Device, DeviceRole, DeviceType, Manufacturer, Rack, Location, RackRole, Site
 from extras.choices import *
 from extras.models import *
 from extras.scripts import BooleanVar, IntegerVar, Script as PythonClass, StringVar
-from users.models import Group, User
-from utilities.testing import APITestCase, APIViewTestCases
+from users.models import Group, Token, User
+from utilities.testing import APITestCase, APIViewTestCases, create_test_device
 
 
 class AppTest(APITestCase):
@@ -510,6 +518,63 @@ class ExportTemplateTest(APIViewTestCases.APIViewTestCase):
         for et in export_templates:
             et.object_types.set([device_object_type])
 
+    def test_render_export_template(self):
+        for i in range(1, 4):
+            create_test_device(f'Device {i}')
+        self.add_permissions('dcim.view_device')
+        url = reverse('dcim-api:device-list')
+
+        response = self.client.get(f'{url}?export=Export Template 2&ordering=name', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="export_template_2.test"')
+        self.assertEqual(response.content, b'Device 1\nDevice 2\nDevice 3\n')
+
+        # Output beyond the buffer size is streamed
+        with patch('extras.models.mixins.RENDER_STREAM_BUFFER_SIZE', 1):
+            response = self.client.get(f'{url}?export=Export Template 2&ordering=name', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), b'Device 1\nDevice 2\nDevice 3\n')
+
+    def test_render_export_template_background(self):
+        for i in range(1, 4):
+            create_test_device(f'Device {i}')
+        self.add_permissions('dcim.view_device')
+        url = reverse('dcim-api:device-list')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(f'{url}?export=Export Template 2&name=Device 2&background=true', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Export Template')
+        self.assertEqual(response.data['status']['value'], 'pending')
+
+        # Execute the enqueued job
+        job = Job.objects.get(pk=response.data['id'])
+        with tempfile.TemporaryDirectory() as job_files_root, override_settings(STORAGES={
+            **settings.STORAGES,
+            'job_files': {'BACKEND': 'extras.storage.JobFileSystemStorage', 'OPTIONS': {'location': job_files_root}},
+        }):
+            RQ_Job.fetch(str(job.job_id), connection=django_rq.get_connection()).perform()
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+            self.assertEqual(job.data['size'], 9)
+            with storages['job_files'].open(job.data['file']) as f:
+                self.assertEqual(f.read(), b'Device 2\n')
+
+            # The file may be downloaded only by the user who requested it
+            response = self.client.get(job.data['url'], **self.header)
+            self.assertHttpStatus(response, status.HTTP_200_OK)
+            self.assertEqual(b''.join(response.streaming_content), b'Device 2\n')
+            other_token = Token.objects.create(user=User.objects.create_user(username='otheruser'))
+            response = self.client.get(job.data['url'], HTTP_AUTHORIZATION=f'Token {other_token.key}')
+            self.assertHttpStatus(response, status.HTTP_404_NOT_FOUND)
+
+            # Deleting the job deletes the saved file
+            with self.captureOnCommitCallbacks(execute=True):
+                job.delete()
+            self.assertFalse(storages['job_files'].exists(job.data['file']))
+
 
 class TagTest(APIViewTestCases.APIViewTestCase):
     model = Tag
@@ -983,6 +1048,55 @@ class ScriptTest(APITestCase):
             self.TestScriptClass.Meta.scheduling_enabled = original
 
 
+class ScriptLogEntryTest(
+    APIViewTestCases.GetObjectViewTestCase,
+    APIViewTestCases.ListObjectsViewTestCase
+):
+    model = ScriptLogEntry
+    brief_fields = ['display', 'id', 'index', 'job', 'level', 'message', 'url']
+
+    @classmethod
+    def setUpTestData(cls):
+        jobs = (
+            Job.objects.create(name='Job 1', job_id=uuid.uuid4()),
+            Job.objects.create(name='Job 2', job_id=uuid.uuid4()),
+        )
+        child_job = Job.objects.create(name='Job 3', job_id=uuid.uuid4(), parent=jobs[0])
+        site = Site.objects.create(name='Site 1', slug='site-1')
+
+        ScriptLogEntry.objects.bulk_create((
+            ScriptLogEntry(job=jobs[0], index=1, time=now(), level=LogLevelChoices.LOG_INFO, message='Message 1'),
+            ScriptLogEntry(
+                job=jobs[0],
+                index=2,
+                time=now(),
+                level=LogLevelChoices.LOG_FAILURE,
+                object_type=ContentType.objects.get_for_model(Site),
+                object_id=site.pk,
+                object_repr=str(site),
+                message='Message 2'
+            ),
+            ScriptLogEntry(job=jobs[1], index=1, time=now(), level=LogLevelChoices.LOG_INFO, message='Message 3'),
+            ScriptLogEntry(job=child_job, index=1, time=now(), level=LogLevelChoices.LOG_INFO, message='Message 4'),
+        ))
+
+    def test_list_job_entries(self):
+        """
+        Test that filtering by job includes the entries logged by any of its child jobs.
+        """
+        self.add_permissions('extras.view_scriptlogentry')
+        job = Job.objects.get(name='Job 1')
+        url = reverse('extras-api:scriptlogentry-list')
+
+        response = self.client.get(f'{url}?job_id={job.pk}', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(
+            [entry['message'] for entry in response.data['results']],
+            ['Message 1', 'Message 2', 'Message 4']
+        )
+        self.assertEqual(response.data['results'][1]['object_url'], f'/dcim/sites/{Site.objects.first().pk}/')
+
+
 class CreatedUpdatedFilterTest(APITestCase):
 
     @classmethod
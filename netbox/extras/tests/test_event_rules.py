@@ -1,12 +1,17 @@
 import json
+import threading
 import uuid
+from http.client import HTTPMessage
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import django_rq
+from django.core.cache import cache
 from django.http import HttpResponse
-from django.test import RequestFactory
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
-from requests import Session
+from requests import Request, Session
+from requests.cookies import extract_cookies_to_jar
 from rest_framework import status
 
 from core.events import *
@@ -14,11 +19,11 @@ from core.models import ObjectType
 from dcim.choices import SiteStatusChoices
 from dcim.models import Site
 from extras.choices import EventRuleActionChoices
-from extras.events import enqueue_event, flush_events, serialize_for_event
+from extras.events import EVENT_RULES_CACHE_KEY, enqueue_event, flush_events, get_event_rules, serialize_for_event
 from extras.models import EventRule, Tag, Webhook
-from extras.webhooks import generate_signature, send_webhook
+from extras.webhooks import WebhookWorker, generate_signature, get_session, send_webhook, send_webhook_batch
 from netbox.context_managers import event_tracking
-from utilities.testing import APITestCase
+from utilities.testing import APITestCase, disable_logging
 
 
 class EventRuleTest(APITestCase):
@@ -395,6 +400,97 @@ class EventRuleTest(APITestCase):
         with patch.object(Session, 'send', dummy_send):
             send_webhook(**job.kwargs)
 
+    def test_send_webhook_batch(self):
+        webhook = Webhook.objects.get(name='Webhook 1')
+        webhook.batch_size = 2
+        webhook.save()
+
+        # Create multiple objects via the REST API
+        data = [
+            {'name': f'Site {i}', 'slug': f'site-{i}'} for i in range(1, 4)
+        ]
+        url = reverse('dcim-api:site-list')
+        self.add_permissions('dcim.add_site')
+        response = self.client.post(url, data, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+
+        # Verify that the events were queued in batches
+        self.assertEqual(self.queue.count, 2)
+        jobs = self.queue.jobs
+        self.assertEqual([job.func_name for job in jobs], ['extras.webhooks.send_webhook_batch'] * 2)
+        self.assertEqual([len(job.kwargs['events']) for job in jobs], [2, 1])
+        for i, event in enumerate([*jobs[0].kwargs['events'], *jobs[1].kwargs['events']]):
+            self.assertEqual(event['event_type'], OBJECT_CREATED)
+            self.assertEqual(event['data']['id'], response.data[i]['id'])
+            self.assertEqual(event['data']['foo'], 1)
+
+        def dummy_send(_, request, **kwargs):
+            # Validate the outgoing request headers
+            self.assertEqual(request.headers['Content-Type'], webhook.http_content_type)
+            self.assertEqual(request.headers['X-Hook-Signature'], generate_signature(request.body, webhook.secret))
+            self.assertEqual(request.headers['X-Foo'], 'Bar')
+
+            # Validate the outgoing request body
+            body = json.loads(request.body)
+            self.assertEqual(len(body), 2)
+            for i, event in enumerate(body):
+                self.assertEqual(event['event'], 'created')
+                self.assertEqual(event['model'], 'site')
+                self.assertEqual(event['username'], 'testuser')
+                self.assertEqual(event['data']['name'], f'Site {i + 1}')
+                self.assertEqual(event['context']['foo'], 123)  # From netbox.tests.dummy_plugin
+
+            return HttpResponse()
+
+        with patch.object(Session, 'send', dummy_send):
+            send_webhook_batch(**jobs[0].kwargs)
+
+    def test_session_stores_no_cookies(self):
+        webhook = Webhook.objects.get(name='Webhook 1')
+        session = get_session(webhook.payload_url, webhook)
+        self.assertIs(get_session(webhook.payload_url, webhook), session)
+
+        # A cookie set by one receiver must not be sent along with later deliveries sharing the same session
+        request = Request('POST', webhook.payload_url).prepare()
+        headers = HTTPMessage()
+        headers['Set-Cookie'] = 'sessionid=abc123; Path=/'
+        response = SimpleNamespace(_original_response=SimpleNamespace(msg=headers))
+        extract_cookies_to_jar(session.cookies, request, response)
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_webhook_worker(self):
+        event_rule = EventRule.objects.get(name='Event Rule 1')
+        object_type = ObjectType.objects.get_for_model(Site)
+        deliveries = []
+
+        def dummy_send_webhook(event_rule, data, **kwargs):
+            deliveries.append((threading.current_thread().name, data['id']))
+            if data['id'] == 3:
+                raise ConnectionError("Delivery failed")
+
+        jobs = [
+            self.queue.enqueue(
+                'extras.webhooks.send_webhook',
+                event_rule=event_rule,
+                object_type=object_type,
+                event_type=OBJECT_CREATED,
+                data={'id': i},
+                timestamp='',
+                username=None
+            ) for i in range(1, 6)
+        ]
+        worker = WebhookWorker([self.queue], connection=self.queue.connection)
+        with patch('extras.webhooks.send_webhook', dummy_send_webhook), disable_logging():
+            worker.work(burst=True)
+
+        # All jobs for the same receiver should have been delivered in order by a single pool thread
+        self.assertEqual([object_id for _, object_id in deliveries], [1, 2, 3, 4, 5])
+        self.assertEqual(len({thread for thread, _ in deliveries}), 1)
+        self.assertTrue(deliveries[0][0].startswith('webhook'))
+        for job in jobs:
+            job.refresh()
+            self.assertEqual(job.get_status(), 'failed' if job.kwargs['data']['id'] == 3 else 'finished')
+
     def test_duplicate_triggers(self):
         """
         Test for erroneous duplicate event triggers resulting from saving an object multiple times
@@ -438,3 +534,76 @@ class EventRuleTest(APITestCase):
         job = self.queue.get_jobs()[0]
         self.assertEqual(job.kwargs['event_type'], OBJECT_DELETED)
         self.queue.empty()
+
+    def test_get_event_rules(self):
+        """
+        Test that enabled EventRules are mapped to each of their object types and event types.
+        """
+        site_type = ObjectType.objects.get_for_model(Site)
+        EventRule.objects.filter(name='Event Rule 3').update(enabled=False)
+
+        event_rules = get_event_rules()
+        self.assertEqual(
+            [rule.name for rule in event_rules[(site_type.pk, OBJECT_CREATED)]],
+            ['Event Rule 1']
+        )
+        self.assertEqual(
+            [rule.name for rule in event_rules[(site_type.pk, OBJECT_UPDATED)]],
+            ['Event Rule 2']
+        )
+        self.assertNotIn((site_type.pk, OBJECT_DELETED), event_rules)
+
+    def test_invalidate_event_rules(self):
+        """
+        Test that cached EventRules are invalidated when an EventRule is saved.
+        """
+        get_event_rules()
+        version = cache.get(EVENT_RULES_CACHE_KEY)
+        self.assertIsNotNone(version)
+
+        event_rule = EventRule.objects.get(name='Event Rule 1')
+        with self.captureOnCommitCallbacks(execute=True):
+            event_rule.save()
+        self.assertNotEqual(cache.get(EVENT_RULES_CACHE_KEY), version)
+
+    def test_compiled_conditions(self):
+        """
+        Test that an EventRule's conditions are compiled only once, unless they are reassigned.
+        """
+        event_rule = EventRule(
+            name='Event Rule 4',
+            event_types=[OBJECT_CREATED],
+            conditions={'attr': 'status.value', 'value': 'active'}
+        )
+        condition_set = event_rule.get_condition_set()
+        self.assertIs(event_rule.get_condition_set(), condition_set)
+        self.assertTrue(event_rule.eval_conditions({'status': {'value': 'active'}}))
+
+        event_rule.conditions = {'attr': 'status.value', 'value': 'planned'}
+        self.assertIsNot(event_rule.get_condition_set(), condition_set)
+        self.assertFalse(event_rule.eval_conditions({'status': {'value': 'active'}}))
+
+    @override_settings(EVENTS_PIPELINE=['extras.events.process_event_queue'])
+    def test_skip_serialization_without_event_rules(self):
+        """
+        Test that queued events to which no EventRule applies are discarded without being serialized.
+        """
+        request = RequestFactory().get(reverse('dcim:site_add'))
+        request.id = uuid.uuid4()
+        request.user = self.user
+
+        # Event Rule 3 (object deleted) is disabled
+        EventRule.objects.filter(name='Event Rule 3').update(enabled=False)
+        site = Site.objects.create(name='Site 1', slug='site-1')
+
+        with patch('extras.events.serialize_for_event', wraps=serialize_for_event) as mock_serialize:
+            with event_tracking(request):
+                site.delete()
+            mock_serialize.assert_not_called()
+        self.assertEqual(self.queue.count, 0)
+
+        with patch('extras.events.serialize_for_event', wraps=serialize_for_event) as mock_serialize:
+            with event_tracking(request):
+                Site.objects.create(name='Site 2', slug='site-2')
+            mock_serialize.assert_called_once()
+        self.assertEqual(self.queue.count, 1)
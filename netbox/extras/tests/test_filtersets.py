@@ -7,7 +7,7 @@ from django.test import TestCase
 from circuits.models import Provider
 from core.choices import ManagedFileRootPathChoices, ObjectChangeActionChoices
 from core.events import *
-from core.models import ObjectChange, ObjectType
+from core.models import Job, ObjectChange, ObjectType
 from dcim.filtersets import SiteFilterSet
 from dcim.models import DeviceRole, DeviceType, Manufacturer, Platform, Rack, Region, Site, SiteGroup
 from dcim.models import Location
@@ -1440,6 +1440,98 @@ class TaggedItemFilterSetTestCase(TestCase):
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
 
 
+class ScriptLogEntryTestCase(TestCase, BaseFilterSetTests):
+    queryset = ScriptLogEntry.objects.all()
+    filterset = ScriptLogEntryFilterSet
+    ignore_fields = ('message',)
+
+    @classmethod
+    def setUpTestData(cls):
+        jobs = (
+            Job.objects.create(name='Job 1', job_id=uuid.uuid4()),
+            Job.objects.create(name='Job 2', job_id=uuid.uuid4()),
+        )
+        child_job = Job.objects.create(name='Job 3', job_id=uuid.uuid4(), parent=jobs[0])
+        site = Site.objects.create(name='Site 1', slug='site-1')
+        site_type = ContentType.objects.get_for_model(Site)
+        time = datetime(2025, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+        ScriptLogEntry.objects.bulk_create((
+            ScriptLogEntry(
+                job=jobs[0],
+                index=1,
+                time=time,
+                level=LogLevelChoices.LOG_INFO,
+                test='test_foo',
+                message='Message 1'
+            ),
+            ScriptLogEntry(
+                job=jobs[0],
+                index=2,
+                time=time,
+                level=LogLevelChoices.LOG_WARNING,
+                test='test_foo',
+                object_type=site_type,
+                object_id=site.pk,
+                object_repr='Site 1',
+                message='Message 2'
+            ),
+            ScriptLogEntry(
+                job=jobs[1],
+                index=1,
+                time=time,
+                level=LogLevelChoices.LOG_FAILURE,
+                test='test_bar',
+                object_type=site_type,
+                object_id=site.pk,
+                object_repr='Site 1',
+                message='Message 3'
+            ),
+            ScriptLogEntry(
+                job=child_job,
+                index=1,
+                time=time,
+                level=LogLevelChoices.LOG_INFO,
+                message='Message 4'
+            ),
+        ))
+
+    def test_q(self):
+        params = {'q': 'message 1'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+        params = {'q': 'site 1'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+    def test_job(self):
+        # Entries logged by child jobs are included
+        params = {'job_id': [Job.objects.get(name='Job 1').pk]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 3)
+        params = {'job_id': [Job.objects.get(name='Job 2').pk]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+    def test_index(self):
+        params = {'index': [2]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 1)
+
+    def test_level(self):
+        params = {'level': [LogLevelChoices.LOG_WARNING, LogLevelChoices.LOG_FAILURE]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+    def test_test(self):
+        params = {'test': ['test_foo']}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+    def test_object_type(self):
+        params = {'object_type': 'dcim.site'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+        params = {'object_type_id': [ContentType.objects.get_for_model(Site).pk]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+    def test_object_repr(self):
+        params = {'object_repr': ['Site 1']}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+
+
 class ChangeLoggedFilterSetTestCase(TestCase):
     """
     Evaluate base ChangeLoggedFilterSet filters using the Site model.
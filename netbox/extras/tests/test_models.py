@@ -1,14 +1,20 @@
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.forms import ValidationError
-from django.test import tag, TestCase
+from django.test import override_settings, tag, TestCase
+from django.test.utils import CaptureQueriesContext
 
 from core.models import DataSource, ObjectType
 from dcim.models import Device, DeviceRole, DeviceType, Location, Manufacturer, Platform, Region, Site, SiteGroup
-from extras.models import ConfigContext, ConfigContextProfile, ConfigTemplate, ImageAttachment, Tag, TaggedItem
+from extras.configcontexts import ConfigContextIndex
+from extras.models import (
+    ConfigContext, ConfigContextProfile, ConfigTemplate, ExportTemplate, ImageAttachment, Tag,
+)
 from tenancy.models import Tenant, TenantGroup
 from utilities.exceptions import AbortRequest
 from virtualization.models import Cluster, ClusterGroup, ClusterType, VirtualMachine
@@ -656,41 +662,197 @@ class ConfigContextTest(TestCase):
         Regression test for issue #20327: Ensure config context annotation
         doesn't use expensive DISTINCT on main query.
 
-        Verifies that DISTINCT is only used in tag subquery where needed,
-        not on the main device query which is expensive for large datasets.
+        The applicable config contexts are resolved in memory, using a fixed
+        number of queries regardless of the number of objects.
         """
         device = Device.objects.first()
         queryset = Device.objects.filter(pk=device.pk).annotate_config_context_data()
 
-        # Main device query should NOT use DISTINCT
+        # Main device query should NOT use DISTINCT, nor a config context subquery
         self.assertFalse(queryset.query.distinct)
+        self.assertNotIn('config_context_data', queryset.query.annotations)
 
-        # Check that tag subqueries DO use DISTINCT by inspecting the annotation
-        config_annotation = queryset.query.annotations.get('config_context_data')
-        self.assertIsNotNone(config_annotation)
+        region = Region.objects.create(name='Region 2', slug='region-2', parent=device.site.region)
+        tag1, tag2 = list(Tag.objects.all())
+        ConfigContext.objects.create(name='context 1', data={'a': 1}).regions.add(region)
+        ConfigContext.objects.create(name='context 2', data={'b': 2}).tags.add(tag1)
+        for i in range(2, 5):
+            Device.objects.create(
+                name=f'Device {i}',
+                device_type=device.device_type,
+                role=device.role,
+                site=device.site,
+            ).tags.add(tag1, tag2)
+
+        with CaptureQueriesContext(connection) as single_object_queries:
+            list(queryset)
+        with CaptureQueriesContext(connection) as multiple_object_queries:
+            self.assertEqual(len(Device.objects.annotate_config_context_data()), 4)
+        self.assertEqual(len(single_object_queries), len(multiple_object_queries))
+
+    def test_config_context_index(self):
+        device = Device.objects.first()
+        region1 = device.site.region
+        region2 = Region.objects.create(name='Region 2', slug='region-2', parent=region1)
+        region3 = Region.objects.create(name='Region 3', slug='region-3', parent=region2)
+        site = Site.objects.create(name='Site 2', slug='site-2', region=region3)
+        tag1, tag2 = list(Tag.objects.all())
 
-        def find_tag_subqueries(where_node):
-            """Find subqueries in WHERE clause that relate to tag filtering"""
-            subqueries = []
+        context1 = ConfigContext.objects.create(name='context 1', weight=300, data={})
+        context1.regions.add(region2)
+        context2 = ConfigContext.objects.create(name='context 2', weight=200, data={})
+        context2.regions.add(region1)
+        context2.tags.add(tag1, tag2)
+        context3 = ConfigContext.objects.create(name='context 3', weight=100, data={})
+        context4 = ConfigContext.objects.create(name='context 4', weight=100, data={}, is_active=False)
+        context4.regions.add(region2)
 
-            def traverse(node):
-                if hasattr(node, 'children'):
-                    for child in node.children:
-                        try:
-                            if child.rhs.query.model is TaggedItem:
-                                subqueries.append(child.rhs.query)
-                        except AttributeError:
-                            traverse(child)
-            traverse(where_node)
-            return subqueries
+        index = ConfigContextIndex.build()
 
-        # Find subqueries in the WHERE clause that should have DISTINCT
-        tag_subqueries = find_tag_subqueries(config_annotation.query.where)
-        distinct_subqueries = [sq for sq in tag_subqueries if sq.distinct]
+        # Assignment to a region applies to all of its descendants
+        self.assertEqual(index.get_context_ids({'regions': [region1.pk]}), [context3.pk])
+        self.assertEqual(index.get_context_ids({'regions': [region3.pk]}), [context3.pk, context1.pk])
 
-        # Verify we found at least one DISTINCT subquery for tags
-        self.assertEqual(len(distinct_subqueries), 1)
-        self.assertTrue(distinct_subqueries[0].distinct)
+        # Every assigned field must match
+        self.assertEqual(
+            index.get_context_ids({'regions': [region3.pk], 'tags': [tag2.pk]}),
+            [context3.pk, context2.pk, context1.pk]
+        )
+        self.assertEqual(index.get_context_ids({'tags': [tag1.pk, tag2.pk]}), [context3.pk])
+
+        # Resolve the config contexts for multiple objects at once
+        device2 = Device.objects.create(
+            name='Device 2',
+            device_type=device.device_type,
+            role=device.role,
+            site=site,
+        )
+        device2.tags.add(tag1)
+        self.assertEqual(
+            Device.objects.filter(pk__in=(device.pk, device2.pk)).get_config_context_ids(index),
+            {
+                device.pk: [context3.pk],
+                device2.pk: [context3.pk, context2.pk, context1.pk],
+            }
+        )
+
+    @override_settings(CONFIG_CONTEXT_CACHE_ENABLED=True)
+    def test_cached_config_context(self):
+        device = Device.objects.first()
+        region = Region.objects.create(name='Region 2', slug='region-2')
+        tag = Tag.objects.get(slug='tag')
+
+        def get_cached_context():
+            return Device.objects.get(pk=device.pk)._config_context
+
+        # Create a ConfigContext applicable to all devices
+        context1 = ConfigContext.objects.create(name='context 1', weight=100, data={'a': 1})
+        self.assertEqual(get_cached_context(), {'a': 1})
+
+        # Assign the ConfigContext to a region other than the device's
+        context1.regions.add(region)
+        self.assertEqual(get_cached_context(), {})
+
+        # Move the device's site into the assigned region
+        site = device.site
+        site.region = region
+        site.save()
+        self.assertEqual(get_cached_context(), {'a': 1})
+
+        # Create a ConfigContext applicable to tagged devices, and tag the device
+        context2 = ConfigContext.objects.create(name='context 2', weight=200, data={'a': 2, 'b': 2})
+        context2.tags.add(tag)
+        self.assertEqual(get_cached_context(), {'a': 1})
+        device.tags.add(tag)
+        self.assertEqual(get_cached_context(), {'a': 2, 'b': 2})
+
+        # Modify the ConfigContext's data
+        context2.data = {'b': 3}
+        context2.save()
+        self.assertEqual(get_cached_context(), {'a': 1, 'b': 3})
+
+        # Delete a ConfigContext
+        context1.delete()
+        self.assertEqual(get_cached_context(), {'b': 3})
+
+        # Set local context data on the device
+        device.local_context_data = {'c': 4}
+        device.save()
+        self.assertEqual(get_cached_context(), {'b': 3, 'c': 4})
+
+        # The cached config context is used without querying ConfigContexts
+        device = Device.objects.get(pk=device.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(device.get_config_context(), {'b': 3, 'c': 4})
+        self.assertEqual(
+            Device.objects.filter(pk=device.pk).annotate_config_context_data().first().config_context_data,
+            None
+        )
+
+    @override_settings(CONFIG_CONTEXT_CACHE_ENABLED=True)
+    def test_cached_config_context_related_object_deleted(self):
+        device = Device.objects.first()
+        platform = Platform.objects.get(name='Platform')
+        tenantgroup = TenantGroup.objects.get(name='Tenant Group')
+        tag = Tag.objects.get(slug='tag')
+
+        def get_cached_context():
+            return Device.objects.get(pk=device.pk)._config_context
+
+        # Assign each ConfigContext to a second object as well, so that it remains restricted once the first is deleted
+        context1 = ConfigContext.objects.create(name='context 1', data={'platform': True})
+        context1.platforms.add(platform, Platform.objects.create(name='Platform 2', slug='platform-2'))
+        context2 = ConfigContext.objects.create(name='context 2', data={'tenant_group': True})
+        context2.tenant_groups.add(tenantgroup, TenantGroup.objects.create(name='Tenant Group 2', slug='tenantgroup-2'))
+        context3 = ConfigContext.objects.create(name='context 3', data={'tag': True})
+        context3.tags.add(tag, Tag.objects.get(slug='tag2'))
+
+        device.platform = platform
+        device.tenant = Tenant.objects.get(name='Tenant')
+        device.save()
+        device.tags.add(tag)
+        self.assertEqual(get_cached_context(), {'platform': True, 'tenant_group': True, 'tag': True})
+
+        # Deleting a Platform removes it from its devices without saving them
+        platform.delete()
+        self.assertEqual(get_cached_context(), {'tenant_group': True, 'tag': True})
+
+        # Deleting a TenantGroup removes it from its tenants
+        tenantgroup.delete()
+        self.assertEqual(get_cached_context(), {'tag': True})
+
+        # Deleting a Tag removes it from all tagged objects
+        tag.delete()
+        self.assertEqual(get_cached_context(), {})
+
+    @override_settings(CONFIG_CONTEXT_CACHE_ENABLED=True)
+    def test_cached_config_context_fingerprint(self):
+        device1 = Device.objects.first()
+        device2 = Device.objects.create(
+            name='Device 2',
+            device_type=device1.device_type,
+            role=device1.role,
+            site=device1.site
+        )
+        device3 = Device.objects.create(
+            name='Device 3',
+            device_type=device1.device_type,
+            role=device1.role,
+            site=device1.site,
+            local_context_data={'b': 2}
+        )
+        ConfigContext.objects.create(name='context 1', data={'a': 1})
+
+        devices = Device.objects.filter(pk__in=(device1.pk, device2.pk, device3.pk)).order_by('pk')
+        self.assertEqual(
+            [device._config_context for device in devices],
+            [{'a': 1}, {'a': 1}, {'a': 1, 'b': 2}]
+        )
+
+        # Devices to which the same data applies share a fingerprint
+        device1, device2, device3 = devices
+        self.assertEqual(device1._config_context_fingerprint, device2._config_context_fingerprint)
+        self.assertNotEqual(device1._config_context_fingerprint, device3._config_context_fingerprint)
 
 
 class ConfigTemplateTest(TestCase):
@@ -754,3 +916,34 @@ class ConfigTemplateTest(TestCase):
     @tag('regression')
     def test_config_template_with_data_source_nested_templates(self):
         self.assertEqual(self.BASE_TEMPLATE, self.main_config_template.render({}))
+
+
+class ExportTemplateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Site.objects.bulk_create([
+            Site(name=f'Site {i}', slug=f'site-{i}') for i in range(1, 6)
+        ])
+
+    def test_render_stream(self):
+        export_template = ExportTemplate(
+            name='Export Template 1',
+            template_code=(
+                '{% for site in queryset %}{{ site.name }}{{ "\\r" }}{{ "\\n" }}{% endfor %}{{ queryset|length }}'
+            )
+        )
+        queryset = Site.objects.order_by('name')
+        output = export_template.render(queryset=queryset)
+        self.assertEqual(output, 'Site 1\nSite 2\nSite 3\nSite 4\nSite 5\n5')
+
+        # CRLF line terminators are replaced even when split between chunks
+        with patch('extras.models.mixins.RENDER_STREAM_CHUNK_SIZE', 1):
+            chunks = list(export_template.render_stream(queryset=queryset))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), output)
+
+        # Streamed objects are not cached on the QuerySet
+        queryset = Site.objects.order_by('name')
+        self.assertEqual(''.join(export_template.render_stream(queryset=queryset)), output)
+        self.assertIsNone(queryset._result_cache)
@@ -1,13 +1,24 @@
 import logging
 import tempfile
+import uuid
 from datetime import date, datetime, timezone
 from decimal import Decimal
+from unittest.mock import patch
 
+import django_rq
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from netaddr import IPAddress, IPNetwork
+from rq.job import Job as RQ_Job
 
+from core.choices import JobStatusChoices, ManagedFileRootPathChoices
+from core.jobs import SystemHousekeepingJob
+from core.models import Job
 from dcim.models import DeviceRole
+from extras.choices import LogLevelChoices
+from extras.jobs import ScriptJob
+from extras.models import Script as ScriptModel, ScriptLogEntry, ScriptModule
+from extras.scriptlog import ScriptLog
 from extras.scripts import *
 from utilities.testing import disable_logging
 
@@ -64,6 +75,182 @@ class ScriptTest(TestCase):
         })
 
 
+class ScriptLogTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = Job.objects.create(name='Job 1', job_id=uuid.uuid4())
+
+    def test_retention(self):
+        script_log = ScriptLog(retention={LogLevelChoices.LOG_DEBUG: 2})
+        for i in range(5):
+            script_log.append(LogLevelChoices.LOG_DEBUG, f'Debug {i}')
+            script_log.append(LogLevelChoices.LOG_INFO, f'Info {i}')
+
+        self.assertEqual(len(script_log), 7)
+        self.assertEqual(script_log.counts[LogLevelChoices.LOG_DEBUG], 5)
+        self.assertEqual(script_log.discarded, {LogLevelChoices.LOG_DEBUG: 3})
+        self.assertEqual(
+            [record['message'] for record in script_log if record['level'] == LogLevelChoices.LOG_DEBUG],
+            ['Debug 0', 'Debug 1']
+        )
+
+    @patch('extras.scriptlog.SCRIPT_LOG_BATCH_SIZE', 3)
+    def test_save(self):
+        role = DeviceRole.objects.create(name='Device Role 1', slug='device-role-1')
+        script_log = ScriptLog()
+        for i in range(10):
+            script_log.append(LogLevelChoices.LOG_INFO, f'Message {i}', obj=role if i == 0 else None)
+
+        # Records beyond the batch size are spilled to a temporary file
+        self.assertEqual(len(script_log._buffer), 1)
+        self.assertEqual(len(script_log), 10)
+
+        script_log.save(self.job)
+        entries = ScriptLogEntry.objects.filter(job=self.job)
+        self.assertEqual(list(entries.values_list('index', flat=True)), list(range(1, 11)))
+        self.assertEqual(list(entries.values_list('message', flat=True)), [f'Message {i}' for i in range(10)])
+        self.assertEqual(entries[0].object_repr, str(role))
+        self.assertEqual(entries[0].object_url, role.get_absolute_url())
+        self.assertIsNone(entries[1].object_url)
+
+        # Saving again replaces any existing entries
+        script_log.append(LogLevelChoices.LOG_WARNING, 'Warning')
+        script_log.save(self.job)
+        self.assertEqual(list(entries.values_list('message', flat=True)), ['Warning'])
+
+    def test_job_deleted(self):
+        script_log = ScriptLog()
+        script_log.append(LogLevelChoices.LOG_INFO, 'Message')
+        script_log.save(self.job)
+        self.assertEqual(ScriptLogEntry.objects.count(), 1)
+
+        self.job.delete()
+        self.assertFalse(ScriptLogEntry.objects.exists())
+
+    def test_script_job_data(self):
+        script = Script()
+        script.log_info('Info')
+        script.log_debug('Debug')
+        script.log_info()
+
+        self.assertEqual(len(script.script_log), 2)
+        self.assertEqual(script.get_job_data()['log_counts'], {
+            LogLevelChoices.LOG_INFO: 1,
+            LogLevelChoices.LOG_DEBUG: 1,
+        })
+
+
+class ScriptShardTest(TestCase):
+
+    class ShardedScript(Script):
+        class Meta:
+            shard_size = 2
+
+        def partition(self, data):
+            return DeviceRole.objects.order_by('name')
+
+        def run(self, data, commit):
+            for role in self.shard:
+                role.description = 'Audited'
+                role.save()
+                self.log_info('Audited', role)
+                if role.name == 'Device Role 5':
+                    raise Exception('Audit failed')
+            return f'Audited {len(self.shard)} roles'
+
+    @classmethod
+    def setUpTestData(cls):
+        module = ScriptModule.objects.create(
+            file_root=ManagedFileRootPathChoices.SCRIPTS,
+            file_path='script.py',
+        )
+        cls.script = ScriptModel.objects.create(module=module, name='Sharded script', is_executable=True)
+        for i in range(1, 6):
+            DeviceRole.objects.create(name=f'Device Role {i}', slug=f'device-role-{i}')
+
+    @patch.object(ScriptModel, 'python_class', ShardedScript)
+    def test_sharded_script(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = ScriptJob.enqueue(instance=self.script, immediate=True, data={}, request=None, commit=True)
+
+        # The input is divided among child jobs, and the parent remains running until all have completed
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_RUNNING)
+        shards = list(job.children.order_by('pk'))
+        self.assertEqual([shard.name for shard in shards], [f'{job.name} ({i}/3)' for i in range(1, 4)])
+
+        with disable_logging():
+            for shard in shards:
+                RQ_Job.fetch(str(shard.job_id), connection=django_rq.get_connection()).perform()
+                shard.refresh_from_db()
+        self.assertEqual([shard.status for shard in shards], [
+            JobStatusChoices.STATUS_COMPLETED,
+            JobStatusChoices.STATUS_COMPLETED,
+            JobStatusChoices.STATUS_ERRORED,
+        ])
+
+        # Changes are committed or rolled back for each shard independently
+        self.assertEqual(
+            list(DeviceRole.objects.filter(description='Audited').values_list('name', flat=True).order_by('name')),
+            [f'Device Role {i}' for i in range(1, 5)]
+        )
+
+        # The results of all shards are combined in the parent job
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_ERRORED)
+        self.assertEqual(job.error, '1 of 3 shards errored')
+        self.assertEqual(job.data['output'], 'Audited 2 roles\nAudited 2 roles')
+        self.assertEqual(job.data['log_counts'][LogLevelChoices.LOG_INFO], 6)
+        self.assertEqual(job.data['log_counts'][LogLevelChoices.LOG_FAILURE], 1)
+        self.assertEqual(
+            ScriptLogEntry.objects.filter(job__parent=job, message='Audited').count(),
+            5
+        )
+
+    @patch.object(ScriptModel, 'python_class', ShardedScript)
+    def test_lost_shards(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = ScriptJob.enqueue(instance=self.script, immediate=True, data={}, request=None, commit=True)
+        shard1, shard2, shard3 = job.children.order_by('pk')
+
+        # A shard which has been deleted before completing is reported once the remaining shards have completed
+        shard1.delete()
+        with disable_logging():
+            RQ_Job.fetch(str(shard2.job_id), connection=django_rq.get_connection()).perform()
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_RUNNING)
+
+        # A shard which has been lost by the task queue is terminated by the housekeeping job
+        RQ_Job.fetch(str(shard3.job_id), connection=django_rq.get_connection()).delete()
+        with disable_logging():
+            SystemHousekeepingJob(Job(name='System Housekeeping')).terminate_lost_jobs()
+        shard3.refresh_from_db()
+        self.assertEqual(shard3.status, JobStatusChoices.STATUS_ERRORED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_ERRORED)
+        self.assertEqual(job.error, f'Shard {shard1.name} was deleted before completing')
+        self.assertEqual(job.data['output'], 'Audited 2 roles')
+
+    def test_sliced_queryset_rejected(self):
+
+        class SlicedScript(self.ShardedScript):
+            def partition(self, data):
+                return DeviceRole.objects.order_by('name')[:4]
+
+        with patch.object(ScriptModel, 'python_class', SlicedScript):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = ScriptJob.enqueue(instance=self.script, immediate=True, data={}, request=None, commit=True)
+
+        # The script is not executed, nor are any child jobs enqueued
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_ERRORED)
+        self.assertIn('cannot be sliced or combined', job.error)
+        self.assertFalse(job.children.exists())
+        self.assertFalse(DeviceRole.objects.filter(description='Audited').exists())
+
+
 class ScriptVariablesTest(TestCase):
 
     def test_stringvar(self):
@@ -1,8 +1,13 @@
+import uuid
+from unittest.mock import patch
+
 from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse
+from django.utils import timezone
 
+from core.choices import JobStatusChoices
 from core.events import *
-from core.models import ObjectType
+from core.models import Job, ObjectType
 from dcim.models import DeviceType, Manufacturer, Site
 from extras.choices import *
 from extras.models import *
@@ -342,6 +347,35 @@ class ExportTemplateTestCase(ViewTestCases.PrimaryObjectViewTestCase):
             'as_attachment': True,
         }
 
+    def test_render_export_template(self):
+        Site.objects.create(name='Site 1', slug='site-1')
+        self.add_permissions('dcim.view_site')
+        url = reverse('dcim:site_list')
+
+        response = self.client.get(f'{url}?export=Export Template 3')
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="export_template_3"')
+        self.assertEqual(response.content, b'Site 1')
+
+        # Output beyond the buffer size is streamed
+        with patch('extras.models.mixins.RENDER_STREAM_BUFFER_SIZE', 1):
+            response = self.client.get(f'{url}?export=Export Template 3')
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'Site 1')
+
+        # An error raised after the first chunk has been rendered is reported, rather than truncating the output
+        ExportTemplate.objects.filter(name='Export Template 3').update(
+            template_code='{% for object in queryset %}{{ object }}{% endfor %}{{ undefined_function() }}'
+        )
+        with patch('extras.models.mixins.RENDER_STREAM_CHUNK_SIZE', 1):
+            response = self.client.get(f'{url}?export=Export Template 3')
+        self.assertRedirects(response, f'{url}?', fetch_redirect_response=False)
+
+        # Render the export template in the background
+        response = self.client.get(f'{url}?export=Export Template 3&background=true')
+        job = Job.objects.get(name='Export Template', object_id=ExportTemplate.objects.get(name='Export Template 3').pk)
+        self.assertRedirects(response, job.get_absolute_url(), fetch_redirect_response=False)
+
 
 class WebhookTestCase(ViewTestCases.PrimaryObjectViewTestCase):
     model = Webhook
@@ -897,3 +931,38 @@ class ScriptListViewTest(TestCase):
         response = self.client.get(url, {'embedded': 'true'})
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'extras/inc/script_list_content.html')
+
+
+class ScriptResultViewTest(TestCase):
+    user_permissions = ['extras.view_script']
+
+    def test_script_log_paginated(self):
+        job = Job.objects.create(
+            name='Job 1',
+            job_id=uuid.uuid4(),
+            status=JobStatusChoices.STATUS_COMPLETED,
+            completed=timezone.now(),
+            data={
+                'log_counts': {LogLevelChoices.LOG_INFO: 30, LogLevelChoices.LOG_DEBUG: 1},
+                'log_discarded': {},
+                'output': '',
+                'tests': {},
+            }
+        )
+        ScriptLogEntry.objects.bulk_create([
+            ScriptLogEntry(job=job, index=i, time=timezone.now(), level=level, message=f'Message {i}')
+            for i, level in enumerate([LogLevelChoices.LOG_DEBUG] + [LogLevelChoices.LOG_INFO] * 30, start=1)
+        ])
+        url = reverse('extras:script_result', kwargs={'job_pk': job.pk})
+
+        response = self.client.get(url, {'log': 'True', 'per_page': 10}, HTTP_HX_REQUEST='true')
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response.context['table'].paginator.count, 30)
+        self.assertEqual(len(response.context['table'].page.object_list), 10)
+        self.assertNotContains(response, 'Message 1<')
+        self.assertContains(response, 'Message 2')
+
+        response = self.client.get(
+            url, {'log': 'True', 'log_threshold': LogLevelChoices.LOG_DEBUG}, HTTP_HX_REQUEST='true'
+        )
+        self.assertEqual(response.context['table'].paginator.count, 31)
@@ -37,7 +37,7 @@ from virtualization.models import VirtualMachine
 from . import filtersets, forms, tables
 from .constants import LOG_LEVEL_RANK
 from .models import *
-from .tables import ReportResultsTable, ScriptResultsTable, ScriptJobTable
+from .tables import ReportResultsTable, ScriptResultsTable, ScriptJobTable, ScriptLogEntryTable
 
 
 #
@@ -1547,6 +1547,18 @@ class ScriptResultView(TableMixin, generic.ObjectView):
             log_threshold = LOG_LEVEL_RANK[request.GET.get('log_threshold', LogLevelChoices.LOG_INFO)]
         except KeyError:
             log_threshold = LOG_LEVEL_RANK[LogLevelChoices.LOG_INFO]
+
+        # Log entries (including those of any child jobs which executed shards of the script) are retrieved one page
+        # at a time
+        if job.data and 'log_counts' in job.data:
+            levels = [level for level, rank in LOG_LEVEL_RANK.items() if rank >= log_threshold]
+            entries = ScriptLogEntry.objects.filter(Q(job=job) | Q(job__parent=job), level__in=levels)
+            table = ScriptLogEntryTable(entries, user=request.user)
+            table.configure(request)
+            if not job.data.get('tests'):
+                table.columns.hide('test')
+            return table
+
         if job.data:
             if 'log' in job.data:
                 if 'tests' in job.data:
@@ -1623,7 +1635,7 @@ class ScriptResultView(TableMixin, generic.ObjectView):
             'log_threshold': log_threshold,
         }
 
-        if job.data and 'log' in job.data:
+        if job.data and ('log' in job.data or 'log_counts' in job.data):
             # Script
             context['tests'] = job.data.get('tests', {})
         elif job.data:
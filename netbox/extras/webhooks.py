@@ -1,23 +1,77 @@
 import hashlib
 import hmac
+import json
 import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
 
 import requests
+from django.db import close_old_connections
 from django_rq import job
 from jinja2.exceptions import TemplateError
+from rest_framework.utils.encoders import JSONEncoder
+from rq.executions import Execution
+from rq.timeouts import TimerDeathPenalty
+from rq.worker import SimpleWorker, WorkerStatus
 
 from netbox.registry import registry
 from utilities.proxy import resolve_proxies
 from .constants import WEBHOOK_EVENT_TYPES
 
 __all__ = (
+    'DeliveryMetrics',
+    'WebhookWorker',
+    'delivery_metrics',
     'generate_signature',
+    'get_session',
     'register_webhook_callback',
     'send_webhook',
+    'send_webhook_batch',
 )
 
 logger = logging.getLogger('netbox.webhooks')
 
+# Per-thread HTTP sessions, keyed by destination host and TLS verification setting
+_sessions = threading.local()
+
+
+class DeliveryMetrics:
+    """
+    Thread-safe tally of webhook delivery attempts, latency, and outcomes for each endpoint.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, latency, success):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                'deliveries': 0,
+                'succeeded': 0,
+                'failed': 0,
+                'latency_total': 0.0,
+                'latency_max': 0.0,
+            })
+            stats['deliveries'] += 1
+            stats['succeeded' if success else 'failed'] += 1
+            stats['latency_total'] += latency
+            stats['latency_max'] = max(stats['latency_max'], latency)
+
+    def collect(self):
+        """
+        Return the metrics recorded for each endpoint since the last collection, and reset them.
+        """
+        with self._lock:
+            endpoints, self._endpoints = self._endpoints, {}
+        return endpoints
+
+
+delivery_metrics = DeliveryMetrics()
+
 
 def register_webhook_callback(func):
     """
@@ -40,14 +94,27 @@ def generate_signature(request_body, secret):
     return hmac_prep.hexdigest()
 
 
-@job('default')
-def send_webhook(event_rule, object_type, event_type, data, timestamp, username, request=None, snapshots=None):
+def get_session(url, webhook):
     """
-    Make a POST request to the defined Webhook
+    Return a requests Session for delivering the webhook to the given URL. Sessions are reused by the calling
+    thread for all deliveries to the same host, so that connections to the receiver are kept alive. As a session may
+    be shared by many webhooks, it never stores cookies: each delivery is sent without any state from the last.
     """
-    webhook = event_rule.action_object
+    verify = webhook.ca_file_path or webhook.ssl_verification
+    sessions = _sessions.__dict__.setdefault('sessions', {})
+    key = (urlsplit(url).netloc, verify)
+    if key not in sessions:
+        session = requests.Session()
+        session.verify = verify
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        sessions[key] = session
+    return sessions[key]
 
-    # Prepare context data for headers & body templates
+
+def get_context(object_type, event_type, data, timestamp, username, request=None, snapshots=None):
+    """
+    Return the template context for a single event, including any additional context from plugin callbacks.
+    """
     context = {
         'event': WEBHOOK_EVENT_TYPES.get(event_type, event_type),
         'timestamp': timestamp,
@@ -74,6 +141,14 @@ def send_webhook(event_rule, object_type, event_type, data, timestamp, username,
     if callback_data:
         context['context'] = callback_data
 
+    return context
+
+
+def deliver(webhook, context, body=None):
+    """
+    Render and send the HTTP request for a webhook using the given context. The request body is rendered from the
+    context unless passed explicitly.
+    """
     # Build the headers for the HTTP request
     headers = {
         'Content-Type': webhook.http_content_type,
@@ -85,11 +160,12 @@ def send_webhook(event_rule, object_type, event_type, data, timestamp, username,
         raise e
 
     # Render the request body
-    try:
-        body = webhook.render_body(context)
-    except TemplateError as e:
-        logger.error(f"Error rendering request body for webhook {webhook}: {e}")
-        raise e
+    if body is None:
+        try:
+            body = webhook.render_body(context)
+        except TemplateError as e:
+            logger.error(f"Error rendering request body for webhook {webhook}: {e}")
+            raise e
 
     # Prepare the HTTP request
     url = webhook.render_payload_url(context)
@@ -99,9 +175,11 @@ def send_webhook(event_rule, object_type, event_type, data, timestamp, username,
         'headers': headers,
         'data': body.encode('utf8'),
     }
-    logger.info(
-        f"Sending {params['method']} request to {params['url']} ({context['model']} {context['event']})"
-    )
+    if 'events' in context:
+        description = f"{len(context['events'])} events"
+    else:
+        description = f"{context['model']} {context['event']}"
+    logger.info(f"Sending {params['method']} request to {params['url']} ({description})")
     logger.debug(params)
     try:
         prepared_request = requests.Request(**params).prepare()
@@ -114,14 +192,19 @@ def send_webhook(event_rule, object_type, event_type, data, timestamp, username,
         prepared_request.headers['X-Hook-Signature'] = generate_signature(prepared_request.body, webhook.secret)
 
     # Send the request
-    with requests.Session() as session:
-        session.verify = webhook.ssl_verification
-        if webhook.ca_file_path:
-            session.verify = webhook.ca_file_path
-        proxies = resolve_proxies(url=url, context={'client': webhook})
+    session = get_session(url, webhook)
+    proxies = resolve_proxies(url=url, context={'client': webhook})
+    endpoint = '{0.scheme}://{0.netloc}{0.path}'.format(urlsplit(url))
+    start_time = time.monotonic()
+    try:
         response = session.send(prepared_request, proxies=proxies)
+    except requests.exceptions.RequestException:
+        delivery_metrics.record(endpoint, time.monotonic() - start_time, success=False)
+        raise
+    success = 200 <= response.status_code <= 299
+    delivery_metrics.record(endpoint, time.monotonic() - start_time, success=success)
 
-    if 200 <= response.status_code <= 299:
+    if success:
         logger.info(f"Request succeeded; response status {response.status_code}")
         return f"Status {response.status_code} returned, webhook successfully processed."
     else:
@@ -129,3 +212,140 @@ def send_webhook(event_rule, object_type, event_type, data, timestamp, username,
         raise requests.exceptions.RequestException(
             f"Status {response.status_code} returned with content '{response.content}', webhook FAILED to process."
         )
+
+
+@job('default')
+def send_webhook(event_rule, object_type, event_type, data, timestamp, username, request=None, snapshots=None):
+    """
+    Make a POST request to the defined Webhook
+    """
+    context = get_context(object_type, event_type, data, timestamp, username, request, snapshots)
+
+    return deliver(event_rule.action_object, context)
+
+
+@job('default')
+def send_webhook_batch(event_rule, events, timestamp, username, request=None):
+    """
+    Make a single request to the defined Webhook conveying multiple events. Unless the Webhook defines a body template,
+    the request body is a JSON array of the objects which would have been sent for each event individually.
+    """
+    webhook = event_rule.action_object
+
+    # Prepare context data for headers & body templates
+    context = {
+        'timestamp': timestamp,
+        'username': username,
+        'request_id': request.id if request else None,
+        'events': [
+            get_context(timestamp=timestamp, username=username, request=request, **event) for event in events
+        ],
+    }
+    body = None if webhook.body_template else json.dumps(context['events'], cls=JSONEncoder)
+
+    return deliver(webhook, context, body=body)
+
+
+class WebhookWorker(SimpleWorker):
+    """
+    An RQ worker which delivers webhooks concurrently. Each webhook job dequeued is batched together with any
+    others waiting in the queue. The batch is grouped by receiving webhook, and each group is delivered in order
+    by one of a bounded pool of threads, reusing that thread's keep-alive HTTP sessions.
+
+    Each job retains its own RQ execution, so retries and failure handling are unaffected.
+    """
+    # Signal-based job timeouts are only available on the main thread
+    death_penalty_class = TimerDeathPenalty
+    concurrency = 8
+    batch_size = 100
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._executions = {}
+        self._executor = None
+
+    @staticmethod
+    def is_webhook_job(job):
+        return job.func_name in ('extras.webhooks.send_webhook', 'extras.webhooks.send_webhook_batch')
+
+    def prepare_execution(self, job):
+        # Track executions per job, as several jobs may be in progress concurrently
+        with self.connection.pipeline() as pipeline:
+            execution = Execution.create(job, self.get_heartbeat_ttl(job), pipeline=pipeline)
+            self.set_state(WorkerStatus.BUSY, pipeline=pipeline)
+            pipeline.execute()
+        self._executions[job.id] = execution
+        return execution
+
+    def cleanup_execution(self, job, pipeline):
+        self.set_current_job_id(None, pipeline=pipeline)
+        if execution := self._executions.pop(job.id, None):
+            execution.delete(job=job, pipeline=pipeline)
+
+    def dequeue_batch(self, queue):
+        """
+        Return up to batch_size - 1 jobs already waiting in the queue, without blocking.
+        """
+        jobs = []
+        while len(jobs) < self.batch_size - 1:
+            result = self.queue_class.dequeue_any(
+                [queue],
+                None,
+                connection=self.connection,
+                job_class=self.job_class,
+                serializer=self.serializer,
+                death_penalty_class=self.death_penalty_class,
+            )
+            if result is None:
+                break
+            jobs.append(result[0])
+        return jobs
+
+    def perform_jobs(self, jobs, queue):
+        try:
+            for job in jobs:
+                self.perform_job(job, queue)
+        finally:
+            close_old_connections()
+
+    def execute_job(self, job, queue):
+        if not self.is_webhook_job(job):
+            return super().execute_job(job, queue)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='webhook')
+
+        # Group the batch by receiving webhook. Any unrelated jobs dequeued from a shared queue are executed
+        # serially once the batch has been delivered.
+        receivers = defaultdict(list)
+        other_jobs = []
+        for batch_job in [job, *self.dequeue_batch(queue)]:
+            self.prepare_execution(batch_job)
+            if self.is_webhook_job(batch_job):
+                receivers[batch_job.kwargs['event_rule'].action_object_id].append(batch_job)
+            else:
+                other_jobs.append(batch_job)
+
+        futures = [
+            self._executor.submit(self.perform_jobs, receiver_jobs, queue) for receiver_jobs in receivers.values()
+        ]
+        wait(futures)
+        for other_job in other_jobs:
+            self.perform_job(other_job, queue)
+        self.set_state(WorkerStatus.IDLE)
+        self.report_metrics()
+
+    def report_metrics(self):
+        for endpoint, stats in delivery_metrics.collect().items():
+            self.log.info(
+                'Webhook deliveries to %s: %d succeeded, %d failed; average latency %.0fms, maximum %.0fms',
+                endpoint,
+                stats['succeeded'],
+                stats['failed'],
+                stats['latency_total'] / stats['deliveries'] * 1000,
+                stats['latency_max'] * 1000,
+            )
+
+    def teardown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+        super().teardown()
@@ -1,4 +1,5 @@
 from django.contrib.contenttypes.models import ContentType
+from django.utils.translation import gettext as _
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
@@ -22,6 +23,7 @@ __all__ = (
     'AvailableIPSerializer',
     'AvailablePrefixSerializer',
     'IPAddressSerializer',
+    'IPAllocationSerializer',
     'IPRangeSerializer',
     'PrefixLengthSerializer',
     'PrefixSerializer',
@@ -33,12 +35,13 @@ class AggregateSerializer(NetBoxModelSerializer):
     rir = RIRSerializer(nested=True)
     tenant = TenantSerializer(nested=True, required=False, allow_null=True)
     prefix = IPNetworkField()
+    utilization = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Aggregate
         fields = [
             'id', 'url', 'display_url', 'display', 'family', 'prefix', 'rir', 'tenant', 'date_added', 'description',
-            'comments', 'tags', 'custom_fields', 'created', 'last_updated',
+            'comments', 'tags', 'custom_fields', 'created', 'last_updated', 'utilization',
         ]
         brief_fields = ('id', 'url', 'display', 'family', 'prefix', 'description')
 
@@ -62,6 +65,7 @@ class PrefixSerializer(NetBoxModelSerializer):
     role = RoleSerializer(nested=True, required=False, allow_null=True)
     children = serializers.IntegerField(read_only=True)
     _depth = serializers.IntegerField(read_only=True)
+    utilization = serializers.FloatField(source='get_utilization', read_only=True)
     prefix = IPNetworkField()
 
     class Meta:
@@ -69,7 +73,7 @@ class PrefixSerializer(NetBoxModelSerializer):
         fields = [
             'id', 'url', 'display_url', 'display', 'family', 'prefix', 'vrf', 'scope_type', 'scope_id', 'scope',
             'tenant', 'vlan', 'status', 'role', 'is_pool', 'mark_utilized', 'description', 'comments', 'tags',
-            'custom_fields', 'created', 'last_updated', 'children', '_depth',
+            'custom_fields', 'created', 'last_updated', 'children', '_depth', 'utilization',
         ]
         brief_fields = ('id', 'url', 'display', 'family', 'prefix', 'description', '_depth')
 
@@ -141,13 +145,14 @@ class IPRangeSerializer(NetBoxModelSerializer):
     tenant = TenantSerializer(nested=True, required=False, allow_null=True)
     status = ChoiceField(choices=IPRangeStatusChoices, required=False)
     role = RoleSerializer(nested=True, required=False, allow_null=True)
+    utilization = serializers.FloatField(read_only=True)
 
     class Meta:
         model = IPRange
         fields = [
             'id', 'url', 'display_url', 'display', 'family', 'start_address', 'end_address', 'size', 'vrf', 'tenant',
             'status', 'role', 'description', 'comments', 'tags', 'custom_fields', 'created', 'last_updated',
-            'mark_populated', 'mark_utilized',
+            'mark_populated', 'mark_utilized', 'utilization',
         ]
         brief_fields = ('id', 'url', 'display', 'family', 'start_address', 'end_address', 'description')
 
@@ -209,3 +214,34 @@ class AvailableIPSerializer(serializers.Serializer):
             'address': f"{instance}/{self.context['parent'].mask_length}",
             'vrf': vrf,
         }
+
+
+class IPAllocationSerializer(serializers.Serializer):
+    """
+    A request to allocate a number of IP addresses (or, if a prefix length is given, child prefixes) from a parent
+    prefix or IP range. Any data provided is applied to each new object.
+    """
+    prefix = PrefixSerializer(nested=True, required=False)
+    ip_range = IPRangeSerializer(nested=True, required=False)
+    count = serializers.IntegerField(min_value=1, default=1)
+    prefix_length = serializers.IntegerField(min_value=0, required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, data):
+        if ('prefix' in data) == ('ip_range' in data):
+            raise serializers.ValidationError(_("Either a prefix or an IP range must be specified (but not both)."))
+
+        if 'prefix_length' in data:
+            if 'ip_range' in data:
+                raise serializers.ValidationError({
+                    'prefix_length': _("Child prefixes cannot be allocated from an IP range.")
+                })
+            family = data['prefix'].family
+            if data['prefix_length'] > (32 if family == 4 else 128):
+                raise serializers.ValidationError({
+                    'prefix_length': _("Invalid prefix length ({length}) for IPv{family}").format(
+                        length=data['prefix_length'], family=family
+                    )
+                })
+
+        return data
@@ -40,7 +40,7 @@ class VLANGroupSerializer(NetBoxModelSerializer):
     tenant = TenantSerializer(nested=True, required=False, allow_null=True)
 
     # Related object counts
-    vlan_count = RelatedObjectCountField('vlans')
+    vlan_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = VLANGroup
@@ -54,6 +54,16 @@ urlpatterns = [
         views.AvailableVLANsView.as_view(),
         name='vlangroup-available-vlans'
     ),
+    path(
+        'allocate/',
+        views.IPAllocationView.as_view(),
+        name='allocate'
+    ),
+    path(
+        'conflicts/',
+        views.IPAMConflictsView.as_view(),
+        name='conflicts'
+    ),
 ]
 
 urlpatterns += router.urls
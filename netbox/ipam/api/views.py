@@ -1,28 +1,34 @@
+import itertools
 from copy import deepcopy
 
 from django.contrib.contenttypes.prefetch import GenericPrefetch
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import router, transaction
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext as _
 from django_pglocks import advisory_lock
 from drf_spectacular.utils import extend_schema
-from netaddr import IPSet
+from netaddr import AddrFormatError, IPNetwork, IPSet
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.routers import APIRootView
 from rest_framework.views import APIView
 
+from core.api.serializers import JobSerializer
 from dcim.models import Interface
 from ipam import filtersets
+from ipam.jobs import IPAMConflictsJob
 from ipam.models import *
-from ipam.utils import get_next_available_prefix
+from ipam.utils import allocation_lock, get_next_available_prefix
+from netbox.api.exceptions import InsufficientResources
 from netbox.api.viewsets import NetBoxModelViewSet
 from netbox.api.viewsets.mixins import ObjectValidationMixin
 from netbox.config import get_config
 from netbox.constants import ADVISORY_LOCK_KEYS
-from utilities.api import get_serializer_for_model
+from utilities.api import get_related_object_by_attrs, get_serializer_for_model
 from virtualization.models import VMInterface
 from . import serializers
 
@@ -70,7 +76,7 @@ class RIRViewSet(NetBoxModelViewSet):
 
 
 class AggregateViewSet(NetBoxModelViewSet):
-    queryset = Aggregate.objects.all()
+    queryset = Aggregate.objects.annotate_utilization()
     serializer_class = serializers.AggregateSerializer
     filterset_class = filtersets.AggregateFilterSet
 
@@ -117,17 +123,40 @@ class IPAddressViewSet(NetBoxModelViewSet):
     serializer_class = serializers.IPAddressSerializer
     filterset_class = filtersets.IPAddressFilterSet
 
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-ips'])
+    def get_lock_scopes(self, request, instance=None):
+        """
+        Return the allocation lock scopes covering the IP addresses specified in the request, as well as the existing
+        instance (if any). A scope of None is returned if any address cannot be determined.
+        """
+        scopes = set()
+        if instance is not None:
+            scopes.add((instance.vrf_id, instance.address.ip, None))
+
+        for data in request.data if isinstance(request.data, list) else [request.data]:
+            try:
+                address = IPNetwork(data['address']).ip if 'address' in data else instance.address.ip
+                if data.get('vrf') is not None:
+                    vrf_id = get_related_object_by_attrs(VRF.objects.all(), data['vrf']).pk
+                else:
+                    vrf_id = instance.vrf_id if instance is not None and 'vrf' not in data else None
+            except (AddrFormatError, AttributeError, DjangoValidationError, TypeError, ValueError):
+                return {None}
+            scopes.add((vrf_id, address, None))
+
+        return scopes
+
     def create(self, request, *args, **kwargs):
-        return super().create(request, *args, **kwargs)
+        with allocation_lock('available-ips', self.get_lock_scopes(request)):
+            return super().create(request, *args, **kwargs)
 
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-ips'])
     def update(self, request, *args, **kwargs):
-        return super().update(request, *args, **kwargs)
+        with allocation_lock('available-ips', self.get_lock_scopes(request, self.get_object())):
+            return super().update(request, *args, **kwargs)
 
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-ips'])
     def destroy(self, request, *args, **kwargs):
-        return super().destroy(request, *args, **kwargs)
+        instance = self.get_object()
+        with allocation_lock('available-ips', [(instance.vrf_id, instance.address.ip, None)]):
+            return super().destroy(request, *args, **kwargs)
 
 
 class FHRPGroupViewSet(NetBoxModelViewSet):
@@ -199,6 +228,16 @@ def get_results_limit(request):
     return limit
 
 
+def get_results_offset(request):
+    """
+    Return the specified offset (if any) as a non-negative integer.
+    """
+    try:
+        return max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return 0
+
+
 class AvailableObjectsView(ObjectValidationMixin, APIView):
     """
     Return a list of dicts representing child objects that have not yet been created for a parent object.
@@ -213,9 +252,9 @@ class AvailableObjectsView(ObjectValidationMixin, APIView):
         """
         raise NotImplementedError()
 
-    def get_available_objects(self, parent, limit=None):
+    def get_available_objects(self, parent, limit=None, offset=0):
         """
-        Return all available objects for the parent.
+        Return all available objects for the parent, omitting the first offset objects.
         """
         raise NotImplementedError()
 
@@ -225,6 +264,12 @@ class AvailableObjectsView(ObjectValidationMixin, APIView):
         """
         return {}
 
+    def get_lock(self, parent):
+        """
+        Return the advisory lock to be held while allocating objects within the parent.
+        """
+        return advisory_lock(ADVISORY_LOCK_KEYS[self.advisory_lock_key])
+
     def check_sufficient_available(self, requested_objects, available_objects):
         """
         Check if there exist a sufficient number of available objects to satisfy the request.
@@ -241,7 +286,8 @@ class AvailableObjectsView(ObjectValidationMixin, APIView):
     def get(self, request, pk):
         parent = self.get_parent(request, pk)
         limit = get_results_limit(request)
-        available_objects = self.get_available_objects(parent, limit)
+        offset = get_results_offset(request)
+        available_objects = self.get_available_objects(parent, limit, offset)
 
         serializer = self.read_serializer_class(available_objects, many=True, context={
             'request': request,
@@ -269,7 +315,7 @@ class AvailableObjectsView(ObjectValidationMixin, APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        with advisory_lock(ADVISORY_LOCK_KEYS[self.advisory_lock_key]):
+        with self.get_lock(parent):
             available_objects = self.get_available_objects(parent, limit)
 
             # Determine if the requested number of objects is available
@@ -313,8 +359,8 @@ class AvailableASNsView(AvailableObjectsView):
     def get_parent(self, request, pk):
         return get_object_or_404(ASNRange.objects.restrict(request.user), pk=pk)
 
-    def get_available_objects(self, parent, limit=None):
-        return parent.get_available_asns()[:limit]
+    def get_available_objects(self, parent, limit=None, offset=0):
+        return parent.get_available_asns(offset=offset, limit=limit)
 
     def get_extra_context(self, parent):
         return {
@@ -353,8 +399,8 @@ class AvailablePrefixesView(AvailableObjectsView):
     def get_parent(self, request, pk):
         return get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
 
-    def get_available_objects(self, parent, limit=None):
-        return parent.get_available_prefixes().iter_cidrs()
+    def get_available_objects(self, parent, limit=None, offset=0):
+        return parent.get_available_prefixes().iter_cidrs()[offset:]
 
     def check_sufficient_available(self, requested_objects, available_objects):
         available_prefixes = IPSet(available_objects)
@@ -369,6 +415,9 @@ class AvailablePrefixesView(AvailableObjectsView):
             'vrf': parent.vrf,
         }
 
+    def get_lock(self, parent):
+        return allocation_lock(self.advisory_lock_key, [(parent.vrf_id, parent.prefix, None)])
+
     def prep_object_data(self, requested_objects, available_objects, parent):
         available_prefixes = IPSet(available_objects)
         for i, request_data in enumerate(requested_objects):
@@ -403,14 +452,10 @@ class AvailableIPAddressesView(AvailableObjectsView):
     write_serializer_class = serializers.AvailableIPSerializer
     advisory_lock_key = 'available-ips'
 
-    def get_available_objects(self, parent, limit=None):
-        # Calculate available IPs within the parent
-        ip_list = []
-        for index, ip in enumerate(parent.get_available_ips(), start=1):
-            ip_list.append(ip)
-            if index == limit:
-                break
-        return ip_list
+    def get_available_objects(self, parent, limit=None, offset=0):
+        # Calculate available IPs within the parent, retrieving only as many available ranges as needed
+        available_ips = itertools.chain.from_iterable(parent.get_available_ip_ranges())
+        return list(itertools.islice(available_ips, offset, offset + limit if limit else None))
 
     def get_extra_context(self, parent):
         return {
@@ -418,6 +463,13 @@ class AvailableIPAddressesView(AvailableObjectsView):
             'vrf': parent.vrf,
         }
 
+    def get_lock(self, parent):
+        if isinstance(parent, IPRange):
+            scope = (parent.vrf_id, parent.start_address.ip, parent.end_address.ip)
+        else:
+            scope = (parent.vrf_id, parent.prefix, None)
+        return allocation_lock(self.advisory_lock_key, [scope])
+
     def prep_object_data(self, requested_objects, available_objects, parent):
         available_ips = iter(available_objects)
         for i, request_data in enumerate(requested_objects):
@@ -462,8 +514,8 @@ class AvailableVLANsView(AvailableObjectsView):
     def get_parent(self, request, pk):
         return get_object_or_404(VLANGroup.objects.restrict(request.user), pk=pk)
 
-    def get_available_objects(self, parent, limit=None):
-        return parent.get_available_vids()[:limit]
+    def get_available_objects(self, parent, limit=None, offset=0):
+        return parent.get_available_vids(offset=offset, limit=limit)
 
     def get_extra_context(self, parent):
         return {
@@ -490,3 +542,119 @@ class AvailableVLANsView(AvailableObjectsView):
     )
     def post(self, request, pk):
         return super().post(request, pk)
+
+
+class IPAllocationView(APIView):
+    """
+    Allocate IP addresses and/or child prefixes from any number of parent prefixes and IP ranges in a single
+    transaction. Allocations are processed in order, and either all succeed or none are made.
+    """
+    queryset = IPAddress.objects.all()
+
+    def get_lock_scope(self, allocation):
+        """
+        Return the namespace and scope of the advisory lock guarding the parent of an allocation.
+        """
+        if 'prefix_length' in allocation:
+            parent = allocation['prefix']
+            return 'available-prefixes', (parent.vrf_id, parent.prefix, None)
+        if parent := allocation.get('ip_range'):
+            return 'available-ips', (parent.vrf_id, parent.start_address.ip, parent.end_address.ip)
+        parent = allocation['prefix']
+        return 'available-ips', (parent.vrf_id, parent.prefix, None)
+
+    def allocate(self, request, allocation):
+        """
+        Create the objects specified by an allocation and return their serialized representation.
+        """
+        count = allocation['count']
+        if 'prefix_length' in allocation:
+            model = Prefix
+            parent = allocation['prefix']
+            available_prefixes = IPSet(parent.get_available_prefixes())
+            requested_objects = []
+            for i in range(count):
+                if not (prefix := get_next_available_prefix(available_prefixes, allocation['prefix_length'])):
+                    raise InsufficientResources()
+                requested_objects.append({**allocation['data'], 'prefix': prefix, 'vrf': parent.vrf_id})
+        else:
+            model = IPAddress
+            parent = allocation.get('prefix') or allocation.get('ip_range')
+            available_ips = list(
+                itertools.islice(itertools.chain.from_iterable(parent.get_available_ip_ranges()), count)
+            )
+            if len(available_ips) < count:
+                raise InsufficientResources()
+            requested_objects = [
+                {**allocation['data'], 'address': f'{ip}/{parent.mask_length}', 'vrf': parent.vrf_id}
+                for ip in available_ips
+            ]
+
+        serializer_class = get_serializer_for_model(model)
+        serializer = serializer_class(data=requested_objects, many=True, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save()
+
+        # Enforce object-level permissions
+        if model.objects.restrict(request.user, 'add').filter(pk__in=[obj.pk for obj in created]).count() != count:
+            raise PermissionDenied()
+
+        return serializer.data
+
+    @extend_schema(
+        methods=["post"],
+        responses={201: serializers.IPAddressSerializer(many=True)},
+        request=serializers.IPAllocationSerializer(many=True),
+    )
+    def post(self, request):
+        requested_allocations = request.data if isinstance(request.data, list) else [request.data]
+        serializer = serializers.IPAllocationSerializer(data=requested_allocations, many=True, context={
+            'request': request,
+        })
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        allocations = serializer.validated_data
+
+        # Ensure that the user may view each parent prefix or IP range
+        for allocation in allocations:
+            for field, model in (('prefix', Prefix), ('ip_range', IPRange)):
+                if field in allocation:
+                    allocation[field] = get_object_or_404(model.objects.restrict(request.user), pk=allocation[field].pk)
+
+        # Lock the address space of each parent, so that allocations within unrelated prefixes can proceed
+        # concurrently
+        scopes = {'available-ips': set(), 'available-prefixes': set()}
+        for allocation in allocations:
+            key, scope = self.get_lock_scope(allocation)
+            scopes[key].add(scope)
+
+        with (
+            allocation_lock('available-ips', scopes['available-ips']),
+            allocation_lock('available-prefixes', scopes['available-prefixes']),
+        ):
+            with transaction.atomic(using=router.db_for_write(IPAddress)):
+                results = [self.allocate(request, allocation) for allocation in allocations]
+
+        return Response(results, status=status.HTTP_201_CREATED)
+
+
+class IPAMConflictsView(APIView):
+    """
+    Enqueue a job to find all duplicate IP addresses, duplicate prefixes, and overlapping IP ranges within each VRF.
+    Returns the pending Job, the data of which will list each set of conflicting objects once completed.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        methods=["post"],
+        request=None,
+        responses={200: JobSerializer},
+    )
+    def post(self, request):
+        if not request.user.has_perms(('ipam.view_ipaddress', 'ipam.view_prefix', 'ipam.view_iprange')):
+            raise PermissionDenied(_("This user does not have permission to view IP addresses, prefixes, and ranges."))
+
+        job = IPAMConflictsJob.enqueue(user=request.user)
+        serializer = JobSerializer(job, context={'request': request})
+
+        return Response(serializer.data)
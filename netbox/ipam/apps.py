@@ -9,8 +9,9 @@ class IPAMConfig(AppConfig):
 
     def ready(self):
         from netbox.models.features import register_models
+        from utilities.counters import connect_counters, register_utilization
         from . import signals, search  # noqa: F401
-        from .models import Prefix
+        from .models import IPRange, Prefix, VLANGroup
 
         # Register models
         register_models(*self.get_models())
@@ -23,3 +24,9 @@ class IPAMConfig(AppConfig):
         denormalized.register(Prefix, '_location', {
             '_site': 'site',
         })
+
+        # Register counters
+        connect_counters(VLANGroup)
+
+        # Register cached utilization
+        register_utilization(Prefix, IPRange)
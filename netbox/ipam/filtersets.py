@@ -21,6 +21,7 @@ from virtualization.models import VirtualMachine, VMInterface
 from vpn.models import L2VPN
 from .choices import *
 from .models import *
+from .utils import get_duplicate_ip_addresses, get_duplicate_prefixes, get_overlapping_ip_ranges
 
 __all__ = (
     'AggregateFilterSet',
@@ -317,6 +318,13 @@ class PrefixFilterSet(NetBoxModelFilterSet, ScopedFilterSet, TenancyFilterSet, C
     children = MultiValueNumberFilter(
         field_name='_children'
     )
+    utilization = MultiValueNumberFilter(
+        field_name='_utilization'
+    )
+    duplicate = django_filters.BooleanFilter(
+        method='filter_duplicate',
+        label=_('Is duplicated within its VRF'),
+    )
     mask_length = MultiValueNumberFilter(
         field_name='prefix',
         lookup_expr='net_mask_length',
@@ -455,6 +463,12 @@ class PrefixFilterSet(NetBoxModelFilterSet, ScopedFilterSet, TenancyFilterSet, C
             Q(vrf__export_targets__in=vrf.import_targets.all())
         ).distinct()
 
+    def filter_duplicate(self, queryset, name, value):
+        duplicates = get_duplicate_prefixes().values('pk')
+        if value:
+            return queryset.filter(pk__in=duplicates)
+        return queryset.exclude(pk__in=duplicates)
+
 
 class IPRangeFilterSet(TenancyFilterSet, NetBoxModelFilterSet, ContactModelFilterSet):
     family = django_filters.NumberFilter(
@@ -501,6 +515,13 @@ class IPRangeFilterSet(TenancyFilterSet, NetBoxModelFilterSet, ContactModelFilte
         method='search_by_parent',
         label=_('Parent prefix'),
     )
+    utilization = MultiValueNumberFilter(
+        field_name='_utilization'
+    )
+    overlapping = django_filters.BooleanFilter(
+        method='filter_overlapping',
+        label=_('Overlaps another range within its VRF'),
+    )
 
     class Meta:
         model = IPRange
@@ -547,6 +568,12 @@ class IPRangeFilterSet(TenancyFilterSet, NetBoxModelFilterSet, ContactModelFilte
                 return queryset.none()
         return queryset.filter(q)
 
+    def filter_overlapping(self, queryset, name, value):
+        overlapping = get_overlapping_ip_ranges().values('pk')
+        if value:
+            return queryset.filter(pk__in=overlapping)
+        return queryset.exclude(pk__in=overlapping)
+
 
 class IPAddressFilterSet(NetBoxModelFilterSet, TenancyFilterSet, ContactModelFilterSet):
     family = django_filters.NumberFilter(
@@ -651,6 +678,10 @@ class IPAddressFilterSet(NetBoxModelFilterSet, TenancyFilterSet, ContactModelFil
         method='_assigned',
         label=_('Is assigned'),
     )
+    duplicate = django_filters.BooleanFilter(
+        method='filter_duplicate',
+        label=_('Is duplicated within its VRF'),
+    )
     status = django_filters.MultipleChoiceFilter(
         choices=IPAddressStatusChoices,
         null_value=None
@@ -783,6 +814,12 @@ class IPAddressFilterSet(NetBoxModelFilterSet, TenancyFilterSet, ContactModelFil
                 assigned_object_id__isnull=True
             )
 
+    def filter_duplicate(self, queryset, name, value):
+        duplicates = get_duplicate_ip_addresses().values('pk')
+        if value:
+            return queryset.filter(pk__in=duplicates)
+        return queryset.exclude(pk__in=duplicates)
+
 
 class FHRPGroupFilterSet(NetBoxModelFilterSet):
     protocol = django_filters.MultipleChoiceFilter(
@@ -915,7 +952,7 @@ class VLANGroupFilterSet(OrganizationalModelFilterSet, TenancyFilterSet):
 
     class Meta:
         model = VLANGroup
-        fields = ('id', 'name', 'slug', 'description', 'scope_id')
+        fields = ('id', 'name', 'slug', 'description', 'scope_id', 'vlan_count')
 
     def search(self, queryset, name, value):
         if not value.strip():
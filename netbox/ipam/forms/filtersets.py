@@ -173,7 +173,7 @@ class PrefixFilterForm(ContactModelFilterForm, TenancyFilterForm, NetBoxModelFil
     fieldsets = (
         FieldSet('q', 'filter_id', 'tag'),
         FieldSet(
-            'within_include', 'family', 'status', 'role_id', 'mask_length', 'is_pool', 'mark_utilized',
+            'within_include', 'family', 'status', 'role_id', 'mask_length', 'is_pool', 'mark_utilized', 'duplicate',
             name=_('Addressing')
         ),
         FieldSet('vlan_group_id', 'vlan_id', name=_('VLAN Assignment')),
@@ -260,6 +260,13 @@ class PrefixFilterForm(ContactModelFilterForm, TenancyFilterForm, NetBoxModelFil
             choices=BOOLEAN_WITH_BLANK_CHOICES
         )
     )
+    duplicate = forms.NullBooleanField(
+        required=False,
+        label=_('Duplicate'),
+        widget=forms.Select(
+            choices=BOOLEAN_WITH_BLANK_CHOICES
+        )
+    )
     vlan_group_id = DynamicModelMultipleChoiceField(
         queryset=VLANGroup.objects.all(),
         required=False,
@@ -278,7 +285,10 @@ class IPRangeFilterForm(ContactModelFilterForm, TenancyFilterForm, NetBoxModelFi
     model = IPRange
     fieldsets = (
         FieldSet('q', 'filter_id', 'tag'),
-        FieldSet('family', 'vrf_id', 'status', 'role_id', 'mark_populated', 'mark_utilized', name=_('Attributes')),
+        FieldSet(
+            'family', 'vrf_id', 'status', 'role_id', 'mark_populated', 'mark_utilized', 'overlapping',
+            name=_('Attributes')
+        ),
         FieldSet('tenant_group_id', 'tenant_id', name=_('Tenant')),
         FieldSet('contact', 'contact_role', 'contact_group', name=_('Contacts')),
     )
@@ -318,6 +328,13 @@ class IPRangeFilterForm(ContactModelFilterForm, TenancyFilterForm, NetBoxModelFi
             choices=BOOLEAN_WITH_BLANK_CHOICES
         )
     )
+    overlapping = forms.NullBooleanField(
+        required=False,
+        label=_('Overlapping'),
+        widget=forms.Select(
+            choices=BOOLEAN_WITH_BLANK_CHOICES
+        )
+    )
     tag = TagFilterField(model)
 
 
@@ -326,7 +343,7 @@ class IPAddressFilterForm(ContactModelFilterForm, TenancyFilterForm, NetBoxModel
     fieldsets = (
         FieldSet('q', 'filter_id', 'tag'),
         FieldSet(
-            'parent', 'family', 'status', 'role', 'mask_length', 'assigned_to_interface', 'dns_name',
+            'parent', 'family', 'status', 'role', 'mask_length', 'assigned_to_interface', 'duplicate', 'dns_name',
             name=_('Attributes')
         ),
         FieldSet('vrf_id', 'present_in_vrf_id', name=_('VRF')),
@@ -392,6 +409,13 @@ class IPAddressFilterForm(ContactModelFilterForm, TenancyFilterForm, NetBoxModel
             choices=BOOLEAN_WITH_BLANK_CHOICES
         )
     )
+    duplicate = forms.NullBooleanField(
+        required=False,
+        label=_('Duplicate'),
+        widget=forms.Select(
+            choices=BOOLEAN_WITH_BLANK_CHOICES
+        )
+    )
     dns_name = forms.CharField(
         required=False,
         label=_('DNS Name')
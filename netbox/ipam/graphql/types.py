@@ -303,6 +303,7 @@ class VLANGroupType(OrganizationalObjectType):
     vlans: List[VLANType]
     vid_ranges: List[str]
     tenant: Annotated["TenantType", strawberry.lazy('tenancy.graphql.types')] | None
+    vlan_count: BigInt
 
     @strawberry_django.field
     def scope(self) -> Annotated[Union[
@@ -0,0 +1,67 @@
+import itertools
+
+from netbox.jobs import JobRunner
+from .utils import get_duplicate_ip_addresses, get_duplicate_prefixes, get_overlapping_ip_ranges
+
+__all__ = (
+    'IPAMConflictsJob',
+)
+
+
+class IPAMConflictsJob(JobRunner):
+    """
+    Find all duplicate IP addresses, duplicate prefixes, and overlapping IP ranges within each VRF. The conflicting
+    objects are recorded in the job's data, grouped into sets of objects which conflict with one another.
+    """
+    class Meta:
+        name = 'IPAM Conflicts'
+
+    @staticmethod
+    def get_duplicate_ip_addresses():
+        rows = get_duplicate_ip_addresses().values_list('vrf_id', '_host', 'pk').iterator()
+        for (vrf_id, host), group in itertools.groupby(rows, key=lambda row: row[:2]):
+            yield {
+                'vrf': vrf_id,
+                'address': str(host.ip),
+                'ip_addresses': [row[2] for row in group],
+            }
+
+    @staticmethod
+    def get_duplicate_prefixes():
+        rows = get_duplicate_prefixes().values_list('vrf_id', 'prefix', 'pk').iterator()
+        for (vrf_id, prefix), group in itertools.groupby(rows, key=lambda row: row[:2]):
+            yield {
+                'vrf': vrf_id,
+                'prefix': str(prefix),
+                'prefixes': [row[2] for row in group],
+            }
+
+    @staticmethod
+    def get_overlapping_ip_ranges():
+        rows = get_overlapping_ip_ranges().values_list('vrf_id', '_start', '_end', 'pk').iterator()
+        group = group_end = None
+        for vrf_id, start, end, pk in rows:
+            # Each range overlaps at least one other, so a range which starts beyond the end of every range in the
+            # current group (within the same VRF) begins a new group
+            if group is None or vrf_id != group['vrf'] or start > group_end:
+                if group is not None:
+                    yield group
+                group = {'vrf': vrf_id, 'ip_ranges': []}
+                group_end = end
+            group['ip_ranges'].append(pk)
+            group_end = max(group_end, end)
+        if group is not None:
+            yield group
+
+    def run(self, *args, **kwargs):
+        data = {}
+        for key, label, get_conflicts in (
+            ('ip_addresses', 'duplicate IP addresses', self.get_duplicate_ip_addresses),
+            ('prefixes', 'duplicate prefixes', self.get_duplicate_prefixes),
+            ('ip_ranges', 'overlapping IP ranges', self.get_overlapping_ip_ranges),
+        ):
+            self.logger.debug(f"Searching for {label}")
+            data[key] = list(get_conflicts())
+            self.logger.info(f"Found {len(data[key])} sets of {label}")
+
+        self.job.data = data
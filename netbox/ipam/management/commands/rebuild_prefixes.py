@@ -1,27 +1,53 @@
-from django.core.management.base import BaseCommand
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
 
 from ipam.models import Prefix, VRF
 from ipam.utils import rebuild_prefixes
+from utilities.parallel import run_in_parallel
 
 
-class Command(BaseCommand):
-    help = "Rebuild the prefix hierarchy (depth and children counts)"
-
-    def handle(self, *model_names, **options):
-        self.stdout.write(f'Rebuilding {Prefix.objects.count()} prefixes...')
+def _rebuild_vrf(vrf_id):
+    """
+    Rebuild the prefix hierarchy for the specified VRF (or the global table if None), returning the VRF ID, the
+    number of prefixes, and the time taken.
+    """
+    start_time = time.time()
+    count = rebuild_prefixes(vrf_id)
+    return vrf_id, count, time.time() - start_time
 
-        # Reset existing counts
-        Prefix.objects.update(_depth=0, _children=0)
 
-        # Rebuild the global table
-        global_count = Prefix.objects.filter(vrf__isnull=True).count()
-        self.stdout.write(f'Global: {global_count} prefixes...')
-        rebuild_prefixes(None)
+class Command(BaseCommand):
+    help = "Rebuild the prefix hierarchy (depth and children counts)"
 
-        # Rebuild each VRF
-        for vrf in VRF.objects.all():
-            vrf_count = Prefix.objects.filter(vrf=vrf).count()
-            self.stdout.write(f'VRF {vrf}: {vrf_count} prefixes...')
-            rebuild_prefixes(vrf.pk)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int,
+            help="Rebuild VRFs in parallel using the specified number of worker processes"
+        )
 
-        self.stdout.write(self.style.SUCCESS('Finished.'))
+    def handle(self, *model_names, **options):
+        workers = options['workers']
+        if workers is not None and workers < 1:
+            raise CommandError("The number of workers must be a positive integer.")
+
+        # Count the prefixes in the global table and in each VRF. The largest are rebuilt first so that, when working
+        # in parallel, the longest rebuilds are not left until last.
+        counts = {
+            row['vrf']: row['count']
+            for row in Prefix.objects.values('vrf').annotate(count=Count('pk')).order_by('-count')
+        }
+        vrf_names = {vrf.pk: f'VRF {vrf}' for vrf in VRF.objects.filter(pk__in=counts)}
+        vrf_names[None] = 'Global'
+        total_count = sum(counts.values())
+        self.stdout.write(f'Rebuilding {total_count} prefixes...')
+
+        start_time = time.time()
+        results = run_in_parallel(_rebuild_vrf, [(vrf_id,) for vrf_id in counts], workers)
+        for i, (vrf_id, count, elapsed) in enumerate(results, start=1):
+            self.stdout.write(
+                f'  [{i}/{len(counts)}] {vrf_names[vrf_id]}: {count} prefixes in {elapsed:.2f} seconds'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Finished in {time.time() - start_time:.2f} seconds.'))
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+import utilities.fields
+
+
+def populate_vlan_counts(apps, schema_editor):
+    """
+    Populate the cached VLAN count for each VLANGroup.
+    """
+    VLANGroup = apps.get_model('ipam', 'VLANGroup')
+    db_alias = schema_editor.connection.alias
+
+    VLANGroup.objects.using(db_alias).update(
+        vlan_count=Subquery(
+            VLANGroup.objects.using(db_alias).filter(pk=OuterRef('pk')).annotate(
+                _count=Count('vlans')
+            ).values('_count')
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipam', '0082_add_prefix_network_containment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='iprange',
+            name='_utilization',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='prefix',
+            name='_utilization',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vlangroup',
+            name='vlan_count',
+            field=utilities.fields.CounterCacheField(default=0, editable=False, to_field='group', to_model='ipam.VLAN'),
+        ),
+        migrations.RunPython(
+            code=populate_vlan_counts,
+            reverse_code=migrations.RunPython.noop
+        ),
+    ]
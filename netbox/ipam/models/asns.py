@@ -6,6 +6,7 @@ from ipam.fields import ASNField
 from ipam.querysets import ASNRangeQuerySet
 from netbox.models import OrganizationalModel, PrimaryModel
 from netbox.models.features import ContactsMixin
+from utilities.data import get_range_gaps, slice_range_gaps
 
 __all__ = (
     'ASN',
@@ -78,15 +79,19 @@ class ASNRange(OrganizationalModel):
             asn__lte=self.end
         )
 
-    def get_available_asns(self):
+    def get_available_asn_ranges(self):
         """
-        Return all available ASNs within this range.
+        Return an iterator of (first, last) tuples representing each range of available ASNs within this range.
         """
-        range = set(self.range)
-        existing_asns = set(self.get_child_asns().values_list('asn', flat=True))
-        available_asns = sorted(range - existing_asns)
+        asns = self.get_child_asns().order_by('asn').values_list('asn', flat=True)
+        return get_range_gaps([(self.start, self.end)], asns.iterator())
 
-        return available_asns
+    def get_available_asns(self, offset=0, limit=None):
+        """
+        Return all available ASNs within this range, optionally omitting the first offset ASNs and returning at most
+        limit ASNs.
+        """
+        return slice_range_gaps(self.get_available_asn_ranges(), offset=offset, limit=limit)
 
 
 class ASN(ContactsMixin, PrimaryModel):
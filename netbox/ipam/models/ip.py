@@ -3,7 +3,7 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.indexes import GistIndex
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, router, transaction
 from django.db.models import F
 from django.db.models.functions import Cast
 from django.utils.functional import cached_property
@@ -15,9 +15,10 @@ from ipam.constants import *
 from ipam.fields import IPNetworkField, IPAddressField
 from ipam.lookups import Host
 from ipam.managers import IPAddressManager
-from ipam.querysets import PrefixQuerySet
+from ipam.querysets import AggregateQuerySet, IPRangeQuerySet, PrefixQuerySet
 from ipam.validators import DNSValidator
 from netbox.config import get_config
+from netbox.constants import ADVISORY_LOCK_KEYS
 from netbox.models import OrganizationalModel, PrimaryModel
 from netbox.models.features import ContactsMixin
 
@@ -101,6 +102,8 @@ class Aggregate(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
         null=True
     )
 
+    objects = AggregateQuerySet.as_manager()
+
     clone_fields = (
         'rir', 'tenant', 'date_added', 'description',
     )
@@ -178,6 +181,10 @@ class Aggregate(ContactsMixin, GetAvailablePrefixesMixin, PrimaryModel):
         """
         Determine the prefix utilization of the aggregate and return it as a percentage.
         """
+        # Use the value annotated by AggregateQuerySet.annotate_utilization(), if present
+        if hasattr(self, 'utilization'):
+            return self.utilization
+
         queryset = Prefix.objects.filter(prefix__net_contained_or_equal=str(self.prefix))
         child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
         utilization = float(child_prefixes.size) / self.prefix.size * 100
@@ -272,6 +279,13 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, CachedScopeMixin, Primary
         editable=False
     )
 
+    # Cached utilization (null if not yet calculated)
+    _utilization = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False
+    )
+
     objects = PrefixQuerySet.as_manager()
 
     clone_fields = (
@@ -333,7 +347,31 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, CachedScopeMixin, Primary
         # Cache objects associated with the terminating object (for filtering)
         self.cache_related_objects()
 
-        super().save(*args, **kwargs)
+        with transaction.atomic(using=router.db_for_write(Prefix)):
+            if self._state.adding or (self.vrf_id, self.prefix) != (self._vrf_id, self._prefix):
+                self.lock_hierarchy(self.vrf_id, self.prefix)
+                if not self._state.adding:
+                    self.lock_hierarchy(self._vrf_id, self._prefix)
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=router.db_for_write(Prefix)):
+            self.lock_hierarchy(self._vrf_id, self._prefix)
+            return super().delete(*args, **kwargs)
+
+    def lock_hierarchy(self, vrf_id, prefix):
+        """
+        If this Prefix is (or is to become) the outermost prefix containing the specified network in its VRF, adding,
+        moving or removing it changes the root prefix to which allocations within that network are scoped. In that
+        case, acquire an exclusive lock on allocation within the entire address space (see
+        ipam.utils.allocation_lock()), to be held until the current transaction has been committed.
+        """
+        parents = Prefix.objects.filter(vrf_id=vrf_id, prefix__net_contains_or_equals=str(prefix)).exclude(pk=self.pk)
+        if prefix is not None and parents.exists():
+            return
+        with connections[router.db_for_write(Prefix)].cursor() as cursor:
+            for key in ('available-ips', 'available-prefixes'):
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [ADVISORY_LOCK_KEYS[key]])
 
     @property
     def family(self):
@@ -422,48 +460,63 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, CachedScopeMixin, Primary
         else:
             return IPAddress.objects.filter(address__net_host_contained=str(self.prefix), vrf=self.vrf)
 
-    def get_available_ips(self):
+    def get_available_ip_ranges(self):
         """
-        Return all available IPs within this prefix as an IPSet.
+        Yield the available IP space within this prefix as a series of netaddr.IPRanges, in order. Available space is
+        computed by the database and retrieved lazily.
         """
-        prefix = netaddr.IPSet(self.prefix)
-        child_ips = netaddr.IPSet([
-            ip.address.ip for ip in self.get_child_ips()
-        ])
-        child_ranges = netaddr.IPSet([
-            iprange.range for iprange in self.get_child_ranges().filter(mark_populated=True)
-        ])
-        available_ips = prefix - child_ips - child_ranges
+        from ipam.utils import get_available_ip_ranges
+
+        first_ip = netaddr.IPAddress(self.prefix.first)
+        last_ip = netaddr.IPAddress(self.prefix.last)
 
         # IPv6 /127's, pool, or IPv4 /31-/32 sets are fully usable
-        if (self.family == 6 and self.prefix.prefixlen >= 127) or self.is_pool or (
-                self.family == 4 and self.prefix.prefixlen >= 31
-        ):
-            return available_ips
-
-        if self.family == 4:
-            # For "normal" IPv4 prefixes, omit first and last addresses
-            available_ips -= netaddr.IPSet([
-                netaddr.IPAddress(self.prefix.first),
-                netaddr.IPAddress(self.prefix.last),
-            ])
-        else:
-            # For IPv6 prefixes, omit the Subnet-Router anycast address
-            # per RFC 4291
-            available_ips -= netaddr.IPSet([netaddr.IPAddress(self.prefix.first)])
+        fully_usable = (self.family == 6 and self.prefix.prefixlen >= 127) or self.is_pool or (
+            self.family == 4 and self.prefix.prefixlen >= 31
+        )
+        if not fully_usable:
+            # For "normal" IPv4 prefixes, omit first and last addresses. For IPv6 prefixes, omit the Subnet-Router
+            # anycast address per RFC 4291.
+            first_ip += 1
+            if self.family == 4:
+                last_ip -= 1
+
+        return get_available_ip_ranges(
+            first_ip,
+            last_ip,
+            child_ips=self.get_child_ips(),
+            child_ranges=self.get_child_ranges().filter(mark_populated=True)
+        )
 
-        return available_ips
+    def get_available_ips(self):
+        """
+        Return all available IPs within this prefix as an IPSet.
+        """
+        return netaddr.IPSet(self.get_available_ip_ranges())
 
     def get_first_available_ip(self):
         """
         Return the first available IP within the prefix (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
-            return None
-        return '{}/{}'.format(next(available_ips.__iter__()), self.prefix.prefixlen)
+        if available_range := next(self.get_available_ip_ranges(), None):
+            return '{}/{}'.format(available_range[0], self.prefix.prefixlen)
+        return None
 
     def get_utilization(self):
+        """
+        Return the utilization of the prefix as a percentage, using the annotated or cached value if present.
+        """
+        # Use the value annotated by PrefixQuerySet.annotate_utilization(), if present
+        if hasattr(self, 'utilization'):
+            return self.utilization
+
+        # Use the cached value, if present
+        if self._utilization is not None:
+            return self._utilization
+
+        return self.calculate_utilization()
+
+    def calculate_utilization(self):
         """
         Determine the utilization of the prefix and return it as a percentage. For Prefixes with a status of
         "container", calculate utilization based on child prefixes. For all others, count child IP addresses.
@@ -551,6 +604,15 @@ class IPRange(ContactsMixin, PrimaryModel):
         help_text=_("Report space as fully utilized")
     )
 
+    # Cached utilization (null if not yet calculated)
+    _utilization = models.FloatField(
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    objects = IPRangeQuerySet.as_manager()
+
     clone_fields = (
         'vrf', 'tenant', 'status', 'role', 'description', 'mark_populated', 'mark_utilized',
     )
@@ -560,6 +622,13 @@ class IPRange(ContactsMixin, PrimaryModel):
         verbose_name = _('IP range')
         verbose_name_plural = _('IP ranges')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Cache the original start address and VRF so we can check if they have changed on post_save
+        self._original_start_address = self.__dict__.get('start_address')
+        self._original_vrf_id = self.__dict__.get('vrf_id')
+
     def __str__(self):
         return self.name
 
@@ -685,34 +754,42 @@ class IPRange(ContactsMixin, PrimaryModel):
             vrf=self.vrf
         )
 
-    def get_available_ips(self):
+    def get_available_ip_ranges(self):
         """
-        Return all available IPs within this range as an IPSet.
+        Yield the available IP space within this range as a series of netaddr.IPRanges, in order. Available space is
+        computed by the database and retrieved lazily.
         """
+        from ipam.utils import get_available_ip_ranges
+
         if self.mark_populated:
-            return netaddr.IPSet()
+            return iter(())
 
-        range = netaddr.IPRange(self.start_address.ip, self.end_address.ip)
-        child_ips = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()])
+        return get_available_ip_ranges(self.start_address.ip, self.end_address.ip, child_ips=self.get_child_ips())
 
-        return netaddr.IPSet(range) - child_ips
+    def get_available_ips(self):
+        """
+        Return all available IPs within this range as an IPSet.
+        """
+        return netaddr.IPSet(self.get_available_ip_ranges())
 
     @cached_property
     def first_available_ip(self):
         """
         Return the first available IP within the range (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
-            return None
-
-        return '{}/{}'.format(next(available_ips.__iter__()), self.start_address.prefixlen)
+        if available_range := next(self.get_available_ip_ranges(), None):
+            return '{}/{}'.format(available_range[0], self.start_address.prefixlen)
+        return None
 
     @cached_property
     def utilization(self):
         """
         Determine the utilization of the range and return it as a percentage.
         """
+        # Use the cached value, if present
+        if self._utilization is not None:
+            return self._utilization
+
         if self.mark_utilized:
             return 100
 
@@ -826,6 +903,10 @@ class IPAddress(ContactsMixin, PrimaryModel):
         self._original_assigned_object_id = self.__dict__.get('assigned_object_id')
         self._original_assigned_object_type_id = self.__dict__.get('assigned_object_type_id')
 
+        # Cache the original address and VRF so we can check if they have changed on post_save
+        self._original_address = self.__dict__.get('address')
+        self._original_vrf_id = self.__dict__.get('vrf_id')
+
     @property
     def ipv6_full(self):
         if self.address and self.address.version == 6:
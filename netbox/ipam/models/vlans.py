@@ -12,7 +12,11 @@ from ipam.choices import *
 from ipam.constants import *
 from ipam.querysets import VLANGroupQuerySet, VLANQuerySet
 from netbox.models import OrganizationalModel, PrimaryModel, NetBoxModel
-from utilities.data import check_ranges_overlap, ranges_to_string, ranges_to_string_list
+from utilities.data import (
+    check_ranges_overlap, get_range_gaps, range_bounds, ranges_to_string, ranges_to_string_list, slice_range_gaps,
+)
+from utilities.fields import CounterCacheField
+from utilities.tracking import TrackingModelMixin
 from virtualization.models import VMInterface
 
 __all__ = (
@@ -73,6 +77,12 @@ class VLANGroup(OrganizationalModel):
         default=VLAN_VID_MAX - VLAN_VID_MIN + 1
     )
 
+    # Counter fields
+    vlan_count = CounterCacheField(
+        to_model='ipam.VLAN',
+        to_field='group'
+    )
+
     objects = VLANGroupQuerySet.as_manager()
 
     class Meta:
@@ -136,24 +146,29 @@ class VLANGroup(OrganizationalModel):
 
         super().save(*args, **kwargs)
 
-    def get_available_vids(self):
+    def get_available_vid_ranges(self, vids=None):
         """
-        Return all available VLANs within this group.
+        Return an iterator of (first, last) tuples representing each range of available VLAN IDs within the group.
+        Optionally specify a sorted iterable of the VLAN IDs in use (by default, the VIDs of all child VLANs).
         """
-        available_vlans = set()
-        for vlan_range in self.vid_ranges:
-            available_vlans = available_vlans.union({
-                vid for vid in range(vlan_range.lower, vlan_range.upper)
-            })
-        available_vlans -= set(VLAN.objects.filter(group=self).values_list('vid', flat=True))
+        if vids is None:
+            vids = VLAN.objects.filter(group=self).order_by('vid').values_list('vid', flat=True)
+        bounds = sorted(range_bounds(vid_range) for vid_range in self.vid_ranges)
 
-        return sorted(available_vlans)
+        return get_range_gaps(bounds, vids)
+
+    def get_available_vids(self, offset=0, limit=None):
+        """
+        Return all available VLANs within this group, optionally omitting the first offset VLANs and returning at
+        most limit VLANs.
+        """
+        return slice_range_gaps(self.get_available_vid_ranges(), offset=offset, limit=limit)
 
     def get_next_available_vid(self):
         """
         Return the first available VLAN ID (1-4094) in the group.
         """
-        available_vids = self.get_available_vids()
+        available_vids = self.get_available_vids(limit=1)
         if available_vids:
             return available_vids[0]
         return None
@@ -179,7 +194,7 @@ class VLANGroup(OrganizationalModel):
         return ranges_to_string(self.vid_ranges)
 
 
-class VLAN(PrimaryModel):
+class VLAN(TrackingModelMixin, PrimaryModel):
     """
     A VLAN is a distinct layer two forwarding domain identified by a 12-bit integer (1-4094). Each VLAN must be assigned
     to a Site, however VLAN IDs need not be unique within a Site. A VLAN may optionally be assigned to a VLANGroup,
@@ -3,17 +3,46 @@ from django.db.models import Count, F, OuterRef, Q, Subquery, Value
 from django.db.models.expressions import RawSQL
 from django.db.models.functions import Round
 
-from utilities.query import count_related
 from utilities.querysets import RestrictedQuerySet
 
 __all__ = (
     'ASNRangeQuerySet',
+    'AggregateQuerySet',
+    'IPRangeQuerySet',
     'PrefixQuerySet',
     'VLANGroupQuerySet',
     'VLANQuerySet',
 )
 
 
+def _network_size_sql(column):
+    """
+    Return SQL for the number of addresses within the network in the given column, as a float.
+    """
+    return f'POWER(2::float8, (CASE WHEN FAMILY({column}) = 4 THEN 32 ELSE 128 END) - MASKLEN({column}))'
+
+
+def _prefix_union_size_sql(condition):
+    """
+    Return SQL for the number of distinct addresses covered by all Prefixes matching the given condition (expressed
+    against the alias U0). Because any two prefixes are either disjoint or nested, this is the total size of all
+    matching prefixes which are not contained within another matching prefix.
+
+    Prefixes are ordered such that each follows any prefix which contains it; a prefix is therefore contained within
+    another if it begins at or before the highest broadcast address of any preceding prefix.
+    """
+    size = _network_size_sql('V1."prefix"')
+    return (
+        f'SELECT COALESCE(SUM({size}), 0) FROM ('
+        f'SELECT V0."prefix", MAX(CAST(HOST(BROADCAST(V0."prefix")) AS INET)) OVER ('
+        f'ORDER BY V0."prefix" ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING'
+        f') AS "covered_to" '
+        f'FROM (SELECT DISTINCT U0."prefix" FROM "ipam_prefix" U0 WHERE {condition}) V0'
+        f') V1 '
+        f'WHERE V1."covered_to" IS NULL OR V1."covered_to" < CAST(HOST(V1."prefix") AS INET)'
+    )
+
+
 class ASNRangeQuerySet(RestrictedQuerySet):
 
     def annotate_asn_counts(self):
@@ -32,6 +61,23 @@ class ASNRangeQuerySet(RestrictedQuerySet):
         return self.annotate(asn_count=Subquery(asns))
 
 
+class AggregateQuerySet(RestrictedQuerySet):
+
+    def annotate_utilization(self):
+        """
+        Annotate the utilization of each Aggregate as a percentage. Mirrors Aggregate.get_utilization().
+        """
+        child_prefixes_size = _prefix_union_size_sql('U0."prefix" <<= "ipam_aggregate"."prefix"')
+        aggregate_size = _network_size_sql('"ipam_aggregate"."prefix"')
+
+        return self.annotate(
+            utilization=RawSQL(
+                f'LEAST(({child_prefixes_size}) * 100 / {aggregate_size}, 100)',
+                ()
+            )
+        )
+
+
 class PrefixQuerySet(RestrictedQuerySet):
 
     def annotate_hierarchy(self):
@@ -56,14 +102,104 @@ class PrefixQuerySet(RestrictedQuerySet):
             )
         )
 
+    def annotate_utilization(self):
+        """
+        Annotate the utilization of each Prefix as a percentage, computed using set-based queries for all prefixes
+        rather than per instance. Mirrors Prefix.calculate_utilization().
+        """
+        from .choices import PrefixStatusChoices
 
-class VLANGroupQuerySet(RestrictedQuerySet):
+        same_vrf = 'COALESCE({alias}."vrf_id", 0) = COALESCE("ipam_prefix"."vrf_id", 0)'
+
+        # Container prefixes: the distinct addresses covered by child prefixes in the same VRF
+        child_prefixes_size = _prefix_union_size_sql(
+            f'U0."prefix" << "ipam_prefix"."prefix" AND {same_vrf.format(alias="U0")}'
+        )
+
+        # All other prefixes: the total size of child IP ranges marked utilized (which may not overlap within a VRF),
+        # plus the number of distinct child IP addresses outside those ranges
+        child_range = (
+            f'{same_vrf.format(alias="U1")} AND U1."mark_utilized" '
+            f'AND CAST(HOST(U1."start_address") AS INET) <<= "ipam_prefix"."prefix" '
+            f'AND CAST(HOST(U1."end_address") AS INET) <<= "ipam_prefix"."prefix"'
+        )
+        child_ranges_size = f'SELECT COALESCE(SUM(U1."size"), 0) FROM "ipam_iprange" U1 WHERE {child_range}'
+        # Child IP addresses and ranges are ordered by address (each range preceding any IPs at its start address); an
+        # IP lies within a range if it does not follow the highest end address of any preceding range
+        child_ips_count = (
+            f'SELECT COUNT(DISTINCT V1."host") FROM ('
+            f'SELECT V0."host", V0."is_ip", MAX(V0."end") OVER ('
+            f'ORDER BY V0."host", V0."is_ip" ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING'
+            f') AS "covered_to" FROM ('
+            f'SELECT CAST(HOST(U2."address") AS INET) AS "host", true AS "is_ip", NULL::inet AS "end" '
+            f'FROM "ipam_ipaddress" U2 '
+            f'WHERE {same_vrf.format(alias="U2")} AND CAST(HOST(U2."address") AS INET) <<= "ipam_prefix"."prefix" '
+            f'UNION ALL '
+            f'SELECT CAST(HOST(U1."start_address") AS INET), false, CAST(HOST(U1."end_address") AS INET) '
+            f'FROM "ipam_iprange" U1 WHERE {child_range}'
+            f') V0'
+            f') V1 '
+            f'WHERE V1."is_ip" AND (V1."covered_to" IS NULL OR V1."covered_to" < V1."host")'
+        )
+
+        # The network and broadcast addresses of IPv4 prefixes are excluded (except for pools and /31s & /32s)
+        prefix_size = _network_size_sql('"ipam_prefix"."prefix"')
+        usable_size = (
+            f'(CASE WHEN FAMILY("ipam_prefix"."prefix") = 4 AND MASKLEN("ipam_prefix"."prefix") < 31 '
+            f'AND NOT "ipam_prefix"."is_pool" THEN {prefix_size} - 2 ELSE {prefix_size} END)'
+        )
+
+        return self.annotate(
+            utilization=RawSQL(
+                f'CASE WHEN "ipam_prefix"."mark_utilized" THEN 100::float8 '
+                f'WHEN "ipam_prefix"."status" = %s '
+                f'THEN LEAST(({child_prefixes_size}) * 100 / {prefix_size}, 100) '
+                f'ELSE LEAST((({child_ranges_size}) + ({child_ips_count})) * 100 / {usable_size}, 100) END',
+                (PrefixStatusChoices.STATUS_CONTAINER,)
+            )
+        )
+
+    def update_utilization(self):
+        """
+        Recalculate and save the utilization of each Prefix.
+        """
+        return self.annotate_utilization().update(_utilization=F('utilization'))
+
+
+class IPRangeQuerySet(RestrictedQuerySet):
 
     def annotate_utilization(self):
-        from .models import VLAN
+        """
+        Annotate the utilization of each IPRange as a percentage. Mirrors IPRange.utilization.
+        """
+        child_ips_count = (
+            'SELECT COUNT(DISTINCT HOST(U0."address")) FROM "ipam_ipaddress" U0 '
+            'WHERE COALESCE(U0."vrf_id", 0) = COALESCE("ipam_iprange"."vrf_id", 0) '
+            'AND U0."address" >= "ipam_iprange"."start_address" AND U0."address" <= "ipam_iprange"."end_address"'
+        )
+
+        return self.annotate(
+            utilization=RawSQL(
+                f'CASE WHEN "ipam_iprange"."mark_utilized" THEN 100::float8 '
+                f'ELSE LEAST(({child_ips_count}) * 100::float8 / "ipam_iprange"."size", 100) END',
+                ()
+            )
+        )
+
+    def update_utilization(self):
+        """
+        Recalculate and save the utilization of each IPRange.
+        """
+        return self.annotate_utilization().update(_utilization=F('utilization'))
 
+
+class VLANGroupQuerySet(RestrictedQuerySet):
+
+    def annotate_utilization(self):
+        """
+        Annotate the utilization of each VLANGroup as a percentage, derived from its cached VLAN count.
+        """
         return self.annotate(
-            vlan_count=count_related(VLAN, 'group'),
             utilization=Round(F('vlan_count') * 100.0 / F('_total_vlan_ids'), 2)
         )
 
@@ -1,52 +1,142 @@
+import netaddr
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 from dcim.models import Device
 from virtualization.models import VirtualMachine
-from .models import IPAddress, Prefix
+from .choices import PrefixStatusChoices
+from .models import IPAddress, IPRange, Prefix
+from .utils import prefix_hierarchy_queue, update_utilization
 
 
-def update_parents_children(prefix):
+def shift_hierarchy(vrf_id, prefix, delta, exclude_pk=None):
     """
-    Update depth on prefix & containing prefixes
+    Account for the addition (delta=1) or removal (delta=-1) of a Prefix within the hierarchy of the specified VRF:
+    Increment or decrement the child count of each containing prefix, and the depth of each contained prefix.
     """
-    parents = prefix.get_parents(include_self=True).annotate_hierarchy()
-    for parent in parents:
-        parent._children = parent.hierarchy_children
-    Prefix.objects.bulk_update(parents, ['_children'], batch_size=100)
+    prefixes = Prefix.objects.filter(vrf_id=vrf_id).exclude(pk=exclude_pk)
+    # Values are bounded at zero in case the hierarchy is stale (e.g. following a bulk_create())
+    prefixes.filter(prefix__net_contains=prefix).update(_children=Greatest(F('_children') + delta, 0))
 
+    # Depth reflects the number of *distinct* containing prefixes, so it changes only if no duplicate remains
+    if not prefixes.filter(prefix=prefix).exists():
+        prefixes.filter(prefix__net_contained=prefix).update(_depth=Greatest(F('_depth') + delta, 0))
 
-def update_children_depth(prefix):
+
+def update_hierarchy(prefix):
     """
-    Update children count on prefix & contained prefixes
+    Update the depth and child count of a single prefix.
     """
-    children = prefix.get_children(include_self=True).annotate_hierarchy()
-    for child in children:
-        child._depth = child.hierarchy_depth
-    Prefix.objects.bulk_update(children, ['_depth'], batch_size=100)
+    prefixes = Prefix.objects.filter(vrf_id=prefix.vrf_id)
+    prefix._depth = prefixes.filter(prefix__net_contains=prefix.prefix).values('prefix').distinct().count()
+    prefix._children = prefixes.filter(prefix__net_contained=prefix.prefix).count()
+    Prefix.objects.filter(pk=prefix.pk).update(_depth=prefix._depth, _children=prefix._children)
+
+
+def update_container_utilization(vrf_id, prefix):
+    """
+    Recalculate the utilization of all container Prefixes which contain the specified prefix within a VRF.
+    """
+    update_utilization(Prefix.objects.filter(
+        vrf_id=vrf_id,
+        prefix__net_contains=prefix,
+        status=PrefixStatusChoices.STATUS_CONTAINER
+    ))
+
+
+def update_address_utilization(vrf_id, address):
+    """
+    Recalculate the utilization of all non-container Prefixes and IPRanges which contain the specified IP address
+    within a VRF.
+    """
+    address = netaddr.IPNetwork(address)
+    update_utilization(Prefix.objects.filter(
+        vrf_id=vrf_id,
+        prefix__net_contains_or_equals=str(address.ip)
+    ).exclude(
+        status=PrefixStatusChoices.STATUS_CONTAINER
+    ))
+    update_utilization(IPRange.objects.filter(
+        vrf_id=vrf_id,
+        start_address__lte=address,
+        end_address__gte=address
+    ))
 
 
 @receiver(post_save, sender=Prefix)
 def handle_prefix_saved(instance, created, **kwargs):
 
+    # Recalculate the utilization of the prefix itself (discarding the stale cached value on the instance)
+    update_utilization(Prefix.objects.filter(pk=instance.pk))
+    instance._utilization = None
+
     # Prefix has changed (or new instance has been created)
     if created or instance.vrf_id != instance._vrf_id or instance.prefix != instance._prefix:
 
-        update_parents_children(instance)
-        update_children_depth(instance)
+        # Recalculate the utilization of any containers in which the prefix was or is now located
+        if not created:
+            update_container_utilization(instance._vrf_id, instance._prefix)
+        update_container_utilization(instance.vrf_id, instance.prefix)
+
+        # Hierarchy maintenance has been deferred
+        if (deferred_vrfs := prefix_hierarchy_queue.get()) is not None:
+            deferred_vrfs.add(instance.vrf_id)
+            if not created:
+                deferred_vrfs.add(instance._vrf_id)
+            return
 
-        # If this is not a new prefix, clean up parent/children of previous prefix
+        # If this is not a new prefix, remove the previous prefix from the hierarchy
         if not created:
-            old_prefix = Prefix(vrf_id=instance._vrf_id, prefix=instance._prefix)
-            update_parents_children(old_prefix)
-            update_children_depth(old_prefix)
+            shift_hierarchy(instance._vrf_id, instance._prefix, -1, exclude_pk=instance.pk)
+
+        shift_hierarchy(instance.vrf_id, instance.prefix, 1, exclude_pk=instance.pk)
+        update_hierarchy(instance)
 
 
 @receiver(post_delete, sender=Prefix)
 def handle_prefix_deleted(instance, **kwargs):
+    update_container_utilization(instance.vrf_id, instance.prefix)
+
+    # Hierarchy maintenance has been deferred
+    if (deferred_vrfs := prefix_hierarchy_queue.get()) is not None:
+        deferred_vrfs.add(instance.vrf_id)
+        return
+
+    shift_hierarchy(instance.vrf_id, instance.prefix, -1, exclude_pk=instance.pk)
+
+
+@receiver(post_save, sender=IPRange)
+def handle_iprange_saved(instance, created, **kwargs):
+    changed = instance.vrf_id != instance._original_vrf_id or instance.start_address != instance._original_start_address
+
+    # Recalculate the utilization of the range itself (which contains its own start address), and of any prefixes in
+    # which it was or is now located
+    if not created and changed:
+        update_address_utilization(instance._original_vrf_id, instance._original_start_address)
+    update_address_utilization(instance.vrf_id, instance.start_address)
+    instance._utilization = None
+
+
+@receiver(post_delete, sender=IPRange)
+def handle_iprange_deleted(instance, **kwargs):
+    update_address_utilization(instance.vrf_id, instance.start_address)
+
+
+@receiver(post_save, sender=IPAddress)
+def handle_ipaddress_saved(instance, created, **kwargs):
+
+    # Recalculate the utilization of any prefixes and ranges in which the IP address was or is now located
+    if created or instance.vrf_id != instance._original_vrf_id or instance.address != instance._original_address:
+        if not created:
+            update_address_utilization(instance._original_vrf_id, instance._original_address)
+        update_address_utilization(instance.vrf_id, instance.address)
+
 
-    update_parents_children(instance)
-    update_children_depth(instance)
+@receiver(post_delete, sender=IPAddress)
+def handle_ipaddress_deleted(instance, **kwargs):
+    update_address_utilization(instance.vrf_id, instance.address)
 
 
 @receiver(pre_delete, sender=IPAddress)
@@ -52,7 +52,6 @@ class VLANGroupTable(TenancyColumnsMixin, NetBoxTable):
         verbose_name=_('VLANs')
     )
     utilization = columns.UtilizationColumn(
-        orderable=False,
         verbose_name=_('Utilization')
     )
     tags = columns.TagColumn(
@@ -92,6 +92,24 @@ class ASNRangeTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 10)
 
+    def test_list_available_asns_paginated(self):
+        """
+        Test retrieval of pages of available ASNs within a large (4-byte) parent range.
+        """
+        rir = RIR.objects.first()
+        asnrange = ASNRange.objects.create(name='Range 1', slug='range-1', rir=rir, start=65536, end=4294967294)
+        ASN.objects.bulk_create([ASN(asn=asn, rir=rir) for asn in (65537, 65538, 65540)])
+        url = reverse('ipam-api:asnrange-available-asns', kwargs={'pk': asnrange.pk})
+        self.add_permissions('ipam.view_asnrange', 'ipam.view_asn')
+
+        response = self.client.get(f'{url}?limit=3', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([asn['asn'] for asn in response.data], [65536, 65539, 65541])
+
+        response = self.client.get(f'{url}?limit=2&offset=4294901755', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual([asn['asn'] for asn in response.data], [4294967294])
+
     def test_create_single_available_asn(self):
         """
         Test creation of the first available ASN within a range.
@@ -732,6 +750,111 @@ class IPAddressTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
 
 
+class IPAllocationTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        vrf = VRF.objects.create(name='VRF 1')
+        Prefix.objects.create(prefix=IPNetwork('192.0.2.0/24'), vrf=vrf, is_pool=True)
+        Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        IPRange.objects.create(start_address=IPNetwork('198.51.100.1/24'), end_address=IPNetwork('198.51.100.4/24'))
+
+    def test_allocate(self):
+        """
+        Test the allocation of IP addresses and child prefixes from multiple parents in a single request.
+        """
+        prefix1 = Prefix.objects.get(prefix='192.0.2.0/24')
+        prefix2 = Prefix.objects.get(prefix='10.0.0.0/24')
+        iprange = IPRange.objects.first()
+        url = reverse('ipam-api:allocate')
+        self.add_permissions('ipam.view_prefix', 'ipam.view_iprange', 'ipam.add_ipaddress', 'ipam.add_prefix')
+
+        data = [
+            {'prefix': prefix1.pk, 'count': 2, 'data': {'description': 'Allocated'}},
+            {'ip_range': iprange.pk, 'count': 3},
+            {'prefix': prefix1.pk, 'prefix_length': 28, 'count': 2},
+            {'prefix': prefix2.pk},
+        ]
+        response = self.client.post(url, data, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [[obj['address'] for obj in response.data[0]], [obj['address'] for obj in response.data[1]]],
+            [['192.0.2.0/24', '192.0.2.1/24'], ['198.51.100.1/24', '198.51.100.2/24', '198.51.100.3/24']]
+        )
+        self.assertEqual(response.data[0][0]['vrf']['id'], prefix1.vrf.pk)
+        self.assertEqual(response.data[0][0]['description'], 'Allocated')
+        self.assertEqual([obj['prefix'] for obj in response.data[2]], ['192.0.2.0/28', '192.0.2.16/28'])
+        self.assertEqual(response.data[2][0]['vrf']['id'], prefix1.vrf.pk)
+        self.assertEqual(response.data[3][0]['address'], '10.0.0.1/24')
+
+        # Subsequent allocations continue from the first available IP
+        response = self.client.post(url, {'prefix': prefix1.pk}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(response.data[0][0]['address'], '192.0.2.2/24')
+
+    def test_allocate_insufficient(self):
+        """
+        Test that no objects are created if any allocation cannot be satisfied.
+        """
+        prefix = Prefix.objects.get(prefix='192.0.2.0/24')
+        iprange = IPRange.objects.first()
+        url = reverse('ipam-api:allocate')
+        self.add_permissions('ipam.view_prefix', 'ipam.view_iprange', 'ipam.add_ipaddress')
+
+        data = [
+            {'prefix': prefix.pk, 'count': 2},
+            {'ip_range': iprange.pk, 'count': 5},
+        ]
+        response = self.client.post(url, data, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_409_CONFLICT)
+        self.assertIn('detail', response.data)
+        self.assertFalse(IPAddress.objects.exists())
+
+    def test_allocate_invalid(self):
+        prefix = Prefix.objects.get(prefix='192.0.2.0/24')
+        iprange = IPRange.objects.first()
+        url = reverse('ipam-api:allocate')
+        self.add_permissions('ipam.view_prefix', 'ipam.view_iprange', 'ipam.add_ipaddress')
+
+        for data in (
+            {'count': 1},
+            {'prefix': prefix.pk, 'ip_range': iprange.pk},
+            {'ip_range': iprange.pk, 'prefix_length': 30},
+            {'prefix': prefix.pk, 'prefix_length': 33},
+        ):
+            response = self.client.post(url, data, format='json', **self.header)
+            self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
+    def test_allocate_without_permission(self):
+        prefix = Prefix.objects.get(prefix='192.0.2.0/24')
+        url = reverse('ipam-api:allocate')
+        self.add_permissions('ipam.view_prefix', 'ipam.add_ipaddress')
+
+        # Adding prefixes is not permitted
+        response = self.client.post(url, {'prefix': prefix.pk, 'prefix_length': 28}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Prefix.objects.count(), 2)
+
+
+class IPAMConflictsTest(APITestCase):
+
+    def test_enqueue(self):
+        url = reverse('ipam-api:conflicts')
+        self.add_permissions('ipam.view_ipaddress', 'ipam.view_prefix', 'ipam.view_iprange')
+
+        response = self.client.post(url, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'IPAM Conflicts')
+        self.assertEqual(response.data['status']['value'], 'pending')
+
+    def test_enqueue_without_permission(self):
+        url = reverse('ipam-api:conflicts')
+        self.add_permissions('ipam.view_ipaddress', 'ipam.view_prefix')
+
+        response = self.client.post(url, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+
+
 class FHRPGroupTest(APIViewTestCases.APIViewTestCase):
     model = FHRPGroup
     brief_fields = ['description', 'display', 'group_id', 'id', 'protocol', 'url']
@@ -929,6 +1052,10 @@ class VLANGroupTest(APIViewTestCases.APIViewTestCase):
         response = self.client.get(f'{url}?limit=10', **self.header)
         self.assertEqual(len(response.data), 10)
 
+        # Retrieve the next page of available VLANs
+        response = self.client.get(f'{url}?limit=10&offset=10', **self.header)
+        self.assertEqual([vlan['vid'] for vlan in response.data], list(range(110, 120)))
+
     def test_create_single_available_vlan(self):
         """
         Test the creation of a single available VLAN.
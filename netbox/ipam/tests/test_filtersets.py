@@ -813,6 +813,19 @@ class PrefixTestCase(TestCase, ChangeLoggedFilterSetTests):
         params = {'children__gt': '0'}
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
 
+    def test_utilization(self):
+        params = {'utilization__gte': [100]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+        params = {'utilization__lt': [100]}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 8)
+
+    def test_duplicate(self):
+        Prefix.objects.create(prefix='10.0.0.0/24')
+        params = {'duplicate': 'true'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+        params = {'duplicate': 'false'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 9)
+
     def test_mask_length(self):
         params = {'mask_length': [24]}
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 4)
@@ -1096,6 +1109,16 @@ class IPRangeTestCase(TestCase, ChangeLoggedFilterSetTests):
         params = {'mark_populated': 'false'}
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 6)
 
+    def test_overlapping(self):
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.1.150/24'),
+            end_address=IPNetwork('10.0.1.250/24')
+        )
+        params = {'overlapping': 'true'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 2)
+        params = {'overlapping': 'false'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 7)
+
 
 class IPAddressTestCase(TestCase, ChangeLoggedFilterSetTests):
     queryset = IPAddress.objects.all()
@@ -1416,6 +1439,12 @@ class IPAddressTestCase(TestCase, ChangeLoggedFilterSetTests):
         params = {'assigned_to_interface': 'false'}
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 6)
 
+    def test_duplicate(self):
+        params = {'duplicate': 'true'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 4)
+        params = {'duplicate': 'false'}
+        self.assertEqual(self.filterset(params, self.queryset).qs.count(), 8)
+
     def test_status(self):
         params = {'status': [PrefixStatusChoices.STATUS_DEPRECATED, PrefixStatusChoices.STATUS_RESERVED]}
         self.assertEqual(self.filterset(params, self.queryset).qs.count(), 4)
@@ -0,0 +1,47 @@
+from django.test import TestCase
+from netaddr import IPNetwork
+
+from core.choices import JobStatusChoices
+from ipam.jobs import IPAMConflictsJob
+from ipam.models import *
+
+
+class IPAMConflictsJobTest(TestCase):
+
+    def test_ipam_conflicts(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        ips = IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('192.0.2.1/24')),
+            IPAddress(address=IPNetwork('192.0.2.1/24')),
+            IPAddress(address=IPNetwork('192.0.2.1/24'), vrf=vrf),
+        ))
+        prefixes = Prefix.objects.bulk_create((
+            Prefix(prefix=IPNetwork('192.0.2.0/24'), vrf=vrf),
+            Prefix(prefix=IPNetwork('192.0.2.0/24'), vrf=vrf),
+            Prefix(prefix=IPNetwork('198.51.100.0/24'), vrf=vrf),
+            Prefix(prefix=IPNetwork('198.51.100.0/24'), vrf=vrf),
+        ))
+        ranges = (
+            IPRange.objects.create(start_address=IPNetwork('192.0.2.1/24'), end_address=IPNetwork('192.0.2.100/24')),
+            IPRange.objects.create(start_address=IPNetwork('192.0.2.10/24'), end_address=IPNetwork('192.0.2.20/24')),
+            IPRange.objects.create(start_address=IPNetwork('192.0.2.50/24'), end_address=IPNetwork('192.0.2.150/24')),
+            IPRange.objects.create(start_address=IPNetwork('192.0.2.200/24'), end_address=IPNetwork('192.0.2.210/24')),
+            IPRange.objects.create(start_address=IPNetwork('192.0.2.205/24'), end_address=IPNetwork('192.0.2.250/24')),
+        )
+
+        job = IPAMConflictsJob.enqueue(immediate=True)
+
+        self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(job.data, {
+            'ip_addresses': [
+                {'vrf': None, 'address': '192.0.2.1', 'ip_addresses': [ips[0].pk, ips[1].pk]},
+            ],
+            'prefixes': [
+                {'vrf': vrf.pk, 'prefix': '192.0.2.0/24', 'prefixes': [prefixes[0].pk, prefixes[1].pk]},
+                {'vrf': vrf.pk, 'prefix': '198.51.100.0/24', 'prefixes': [prefixes[2].pk, prefixes[3].pk]},
+            ],
+            'ip_ranges': [
+                {'vrf': None, 'ip_ranges': [ranges[0].pk, ranges[1].pk, ranges[2].pk]},
+                {'vrf': None, 'ip_ranges': [ranges[3].pk, ranges[4].pk]},
+            ],
+        })
@@ -1,12 +1,19 @@
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.test import TestCase, override_settings
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+import netaddr
 from netaddr import IPNetwork, IPSet
 from utilities.data import string_to_ranges
 
 from dcim.models import Site, SiteGroup
 from ipam.choices import *
 from ipam.models import *
+from ipam.utils import (
+    allocation_lock, defer_prefix_hierarchy, defer_utilization, get_allocation_lock_id, get_available_ip_ranges,
+    get_duplicate_ip_addresses, get_duplicate_prefixes, get_overlapping_ip_ranges, rebuild_prefixes,
+)
+from netbox.constants import ADVISORY_LOCK_KEYS
 
 
 class TestAggregate(TestCase):
@@ -37,6 +44,30 @@ class TestAggregate(TestCase):
         ))
         self.assertEqual(aggregate.get_utilization(), 100)
 
+    def test_annotate_utilization(self):
+        rir = RIR.objects.create(name='RIR 1', slug='rir-1')
+        vrf = VRF.objects.create(name='VRF 1')
+        Aggregate.objects.bulk_create((
+            Aggregate(prefix=IPNetwork('10.0.0.0/8'), rir=rir),
+            Aggregate(prefix=IPNetwork('172.16.0.0/12'), rir=rir),
+            Aggregate(prefix=IPNetwork('2001:db8::/32'), rir=rir),
+        ))
+        Prefix.objects.bulk_create((
+            # Nested & duplicate prefixes are counted once
+            Prefix(prefix=IPNetwork('10.0.0.0/9')),
+            Prefix(prefix=IPNetwork('10.0.0.0/12')),
+            Prefix(prefix=IPNetwork('10.0.0.0/12'), vrf=vrf),
+            Prefix(prefix=IPNetwork('10.128.0.0/10'), vrf=vrf),
+            Prefix(prefix=IPNetwork('2001:db8::/34')),
+        ))
+
+        for aggregate in Aggregate.objects.annotate_utilization():
+            self.assertAlmostEqual(
+                aggregate.utilization,
+                Aggregate.objects.get(pk=aggregate.pk).get_utilization(),
+                msg=str(aggregate)
+            )
+
 
 class TestIPRange(TestCase):
 
@@ -87,6 +118,26 @@ class TestIPRange(TestCase):
             )
             iprange_4_198_201.clean()
 
+    def test_get_overlapping_ip_ranges(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        ranges = [
+            IPRange.objects.create(start_address=IPNetwork(start), end_address=IPNetwork(end), vrf=vrf)
+            for start, end, vrf in (
+                ('192.0.2.1/24', '192.0.2.100/24', None),
+                ('192.0.2.10/24', '192.0.2.20/24', None),
+                ('192.0.2.50/24', '192.0.2.150/24', None),
+                ('192.0.2.200/24', '192.0.2.250/24', None),
+                ('192.0.2.10/24', '192.0.2.20/24', vrf),
+                ('192.0.2.20/24', '192.0.2.30/24', vrf),
+                ('192.0.2.31/24', '192.0.2.40/24', vrf),
+            )
+        ]
+
+        self.assertListEqual(
+            list(get_overlapping_ip_ranges().values_list('pk', flat=True)),
+            [ranges[4].pk, ranges[5].pk, ranges[0].pk, ranges[1].pk, ranges[2].pk]
+        )
+
 
 class TestPrefix(TestCase):
 
@@ -100,6 +151,22 @@ class TestPrefix(TestCase):
 
         self.assertSetEqual(set(duplicate_prefix_pks), {prefixes[1].pk, prefixes[2].pk})
 
+    def test_get_duplicate_prefixes(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        prefixes = Prefix.objects.bulk_create((
+            Prefix(prefix=IPNetwork('192.0.2.0/24')),
+            Prefix(prefix=IPNetwork('192.0.2.0/24')),
+            Prefix(prefix=IPNetwork('192.0.2.0/24'), vrf=vrf),
+            Prefix(prefix=IPNetwork('192.0.2.0/25'), vrf=vrf),
+            Prefix(prefix=IPNetwork('192.0.2.0/25'), vrf=vrf),
+            Prefix(prefix=IPNetwork('198.51.100.0/24')),
+        ))
+
+        self.assertListEqual(
+            list(get_duplicate_prefixes().values_list('pk', flat=True)),
+            [prefixes[3].pk, prefixes[4].pk, prefixes[0].pk, prefixes[1].pk]
+        )
+
     def test_get_child_prefixes(self):
         vrfs = VRF.objects.bulk_create((
             VRF(name='VRF 1'),
@@ -238,6 +305,57 @@ class TestPrefix(TestCase):
 
         self.assertEqual(available_ips, missing_ips)
 
+    def test_get_available_ip_ranges(self):
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('10.0.0.0/24')),  # Network address
+            IPAddress(address=IPNetwork('10.0.0.5/24')),
+            IPAddress(address=IPNetwork('10.0.0.5/32')),  # Duplicate host address
+            IPAddress(address=IPNetwork('10.0.0.6/24')),
+            IPAddress(address=IPNetwork('10.0.0.20/24')),
+            IPAddress(address=IPNetwork('10.0.0.30/24')),
+            IPAddress(address=IPNetwork('10.0.0.254/24')),
+        ))
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.10/24'),
+            end_address=IPNetwork('10.0.0.25/24'),
+            mark_populated=True
+        )
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.100/24'),
+            end_address=IPNetwork('10.0.0.200/24')
+        )
+        expected_ranges = [
+            netaddr.IPRange('10.0.0.1', '10.0.0.4'),
+            netaddr.IPRange('10.0.0.7', '10.0.0.9'),
+            netaddr.IPRange('10.0.0.26', '10.0.0.29'),
+            netaddr.IPRange('10.0.0.31', '10.0.0.253'),
+        ]
+        self.assertListEqual(list(parent_prefix.get_available_ip_ranges()), expected_ranges)
+        self.assertEqual(parent_prefix.get_first_available_ip(), '10.0.0.1/24')
+
+        # Retrieve available ranges in multiple chunks
+        available_ranges = get_available_ip_ranges(
+            netaddr.IPAddress('10.0.0.1'),
+            netaddr.IPAddress('10.0.0.254'),
+            child_ips=parent_prefix.get_child_ips(),
+            child_ranges=parent_prefix.get_child_ranges().filter(mark_populated=True),
+            chunk_size=1
+        )
+        self.assertListEqual(list(available_ranges), expected_ranges)
+
+    def test_get_available_ip_ranges_ipv6(self):
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('2001:db8::/64'))
+        IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('2001:db8::5/64')),
+            IPAddress(address=IPNetwork('2001:db8::ffff:ffff:ffff:fff0/64')),
+        ))
+        self.assertListEqual(list(parent_prefix.get_available_ip_ranges()), [
+            netaddr.IPRange('2001:db8::1', '2001:db8::4'),
+            netaddr.IPRange('2001:db8::6', '2001:db8::ffff:ffff:ffff:ffef'),
+            netaddr.IPRange('2001:db8::ffff:ffff:ffff:fff1', '2001:db8::ffff:ffff:ffff:ffff'),
+        ])
+
     def test_get_first_available_prefix(self):
 
         prefixes = Prefix.objects.bulk_create((
@@ -305,6 +423,116 @@ class TestPrefix(TestCase):
         )
         self.assertEqual(prefix.get_utilization(), 64 / 254 * 100)  # ~25% utilization
 
+    def test_annotate_utilization(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        Prefix.objects.bulk_create((
+            Prefix(prefix=IPNetwork('10.0.0.0/16'), status=PrefixStatusChoices.STATUS_CONTAINER),
+            Prefix(prefix=IPNetwork('10.0.0.0/16'), status=PrefixStatusChoices.STATUS_CONTAINER, vrf=vrf),
+            Prefix(prefix=IPNetwork('10.0.0.0/24')),
+            Prefix(prefix=IPNetwork('10.0.0.0/24'), vrf=vrf),
+            Prefix(prefix=IPNetwork('10.0.0.0/25')),
+            Prefix(prefix=IPNetwork('10.0.1.0/24'), is_pool=True),
+            Prefix(prefix=IPNetwork('10.0.2.0/24'), mark_utilized=True),
+            Prefix(prefix=IPNetwork('10.0.3.0/31')),
+            Prefix(prefix=IPNetwork('10.1.0.0/16'), status=PrefixStatusChoices.STATUS_CONTAINER),
+            Prefix(prefix=IPNetwork('2001:db8::/64')),
+        ))
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.33/24'),
+            end_address=IPNetwork('10.0.0.64/24'),
+            mark_utilized=True
+        )
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.1.1/24'),
+            end_address=IPNetwork('10.0.1.10/24')
+        )
+        IPAddress.objects.bulk_create((
+            *[IPAddress(address=IPNetwork(f'10.0.0.{i}/24')) for i in range(1, 51)],
+            # Duplicate addresses and addresses in other VRFs
+            IPAddress(address=IPNetwork('10.0.0.1/32')),
+            IPAddress(address=IPNetwork('10.0.0.2/24'), vrf=vrf),
+            *[IPAddress(address=IPNetwork(f'10.0.1.{i}/24')) for i in range(1, 21)],
+            IPAddress(address=IPNetwork('10.0.3.0/31')),
+            IPAddress(address=IPNetwork('2001:db8::1/64')),
+        ))
+
+        for prefix in Prefix.objects.annotate_utilization():
+            self.assertAlmostEqual(
+                prefix.utilization,
+                Prefix.objects.get(pk=prefix.pk).calculate_utilization(),
+                msg=f'{prefix} (VRF {prefix.vrf})'
+            )
+
+    def test_cached_utilization(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        container = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/16'), status=PrefixStatusChoices.STATUS_CONTAINER)
+        prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        iprange = IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.101/24'),
+            end_address=IPNetwork('10.0.0.200/24')
+        )
+
+        def assertUtilization(obj, value):
+            obj.refresh_from_db()
+            self.assertAlmostEqual(obj._utilization, value, msg=str(obj))
+
+        assertUtilization(container, 1 / 256 * 100)
+        assertUtilization(prefix, 0)
+        assertUtilization(iprange, 0)
+
+        # Create IP addresses within the prefix and range
+        for i in range(1, 5):
+            IPAddress.objects.create(address=IPNetwork(f'10.0.0.{i}/24'))
+        ipaddress = IPAddress.objects.create(address=IPNetwork('10.0.0.101/24'))
+        assertUtilization(prefix, 5 / 254 * 100)
+        assertUtilization(iprange, 1)
+
+        # Move an IP address to another VRF
+        ipaddress.vrf = vrf
+        ipaddress.save()
+        assertUtilization(prefix, 4 / 254 * 100)
+        assertUtilization(iprange, 0)
+
+        # Mark the range as utilized
+        iprange.mark_utilized = True
+        iprange.save()
+        assertUtilization(prefix, 104 / 254 * 100)
+        assertUtilization(iprange, 100)
+
+        # Delete the range and an IP address
+        iprange.delete()
+        IPAddress.objects.filter(address='10.0.0.1/24').delete()
+        assertUtilization(prefix, 3 / 254 * 100)
+
+        # Create and modify child prefixes within the container
+        child_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.1.0/24'))
+        assertUtilization(container, 2 / 256 * 100)
+        child_prefix.prefix = IPNetwork('10.1.0.0/24')
+        child_prefix.save()
+        assertUtilization(container, 1 / 256 * 100)
+        prefix.delete()
+        assertUtilization(container, 0)
+
+        # Mark the container as utilized
+        container.mark_utilized = True
+        container.save()
+        assertUtilization(container, 100)
+        self.assertEqual(container.get_utilization(), 100)
+
+    def test_defer_utilization(self):
+        prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+
+        with defer_utilization():
+            for i in range(1, 11):
+                IPAddress.objects.create(address=IPNetwork(f'10.0.0.{i}/24'))
+
+            # Utilization has not yet been updated
+            prefix.refresh_from_db()
+            self.assertEqual(prefix._utilization, 0)
+
+        prefix.refresh_from_db()
+        self.assertAlmostEqual(prefix._utilization, 10 / 254 * 100)
+
     #
     # Uniqueness enforcement tests
     #
@@ -530,6 +758,132 @@ class TestPrefixHierarchy(TestCase):
         self.assertEqual(prefixes[3]._depth, 2)
         self.assertEqual(prefixes[3]._children, 0)
 
+    def assertHierarchyValid(self):
+        for prefix in Prefix.objects.annotate_hierarchy():
+            self.assertEqual(prefix._depth, prefix.hierarchy_depth, msg=f'Depth of {prefix}')
+            self.assertEqual(prefix._children, prefix.hierarchy_children, msg=f'Children of {prefix}')
+
+    def test_update_prefix_nested(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        Prefix(prefix='10.0.0.0/24').save()
+        Prefix(prefix='10.0.0.0/25').save()
+        Prefix(prefix='10.0.0.0/24', vrf=vrf).save()
+        self.assertHierarchyValid()
+        prefix = Prefix.objects.get(prefix='10.0.0.0/16')
+
+        # Move 10.0.0.0/16 to 10.0.0.0/12, and then to 10.0.0.0/26
+        prefix.prefix = IPNetwork('10.0.0.0/12')
+        prefix.save()
+        self.assertHierarchyValid()
+        prefix = Prefix.objects.get(pk=prefix.pk)
+        prefix.prefix = IPNetwork('10.0.0.0/26')
+        prefix.save()
+        self.assertHierarchyValid()
+
+        # Move 10.0.0.0/26 to a VRF
+        prefix = Prefix.objects.get(pk=prefix.pk)
+        prefix.vrf = vrf
+        prefix.save()
+        self.assertHierarchyValid()
+
+        # Delete one of the duplicate 10.0.0.0/24 prefixes
+        Prefix.objects.filter(prefix='10.0.0.0/24', vrf__isnull=True).first().delete()
+        self.assertHierarchyValid()
+
+    def test_defer_prefix_hierarchy(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        with defer_prefix_hierarchy():
+            Prefix(prefix='10.0.0.0/12').save()
+            Prefix(prefix='10.0.0.0/20').save()
+            Prefix(prefix='10.0.0.0/16', vrf=vrf).save()
+            Prefix.objects.get(prefix='2001:db8::/40').delete()
+
+            # Hierarchy has not yet been updated
+            self.assertEqual(Prefix.objects.get(prefix='10.0.0.0/8')._children, 2)
+
+        self.assertHierarchyValid()
+        self.assertEqual(Prefix.objects.get(prefix='10.0.0.0/8')._children, 4)
+        self.assertEqual(Prefix.objects.get(prefix='10.0.0.0/24')._depth, 4)
+
+    def test_rebuild_prefixes(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        Prefix(prefix='10.0.0.0/16', vrf=vrf).save()
+        Prefix(prefix='10.0.0.0/24', vrf=vrf).save()
+        Prefix.objects.update(_depth=0, _children=0)
+
+        self.assertEqual(rebuild_prefixes(None), Prefix.objects.filter(vrf__isnull=True).count())
+        self.assertEqual(rebuild_prefixes(vrf.pk), 2)
+        self.assertHierarchyValid()
+
+
+class TestAllocationLock(TransactionTestCase):
+    """
+    Locks taken within a transaction are held until it has been committed, so these tests must run outside of one.
+    """
+    serialized_rollback = True
+
+    def get_advisory_locks(self):
+        """
+        Return the lock ID and mode of each advisory lock held by the current session.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT classid, objid, objsubid, mode FROM pg_locks "
+                "WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+            )
+            return {
+                # A 64-bit key is split across classid and objid (objsubid 1); a pair of 32-bit keys is not (2)
+                (objid if objsubid == 1 else (classid, objid - 2 ** 32 if objid >= 2 ** 31 else objid), mode)
+                for classid, objid, objsubid, mode in cursor.fetchall()
+            }
+
+    def test_hierarchy_lock(self):
+        global_locks = {
+            (ADVISORY_LOCK_KEYS['available-ips'], 'ExclusiveLock'),
+            (ADVISORY_LOCK_KEYS['available-prefixes'], 'ExclusiveLock'),
+        }
+        Prefix.objects.create(prefix=IPNetwork('10.0.0.0/8'))
+
+        # Adding a child prefix does not change the root of any address
+        with transaction.atomic():
+            child = Prefix.objects.create(prefix=IPNetwork('10.1.0.0/16'))
+            self.assertEqual(self.get_advisory_locks(), set())
+
+        # Adding a root prefix locks the entire address space until the transaction has been committed
+        with transaction.atomic():
+            root = Prefix.objects.create(prefix=IPNetwork('192.168.0.0/16'))
+            self.assertEqual(self.get_advisory_locks(), global_locks)
+        self.assertEqual(self.get_advisory_locks(), set())
+
+        # As does moving a prefix out of its root, or deleting a root prefix
+        with transaction.atomic():
+            child.prefix = IPNetwork('172.16.0.0/16')
+            child.save()
+            self.assertEqual(self.get_advisory_locks(), global_locks)
+        with transaction.atomic():
+            root.delete()
+            self.assertEqual(self.get_advisory_locks(), global_locks)
+
+    def test_allocation_lock(self):
+        Prefix.objects.create(prefix=IPNetwork('10.0.0.0/8'))
+        Prefix.objects.create(prefix=IPNetwork('10.1.0.0/16'))
+        Prefix.objects.create(prefix=IPNetwork('192.168.0.0/16'))
+        global_lock_id = ADVISORY_LOCK_KEYS['available-ips']
+
+        # Allocations are scoped to the root prefix, while holding a shared lock on the entire address space
+        with allocation_lock('available-ips', [(None, netaddr.IPAddress('10.1.0.1'), None)]):
+            self.assertEqual(self.get_advisory_locks(), {
+                (global_lock_id, 'ShareLock'),
+                (get_allocation_lock_id('available-ips', None, IPNetwork('10.0.0.0/8')), 'ExclusiveLock'),
+            })
+        self.assertEqual(self.get_advisory_locks(), set())
+
+        # A range spanning root prefixes requires an exclusive lock on the entire address space
+        scopes = [(None, netaddr.IPAddress('10.1.0.1'), netaddr.IPAddress('192.168.0.1'))]
+        with allocation_lock('available-ips', scopes):
+            self.assertEqual(self.get_advisory_locks(), {(global_lock_id, 'ExclusiveLock')})
+        self.assertEqual(self.get_advisory_locks(), set())
+
 
 class TestIPAddress(TestCase):
 
@@ -543,6 +897,24 @@ class TestIPAddress(TestCase):
 
         self.assertSetEqual(set(duplicate_ip_pks), {ips[1].pk, ips[2].pk})
 
+    def test_get_duplicate_ip_addresses(self):
+        vrf = VRF.objects.create(name='VRF 1')
+        ips = IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('192.0.2.1/24')),
+            IPAddress(address=IPNetwork('192.0.2.1/32')),
+            IPAddress(address=IPNetwork('192.0.2.1/24'), vrf=vrf),
+            IPAddress(address=IPNetwork('192.0.2.2/24'), vrf=vrf),
+            IPAddress(address=IPNetwork('192.0.2.2/24'), vrf=vrf, role=IPAddressRoleChoices.ROLE_VIP),
+            IPAddress(address=IPNetwork('192.0.2.3/24'), role=IPAddressRoleChoices.ROLE_VIP),
+            IPAddress(address=IPNetwork('192.0.2.3/24'), role=IPAddressRoleChoices.ROLE_ANYCAST),
+        ))
+
+        # Duplicates which all have a non-unique role (e.g. VIP) are ignored
+        self.assertListEqual(
+            list(get_duplicate_ip_addresses().values_list('pk', flat=True)),
+            [ips[3].pk, ips[4].pk, ips[0].pk, ips[1].pk]
+        )
+
     #
     # Uniqueness enforcement tests
     #
@@ -630,6 +1002,9 @@ class TestVLANGroup(TestCase):
         available_vids = vlangroup.get_available_vids()
         self.assertListEqual(available_vids, list(range(104, 200)))
 
+        available_vids = vlangroup.get_available_vids(offset=10, limit=5)
+        self.assertListEqual(available_vids, list(range(114, 119)))
+
     def test_get_next_available_vid(self):
         vlangroup = VLANGroup.objects.first()
         self.assertEqual(vlangroup.get_next_available_vid(), 104)
@@ -647,6 +1022,29 @@ class TestVLANGroup(TestCase):
         vlan = VLAN(vid=109, name='VLAN 109', group=vlangroup)
         vlan.full_clean()
 
+    def test_vlan_count(self):
+        vlangroup1 = VLANGroup.objects.create(name='VLAN Group 2', slug='vlan-group-2')
+        vlangroup2 = VLANGroup.objects.create(name='VLAN Group 3', slug='vlan-group-3')
+        vlan1 = VLAN.objects.create(name='VLAN 1', vid=1, group=vlangroup1)
+        VLAN.objects.create(name='VLAN 2', vid=2, group=vlangroup1)
+
+        vlangroup1.refresh_from_db()
+        self.assertEqual(vlangroup1.vlan_count, 2)
+        vlangroup1 = VLANGroup.objects.annotate_utilization().get(pk=vlangroup1.pk)
+        self.assertEqual(vlangroup1.utilization, round(2 * 100 / 4094, 2))
+
+        # Move a VLAN to another group
+        vlan1.group = vlangroup2
+        vlan1.save()
+        vlangroup1.refresh_from_db()
+        vlangroup2.refresh_from_db()
+        self.assertEqual(vlangroup1.vlan_count, 1)
+        self.assertEqual(vlangroup2.vlan_count, 1)
+
+        vlan1.delete()
+        vlangroup2.refresh_from_db()
+        self.assertEqual(vlangroup2.vlan_count, 0)
+
     def test_overlapping_vlan(self):
         vlangroup = VLANGroup(
             name='VLAN Group 1',
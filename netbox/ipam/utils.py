@@ -1,20 +1,46 @@
+import heapq
+import zlib
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 import netaddr
 
+from django.db import connections
+from django.db.models import Count, F, Max, Q, RowRange, Window
+from django.db.models.functions import Cast, Lead
 from django.utils.translation import gettext_lazy as _
+from django_pglocks import advisory_lock
 
+from netbox.constants import ADVISORY_LOCK_KEYS
 from .constants import *
-from .models import Prefix, VLAN
+from .fields import IPAddressField
+from .lookups import Host
+from .models import IPAddress, IPRange, Prefix, VLAN
 
 __all__ = (
     'AvailableIPSpace',
     'add_available_vlans',
     'add_requested_prefixes',
+    'allocation_lock',
     'annotate_ip_space',
+    'defer_prefix_hierarchy',
+    'defer_utilization',
+    'get_allocation_lock_id',
+    'get_available_ip_ranges',
+    'get_duplicate_ip_addresses',
+    'get_duplicate_prefixes',
+    'get_overlapping_ip_ranges',
     'get_next_available_prefix',
     'rebuild_prefixes',
+    'update_utilization',
 )
 
+# The IDs of VRFs (or None for the global table) whose prefix hierarchy is to be rebuilt once deferral has ended
+prefix_hierarchy_queue = ContextVar('prefix_hierarchy_queue', default=None)
+
+# The PKs of objects (mapped by model) whose utilization is to be recalculated once deferral has ended
+utilization_queue = ContextVar('utilization_queue', default=None)
+
 
 @dataclass
 class AvailableIPSpace:
@@ -63,17 +89,91 @@ def add_requested_prefixes(parent, prefix_list, show_available=True, show_assign
     return child_prefixes
 
 
-def annotate_ip_space(prefix):
-    # Compile child objects
-    records = []
-    records.extend([
-        (iprange.start_address.ip, iprange) for iprange in prefix.get_child_ranges(mark_populated=True)
-    ])
-    records.extend([
-        (ip.address.ip, ip) for ip in prefix.get_child_ips()
-    ])
-    records = sorted(records, key=lambda x: x[0])
+def get_available_ip_ranges(first_ip, last_ip, child_ips, child_ranges=None, chunk_size=1000):
+    """
+    Yield the available space between two IP addresses (inclusive) as a series of netaddr.IPRanges, in order. The
+    host addresses of the given IPAddresses and the spans of the given IPRanges are considered occupied.
+
+    Gaps between occupied addresses are found by the database, so child objects are never retrieved. Occupied spans
+    are scanned lazily in chunks, so consuming only the first few available ranges requires scanning only the child
+    objects which precede them.
+
+    :param first_ip: The first IP address (a netaddr.IPAddress) to consider
+    :param last_ip: The last IP address to consider
+    :param child_ips: An IPAddress queryset
+    :param child_ranges: An IPRange queryset (optional)
+    :param chunk_size: The number of occupied spans to scan in each query
+    """
+    def as_inet(field_name):
+        return Cast(Host(field_name), output_field=IPAddressField())
+
+    subqueries = [
+        child_ips.order_by().annotate(lo=as_inet('address'), hi=as_inet('address')).values('lo', 'hi').query
+    ]
+    if child_ranges is not None:
+        subqueries.append(
+            child_ranges.order_by().annotate(
+                lo=as_inet('start_address'), hi=as_inet('end_address')
+            ).values('lo', 'hi').query
+        )
+    occupied_sql = []
+    occupied_params = []
+    for subquery in subqueries:
+        subquery_sql, subquery_params = subquery.sql_with_params()
+        occupied_sql.append(f'SELECT lo, hi FROM ({subquery_sql}) occupied')
+        occupied_params.extend(subquery_params)
+
+    # Retrieve the next chunk of occupied spans (in order, following the last span of the previous chunk) and find
+    # each which begins more than one address beyond the highest address occupied by any span preceding it. The
+    # highest address occupied by the previous chunks is passed in, so the window covers only the current chunk.
+    # (Subtracting one from lo is guarded by the comparison to prev_hi, to avoid underflow.)
+    is_gap = 'CASE WHEN prev_hi IS NULL THEN lo > %s::inet WHEN lo > prev_hi THEN lo - 1 > prev_hi ELSE false END'
+    chunk_sql = (
+        f'SELECT HOST(prev_hi), HOST(lo), HOST(hi), {is_gap}, n = total, total FROM ('
+        f'SELECT lo, hi, '
+        f'GREATEST(%s::inet, MAX(hi) OVER (ORDER BY lo, hi ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING)) '
+        f'AS prev_hi, ROW_NUMBER() OVER (ORDER BY lo, hi) AS n, COUNT(*) OVER () AS total FROM ('
+        f'SELECT lo, hi FROM ({" UNION ALL ".join(occupied_sql)}) occupied '
+        f'WHERE hi >= %s::inet AND lo <= %s::inet AND (%s::inet IS NULL OR (lo, hi) > (%s::inet, %s::inet)) '
+        f'ORDER BY lo, hi LIMIT %s'
+        f') spans'
+        f') spans '
+        f'WHERE {is_gap} OR n = total '
+        f'ORDER BY n'
+    )
+
+    # The highest address occupied by any span scanned so far, and the last span scanned
+    max_hi = None
+    last_span = (None, None)
+    with connections[child_ips.db].cursor() as cursor:
+        while True:
+            cursor.execute(chunk_sql, [
+                str(first_ip), max_hi, *occupied_params, str(first_ip), str(last_ip), last_span[0], *last_span,
+                chunk_size, str(first_ip)
+            ])
+            rows = cursor.fetchall()
+            for prev_hi, lo, hi, gap, last, total in rows:
+                if gap:
+                    gap_start = first_ip if prev_hi is None else netaddr.IPAddress(prev_hi) + 1
+                    yield netaddr.IPRange(gap_start, netaddr.IPAddress(lo) - 1)
+                if last:
+                    max_hi = hi if prev_hi is None else str(max(netaddr.IPAddress(prev_hi), netaddr.IPAddress(hi)))
+                    last_span = (lo, hi)
+            if not rows or total < chunk_size:
+                break
+
+    # Include any available space following the last occupied address
+    if max_hi is None:
+        yield netaddr.IPRange(first_ip, last_ip)
+    elif (max_hi := netaddr.IPAddress(max_hi)) < last_ip:
+        yield netaddr.IPRange(max_hi + 1, last_ip)
 
+
+def annotate_ip_space(prefix):
+    """
+    Return all child IP ranges (marked as populated) and IP addresses within a prefix in order, interleaved with
+    AvailableIPSpace records representing the available space between them.
+    """
     # Determine the first & last valid IP addresses in the prefix
     if prefix.family == 4 and prefix.mask_length < 31 and not prefix.is_pool:
         # Ignore the network and broadcast addresses for non-pool IPv4 prefixes larger than /31
@@ -83,106 +183,47 @@ def annotate_ip_space(prefix):
         first_ip_in_prefix = netaddr.IPAddress(prefix.prefix.first)
         last_ip_in_prefix = netaddr.IPAddress(prefix.prefix.last)
 
-    if not records:
-        return [
-            AvailableIPSpace(
-                size=int(last_ip_in_prefix - first_ip_in_prefix + 1),
-                first_ip=f'{first_ip_in_prefix}/{prefix.mask_length}'
-            )
-        ]
-
-    output = []
-    prev_ip = None
-
-    # Account for any available IPs before the first real IP
-    if records[0][0] > first_ip_in_prefix:
-        output.append(AvailableIPSpace(
-            size=int(records[0][0] - first_ip_in_prefix),
-            first_ip=f'{first_ip_in_prefix}/{prefix.mask_length}'
-        ))
-
-    # Add IP ranges & addresses, annotating available space in between records
-    for record in records:
-        if prev_ip:
-            # Annotate available space
-            if (diff := int(record[0]) - int(prev_ip)) > 1:
-                first_skipped = f'{prev_ip + 1}/{prefix.mask_length}'
-                output.append(AvailableIPSpace(
-                    size=diff - 1,
-                    first_ip=first_skipped
-                ))
-
-        output.append(record[1])
-
-        # Update the previous IP address
-        if hasattr(record[1], 'end_address'):
-            prev_ip = record[1].end_address.ip
-        else:
-            prev_ip = record[0]
-
-    # Include any remaining available IPs
-    if prev_ip < last_ip_in_prefix:
-        output.append(AvailableIPSpace(
-            size=int(last_ip_in_prefix - prev_ip),
-            first_ip=f'{prev_ip + 1}/{prefix.mask_length}'
-        ))
-
-    return output
-
-
-def available_vlans_from_range(vlans, vlan_group, vid_range):
-    """
-    Create fake records for all gaps between used VLANs
-    """
-    min_vid = int(vid_range.lower) if vid_range else VLAN_VID_MIN
-    max_vid = int(vid_range.upper) if vid_range else VLAN_VID_MAX
-
-    if not vlans:
-        return [{
-            'vid': min_vid,
-            'vlan_group': vlan_group,
-            'available': max_vid - min_vid
-        }]
-
-    prev_vid = min_vid - 1
-    new_vlans = []
-    for vlan in vlans:
-
-        # Ignore VIDs outside the range
-        if not min_vid <= vlan.vid < max_vid:
-            continue
-
-        # Annotate any available VIDs between the previous (or minimum) VID
-        # and the current VID
-        if vlan.vid - prev_vid > 1:
-            new_vlans.append({
-                'vid': prev_vid + 1,
-                'vlan_group': vlan_group,
-                'available': vlan.vid - prev_vid - 1,
-            })
-
-        prev_vid = vlan.vid
-
-    # Annotate any remaining available VLANs
-    if prev_vid < max_vid - 1:
-        new_vlans.append({
-            'vid': prev_vid + 1,
-            'vlan_group': vlan_group,
-            'available': max_vid - prev_vid - 1,
-        })
-
-    return new_vlans
+    # Retrieve child objects and available space, each ordered by IP address
+    child_ranges = prefix.get_child_ranges(mark_populated=True)
+    child_ips = prefix.get_child_ips()
+    available_space = (
+        (
+            available_range[0],
+            AvailableIPSpace(size=available_range.size, first_ip=f'{available_range[0]}/{prefix.mask_length}')
+        )
+        for available_range in get_available_ip_ranges(
+            first_ip_in_prefix, last_ip_in_prefix, child_ips, child_ranges
+        )
+    )
+    child_ranges = child_ranges.order_by(Cast(Host('start_address'), output_field=IPAddressField()), 'pk')
+    child_ips = child_ips.order_by(Cast(Host('address'), output_field=IPAddressField()), 'pk')
+
+    # Merge the ordered records, placing any ranges before IP addresses with the same starting address
+    records = heapq.merge(
+        ((iprange.start_address.ip, iprange) for iprange in child_ranges),
+        ((ip.address.ip, ip) for ip in child_ips),
+        available_space,
+        key=lambda record: record[0]
+    )
+    return [record for _, record in records]
 
 
 def add_available_vlans(vlans, vlan_group):
     """
     Create fake records for all gaps between used VLANs
     """
-    new_vlans = []
-    for vid_range in vlan_group.vid_ranges:
-        new_vlans.extend(available_vlans_from_range(vlans, vlan_group, vid_range))
+    vlans = list(vlans)
+    vids = sorted(vlan.vid for vlan in vlans)
+    new_vlans = [
+        {
+            'vid': first,
+            'vlan_group': vlan_group,
+            'available': last - first + 1,
+        }
+        for first, last in vlan_group.get_available_vid_ranges(vids)
+    ]
 
-    vlans = list(vlans) + new_vlans
+    vlans = vlans + new_vlans
     vlans.sort(key=lambda v: v.vid if type(v) is VLAN else v['vid'])
 
     return vlans
@@ -190,7 +231,9 @@ def add_available_vlans(vlans, vlan_group):
 
 def rebuild_prefixes(vrf):
     """
-    Rebuild the prefix hierarchy for all prefixes in the specified VRF (or global table).
+    Rebuild the prefix hierarchy for all prefixes in the specified VRF (or global table). Prefixes are streamed from
+    the database in order, and the depth and child count of every prefix are written using a single query. Returns
+    the number of prefixes in the VRF.
     """
     def contains(parent, child):
         return child in parent and child != parent
@@ -205,12 +248,19 @@ def rebuild_prefixes(vrf):
             'children': 0,
         })
 
+    def pop_from_stack():
+        node = stack.pop()
+        for pk in node['pk']:
+            pks.append(pk)
+            depths.append(len(stack))
+            children.append(node['children'])
+
     stack = []
-    update_queue = []
+    pks, depths, children = [], [], []
     prefixes = Prefix.objects.filter(vrf=vrf).values('pk', 'prefix')
 
     # Iterate through all Prefixes in the VRF, growing and shrinking the stack as we go
-    for i, p in enumerate(prefixes):
+    for p in prefixes.iterator(chunk_size=2000):
 
         # Grow the stack if this is a child of the most recent prefix
         if not stack or contains(stack[-1]['prefix'], p['prefix']):
@@ -224,28 +274,152 @@ def rebuild_prefixes(vrf):
         # stack until we reach a parent prefix (or the root)
         else:
             while stack and not contains(stack[-1]['prefix'], p['prefix']):
-                node = stack.pop()
-                for pk in node['pk']:
-                    update_queue.append(
-                        Prefix(pk=pk, _depth=len(stack), _children=node['children'])
-                    )
+                pop_from_stack()
             push_to_stack(p)
 
-        # Flush the update queue once it reaches 100 Prefixes
-        if len(update_queue) >= 100:
-            Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
-            update_queue = []
-
     # Clear out any prefixes remaining in the stack
     while stack:
-        node = stack.pop()
-        for pk in node['pk']:
-            update_queue.append(
-                Prefix(pk=pk, _depth=len(stack), _children=node['children'])
+        pop_from_stack()
+
+    # Update all Prefixes whose depth or child count has changed in a single query
+    if pks:
+        with connections[Prefix.objects.db].cursor() as cursor:
+            cursor.execute(
+                'UPDATE "ipam_prefix" SET "_depth" = V."depth", "_children" = V."children" '
+                'FROM unnest(%s::bigint[], %s::smallint[], %s::bigint[]) AS V("id", "depth", "children") '
+                'WHERE "ipam_prefix"."id" = V."id" '
+                'AND ("ipam_prefix"."_depth", "ipam_prefix"."_children") IS DISTINCT FROM (V."depth", V."children")',
+                (pks, depths, children)
             )
 
-    # Final flush of any remaining Prefixes
-    Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
+    return len(pks)
+
+
+@contextmanager
+def defer_prefix_hierarchy():
+    """
+    Defer maintenance of the prefix hierarchy (the depth and child count of each Prefix) while creating, modifying,
+    or deleting many Prefixes. On exit, the hierarchy is rebuilt once for each VRF in which a Prefix was changed.
+    """
+    if prefix_hierarchy_queue.get() is not None:
+        # Already deferred by an enclosing context
+        yield
+        return
+
+    token = prefix_hierarchy_queue.set(set())
+    try:
+        yield
+    finally:
+        vrf_ids = prefix_hierarchy_queue.get()
+        prefix_hierarchy_queue.reset(token)
+    for vrf_id in vrf_ids:
+        rebuild_prefixes(vrf_id)
+
+
+def update_utilization(queryset):
+    """
+    Recalculate the cached utilization of each Prefix or IPRange in the given QuerySet. If deferred, the objects are
+    instead queued for recalculation once deferral has ended.
+    """
+    if (queue := utilization_queue.get()) is not None:
+        queue.setdefault(queryset.model, set()).update(queryset.values_list('pk', flat=True))
+    else:
+        queryset.update_utilization()
+
+
+@contextmanager
+def defer_utilization():
+    """
+    Defer recalculation of cached utilization while creating, modifying, or deleting many IP objects. On exit, the
+    utilization of each affected Prefix and IPRange is recalculated once.
+    """
+    if utilization_queue.get() is not None:
+        # Already deferred by an enclosing context
+        yield
+        return
+
+    token = utilization_queue.set({})
+    try:
+        yield
+    finally:
+        queue = utilization_queue.get()
+        utilization_queue.reset(token)
+    for model, pks in queue.items():
+        model.objects.filter(pk__in=pks).update_utilization()
+
+
+#
+# Conflict detection
+#
+
+def get_duplicate_ip_addresses(queryset=None):
+    """
+    Return all IPAddresses which share a host address with another IPAddress in the same VRF, ordered such that the
+    members of each set of duplicates are adjacent. A set of duplicates in which every member has a role exempt from
+    unique address enforcement (e.g. anycast) is ignored.
+
+    Duplicates are identified in a single pass over the table (sorted by VRF and host address) using window
+    functions, rather than by querying for the duplicates of each IPAddress in turn.
+    """
+    if queryset is None:
+        queryset = IPAddress.objects.all()
+    host = Cast(Host('address'), output_field=IPAddressField())
+    partition_by = [F('vrf'), host]
+
+    return queryset.annotate(
+        _host=host,
+        _duplicates=Window(Count('pk'), partition_by=partition_by),
+        _unique_duplicates=Window(
+            Count('pk', filter=~Q(role__in=IPADDRESS_ROLES_NONUNIQUE)),
+            partition_by=partition_by
+        ),
+    ).filter(
+        _duplicates__gt=1,
+        _unique_duplicates__gt=0
+    ).order_by('vrf_id', '_host', 'pk')
+
+
+def get_duplicate_prefixes(queryset=None):
+    """
+    Return all Prefixes which share a network with another Prefix in the same VRF, ordered such that the members of
+    each set of duplicates are adjacent.
+    """
+    if queryset is None:
+        queryset = Prefix.objects.all()
+
+    return queryset.annotate(
+        _duplicates=Window(Count('pk'), partition_by=[F('vrf'), F('prefix')]),
+    ).filter(
+        _duplicates__gt=1
+    ).order_by('vrf_id', 'prefix', 'pk')
+
+
+def get_overlapping_ip_ranges(queryset=None):
+    """
+    Return all IPRanges which overlap another IPRange in the same VRF, ordered by VRF and start address.
+
+    Ranges are swept in order of their start addresses: a range overlaps one which precedes it if it starts at or
+    before the greatest end address seen so far, and overlaps the one which follows it if that range starts at or
+    before its own end address.
+    """
+    if queryset is None:
+        queryset = IPRange.objects.all()
+    start = Cast(Host('start_address'), output_field=IPAddressField())
+    end = Cast(Host('end_address'), output_field=IPAddressField())
+    window = {
+        'partition_by': [F('vrf')],
+        'order_by': [F('_start').asc(), F('pk').asc()],
+    }
+
+    return queryset.annotate(
+        _start=start,
+        _end=end,
+    ).annotate(
+        _preceding_end=Window(Max('_end'), frame=RowRange(start=None, end=-1), **window),
+        _next_start=Window(Lead('_start'), **window),
+    ).filter(
+        Q(_preceding_end__gte=F('_start')) | Q(_next_start__lte=F('_end'))
+    ).order_by('vrf_id', '_start', 'pk')
 
 
 def get_next_available_prefix(ipset, prefix_size):
@@ -258,3 +432,73 @@ def get_next_available_prefix(ipset, prefix_size):
             ipset.remove(allocated_prefix)
             return allocated_prefix
     return None
+
+
+def get_allocation_lock_id(key, vrf_id, first, last=None):
+    """
+    Return the ID of the advisory lock which guards allocation (of the kind identified by key) within the specified
+    network or range of addresses in a VRF.
+
+    Any two prefixes are either disjoint or nested, so allocations which may conflict always fall within the same
+    outermost (root) prefix; the lock is therefore scoped to that prefix. Addresses outside of any prefix share a
+    lock for the VRF. Returns None if the range spans more than one root prefix (or none at all), in which case
+    the entire address space must be locked.
+
+    The root prefix may change only while the entire address space is locked (see Prefix.lock_hierarchy()), so the
+    returned ID is reliable only while holding a shared lock on it (see allocation_lock()).
+    """
+    root = Prefix.objects.filter(
+        vrf_id=vrf_id,
+        prefix__net_contains_or_equals=str(first)
+    ).order_by('prefix__net_mask_length').values_list('prefix', flat=True).first()
+    if last is not None and (root is None or netaddr.IPAddress(last) not in root):
+        return None
+
+    # Convert the CRC to a signed 32-bit integer
+    checksum = zlib.crc32(f'{vrf_id}:{root}'.encode())
+    return ADVISORY_LOCK_KEYS[key], checksum - 2 ** 32 if checksum >= 2 ** 31 else checksum
+
+
+def _acquire_root_locks(stack, key, scopes):
+    """
+    Acquire the lock on the root prefix of each scope, pushing each onto the given ExitStack. Returns False (having
+    acquired no locks) if any scope must instead be guarded by a lock on the entire address space.
+    """
+    lock_ids = {get_allocation_lock_id(key, *scope) for scope in scopes}
+    while None not in lock_ids:
+        with ExitStack() as root_locks:
+            # Acquire locks in a consistent order to avoid deadlocks
+            for lock_id in sorted(lock_ids):
+                root_locks.enter_context(advisory_lock(lock_id))
+
+            # Re-check the root of each scope now that it has been locked, in case the hierarchy was modified
+            # without locking (e.g. by a bulk update)
+            current_lock_ids = {get_allocation_lock_id(key, *scope) for scope in scopes}
+            if current_lock_ids == lock_ids:
+                stack.push(root_locks.pop_all())
+                return True
+        lock_ids = current_lock_ids
+    return False
+
+
+@contextmanager
+def allocation_lock(key, scopes):
+    """
+    Acquire the advisory locks guarding allocation (of the kind identified by key) within each of the given scopes.
+    Each scope is a tuple of the VRF ID and the first and last address of a network or range (see
+    get_allocation_lock_id()), or None if it cannot be determined.
+
+    A shared lock on the address space as a whole is held while the root prefix of each scope is resolved and locked,
+    so that the prefix hierarchy cannot change in the meantime. If any scope is None or spans more than one root
+    prefix, an exclusive lock on the entire address space is acquired instead.
+    """
+    scopes = list(scopes)
+    with ExitStack() as stack:
+        if None not in scopes:
+            stack.enter_context(advisory_lock(ADVISORY_LOCK_KEYS[key], shared=True))
+            if not _acquire_root_locks(stack, key, scopes):
+                stack.close()
+                stack.enter_context(advisory_lock(ADVISORY_LOCK_KEYS[key]))
+        else:
+            stack.enter_context(advisory_lock(ADVISORY_LOCK_KEYS[key]))
+        yield
@@ -22,7 +22,9 @@ from . import filtersets, forms, tables
 from .choices import PrefixStatusChoices
 from .constants import *
 from .models import *
-from .utils import add_requested_prefixes, add_available_vlans, annotate_ip_space
+from .utils import (
+    add_requested_prefixes, add_available_vlans, annotate_ip_space, defer_prefix_hierarchy, defer_utilization,
+)
 
 
 #
@@ -396,7 +398,7 @@ class ASNBulkDeleteView(generic.BulkDeleteView):
 class AggregateListView(generic.ObjectListView):
     queryset = Aggregate.objects.annotate(
         child_count=RawSQL('SELECT COUNT(*) FROM ipam_prefix WHERE ipam_prefix.prefix <<= ipam_aggregate.prefix', ())
-    )
+    ).annotate_utilization()
     filterset = filtersets.AggregateFilterSet
     filterset_form = forms.AggregateFilterForm
     table = tables.AggregateTable
@@ -718,6 +720,11 @@ class PrefixBulkImportView(generic.BulkImportView):
     queryset = Prefix.objects.all()
     model_form = forms.PrefixImportForm
 
+    def create_and_update_objects(self, form, request):
+        # Rebuild the prefix hierarchy and recalculate utilization once all prefixes have been imported
+        with defer_prefix_hierarchy(), defer_utilization():
+            return super().create_and_update_objects(form, request)
+
 
 @register_model_view(Prefix, 'bulk_edit', path='edit', detail=False)
 class PrefixBulkEditView(generic.BulkEditView):
@@ -808,6 +815,11 @@ class IPRangeBulkImportView(generic.BulkImportView):
     queryset = IPRange.objects.all()
     model_form = forms.IPRangeImportForm
 
+    def create_and_update_objects(self, form, request):
+        # Recalculate utilization once all ranges have been imported
+        with defer_utilization():
+            return super().create_and_update_objects(form, request)
+
 
 @register_model_view(IPRange, 'bulk_edit', path='edit', detail=False)
 class IPRangeBulkEditView(generic.BulkEditView):
@@ -981,6 +993,11 @@ class IPAddressBulkImportView(generic.BulkImportView):
     queryset = IPAddress.objects.all()
     model_form = forms.IPAddressImportForm
 
+    def create_and_update_objects(self, form, request):
+        # Recalculate utilization once all IP addresses have been imported
+        with defer_utilization():
+            return super().create_and_update_objects(form, request)
+
 
 @register_model_view(IPAddress, 'bulk_edit', path='edit', detail=False)
 class IPAddressBulkEditView(generic.BulkEditView):
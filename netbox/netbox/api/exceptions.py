@@ -6,6 +6,11 @@ class ServiceUnavailable(APIException):
     default_detail = "Service temporarily unavailable, please try again later."
 
 
+class InsufficientResources(APIException):
+    status_code = 409
+    default_detail = "Insufficient resources are available to satisfy the request"
+
+
 class SerializerNotFound(Exception):
     pass
 
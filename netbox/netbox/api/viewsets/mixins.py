@@ -4,7 +4,9 @@ from django.http import Http404
 from rest_framework import status
 from rest_framework.response import Response
 
+from core.api.serializers import JobSerializer
 from core.models import ObjectType
+from extras.jobs import ExportTemplateJob
 from extras.models import ExportTemplate
 from netbox.api.serializers import BulkOperationSerializer
 
@@ -36,7 +38,8 @@ class CustomFieldsMixin:
 
 class ExportTemplatesMixin:
     """
-    Enable ExportTemplate support for list views.
+    Enable ExportTemplate support for list views. The rendered template is streamed to the client, or (if the
+    `background` parameter is set) saved to storage by a background job.
     """
     def list(self, request, *args, **kwargs):
         if 'export' in request.GET:
@@ -45,7 +48,19 @@ class ExportTemplatesMixin:
             if et is None:
                 raise Http404
             queryset = self.filter_queryset(self.get_queryset())
-            return et.render_to_response(queryset=queryset)
+
+            if request.GET.get('background'):
+                job = ExportTemplateJob.enqueue(
+                    instance=et,
+                    user=request.user,
+                    model=queryset.model._meta.label_lower,
+                    query=queryset.query,
+                    prefetch_related=queryset._prefetch_related_lookups
+                )
+                serializer = JobSerializer(job, context={'request': request})
+                return Response(serializer.data)
+
+            return et.render_to_response(queryset=queryset, stream=True)
 
         return super().list(request, *args, **kwargs)
 
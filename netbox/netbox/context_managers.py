@@ -1,8 +1,19 @@
+import logging
+from collections import defaultdict
 from contextlib import contextmanager
 
-from netbox.context import current_request, events_queue
+from django.conf import settings
+from django_rq import get_queue
+
+from netbox.config import get_config
+from netbox.constants import RQ_QUEUE_DEFAULT
+from netbox.context import current_request, events_queue, search_cache_queue
+from netbox.search.backends import flush_cache_queue
 from netbox.utils import register_request_processor
 from extras.events import flush_events
+from utilities.rqworker import get_rq_retry
+
+logger = logging.getLogger('netbox.search')
 
 
 @register_request_processor
@@ -26,3 +37,48 @@ def event_tracking(request):
     # Clear context vars
     current_request.set(None)
     events_queue.set({})
+
+
+@register_request_processor
+@contextmanager
+def search_cache_tracking(request=None):
+    """
+    If deferred search caching is enabled (see SEARCH_CACHE_MODE), record each object which is created, modified, or
+    deleted while processing a request (or running a background job), then refresh their cached search values in bulk
+    once it has completed. If tracking is already in effect (e.g. for a request processed within a job), objects are
+    recorded in the existing queue.
+
+    :param request: WSGIRequest object with a unique `id` set (optional)
+    """
+    if settings.SEARCH_CACHE_MODE == 'immediate' or search_cache_queue.get() is not None:
+        yield
+        return
+
+    search_cache_queue.set(defaultdict(set))
+    try:
+        yield
+    finally:
+        # Objects saved prior to an exception must still be refreshed, so the queue is always flushed
+        queue = {
+            object_type_id: list(object_ids) for object_type_id, object_ids in search_cache_queue.get().items()
+        }
+        search_cache_queue.set(None)
+        if queue:
+            refresh_search_cache(queue)
+
+
+def refresh_search_cache(queue):
+    """
+    Refresh the cached search values for all objects in the queue, either immediately or by enqueuing a background
+    task (if SEARCH_CACHE_MODE is "background").
+    """
+    if settings.SEARCH_CACHE_MODE == 'background':
+        try:
+            rq_queue = get_queue(get_config().QUEUE_MAPPINGS.get('search', RQ_QUEUE_DEFAULT))
+            rq_queue.enqueue('netbox.search.backends.flush_cache_queue', queue, retry=get_rq_retry())
+            return
+        except Exception as e:
+            # Fall back to refreshing the cache immediately
+            logger.warning(f"Failed to enqueue search cache refresh: {e}")
+
+    flush_cache_queue(queue)
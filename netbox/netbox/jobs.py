@@ -12,6 +12,7 @@ from core.choices import JobStatusChoices
 from core.exceptions import JobFailed
 from core.models import Job, ObjectType
 from netbox.constants import ADVISORY_LOCK_KEYS
+from netbox.context_managers import search_cache_tracking
 from netbox.registry import registry
 from utilities.request import apply_request_processors
 
@@ -98,9 +99,14 @@ class JobRunner(ABC):
         logger = logging.getLogger('netbox.jobs')
 
         try:
-            job.start()
-            cls(job).run(*args, **kwargs)
-            job.terminate()
+            # Defer search cache updates for any objects modified by the job (if enabled) until it has completed
+            with search_cache_tracking():
+                job.start()
+                cls(job).run(*args, **kwargs)
+
+            # A job which has divided its work among child jobs is terminated once all of its children have completed
+            if not job.children.exists():
+                job.terminate()
 
         except JobFailed:
             logger.warning(f"Job {job} failed")
@@ -38,3 +38,17 @@ class Metrics(middleware.Metrics):
             "Count of total GraphQL API requests",
             namespace=NAMESPACE,
         )
+
+        # Jinja2 template cache metrics
+        self.jinja2_template_cache_hits = self.register_metric(
+            Counter,
+            "jinja2_template_cache_hits_total",
+            "Count of compiled Jinja2 templates retrieved from the cache",
+            namespace=NAMESPACE,
+        )
+        self.jinja2_template_cache_misses = self.register_metric(
+            Counter,
+            "jinja2_template_cache_misses_total",
+            "Count of Jinja2 templates compiled due to a cache miss",
+            namespace=NAMESPACE,
+        )
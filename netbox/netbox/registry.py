@@ -33,6 +33,7 @@ registry = Registry({
     'search': dict(),
     'system_jobs': dict(),
     'tables': collections.defaultdict(dict),
+    'utilization_models': list(),
     'views': collections.defaultdict(dict),
     'webhook_callbacks': list(),
     'widgets': dict(),
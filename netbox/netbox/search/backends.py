@@ -3,10 +3,11 @@ from collections import defaultdict
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
 from django.db.models import F, Window, Q, prefetch_related_objects
 from django.db.models.fields.related import ForeignKey
 from django.db.models.functions import window
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 import netaddr
@@ -14,6 +15,7 @@ from netaddr.core import AddrFormatError
 
 from core.models import ObjectType
 from extras.models import CachedValue, CustomField
+from netbox.context import search_cache_queue
 from netbox.registry import registry
 from utilities.object_types import object_type_identifier
 from utilities.querysets import RestrictedPrefetch
@@ -62,13 +64,31 @@ class SearchBackend:
         """
         Receiver for the post_save signal, responsible for caching object creation/changes.
         """
-        self.cache(instance, remove_existing=not created)
+        if (queue := search_cache_queue.get()) is not None:
+            self.defer(queue, instance)
+        else:
+            self.cache(instance, remove_existing=not created)
 
     def removal_handler(self, sender, instance, **kwargs):
         """
         Receiver for the post_delete signal, responsible for caching object deletion.
         """
-        self.remove(instance)
+        if (queue := search_cache_queue.get()) is not None:
+            self.defer(queue, instance)
+        else:
+            self.remove(instance)
+
+    def defer(self, queue, instance):
+        """
+        Record an instance whose cached representation is to be refreshed when the queue is flushed.
+        """
+        try:
+            get_indexer(instance)
+        except KeyError:
+            return
+
+        object_type = ContentType.objects.get_for_model(instance)
+        queue[object_type.pk].add(instance.pk)
 
     def cache(self, instances, indexer=None, remove_existing=True):
         """
@@ -82,6 +102,20 @@ class SearchBackend:
         """
         raise NotImplementedError
 
+    def refresh(self, object_type, object_ids):
+        """
+        Rebuild the cached representations of the specified objects. Any objects which no longer exist are simply
+        removed from the cache.
+        """
+        raise NotImplementedError
+
+    def refresh_range(self, object_type, start, end):
+        """
+        Rebuild the cached representations of all objects with a primary key in the range [start, end). Cached values
+        for any objects in this range which no longer exist are removed.
+        """
+        raise NotImplementedError
+
     def clear(self, object_types=None):
         """
         Delete *all* cached data (optionally filtered by object type).
@@ -105,9 +139,11 @@ class SearchBackend:
 
 class CachedValueSearchBackend(SearchBackend):
 
-    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
-
-        # Build the filter used to find relevant CachedValue records
+    @staticmethod
+    def get_query_filter(value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return a Q object matching all CachedValue records relevant to the given search value.
+        """
         query_filter = Q(**{f'value__{lookup}': value})
         if object_types:
             # Limit results by object type
@@ -125,6 +161,38 @@ class CachedValueSearchBackend(SearchBackend):
             except (AddrFormatError, ValueError):
                 pass
 
+        return query_filter
+
+    @staticmethod
+    def prefetch_display_attrs(results, object_types):
+        """
+        Iterate through each ObjectType represented in the search results and prefetch any related objects
+        necessary to render the prescribed display attributes (display_attrs).
+        """
+        for object_type in object_types:
+            model = object_type.model_class()
+            indexer = registry['search'].get(object_type_identifier(object_type))
+            if not (display_attrs := getattr(indexer, 'display_attrs', None)):
+                continue
+
+            # Add ForeignKey fields to prefetch list
+            prefetch_fields = []
+            for attr in display_attrs:
+                field = model._meta.get_field(attr)
+                if type(field) is ForeignKey:
+                    prefetch_fields.append(f'object__{attr}')
+
+            # Compile a list of all CachedValues referencing this object type, and prefetch
+            # any related objects
+            if prefetch_fields:
+                objects = [r for r in results if r.object_type == object_type]
+                prefetch_related_objects(objects, *prefetch_fields)
+
+    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+
+        # Build the filter used to find relevant CachedValue records
+        query_filter = self.get_query_filter(value, object_types=object_types, lookup=lookup)
+
         # Construct the base queryset to retrieve matching results
         queryset = CachedValue.objects.filter(query_filter).annotate(
             # Annotate the rank of each result for its object according to its weight
@@ -156,26 +224,8 @@ class CachedValueSearchBackend(SearchBackend):
             params
         )
 
-        # Iterate through each ObjectType represented in the search results and prefetch any
-        # related objects necessary to render the prescribed display attributes (display_attrs).
-        for object_type in object_types:
-            model = object_type.model_class()
-            indexer = registry['search'].get(object_type_identifier(object_type))
-            if not (display_attrs := getattr(indexer, 'display_attrs', None)):
-                continue
-
-            # Add ForeignKey fields to prefetch list
-            prefetch_fields = []
-            for attr in display_attrs:
-                field = model._meta.get_field(attr)
-                if type(field) is ForeignKey:
-                    prefetch_fields.append(f'object__{attr}')
-
-            # Compile a list of all CachedValues referencing this object type, and prefetch
-            # any related objects
-            if prefetch_fields:
-                objects = [r for r in results if r.object_type == object_type]
-                prefetch_related_objects(objects, *prefetch_fields)
+        # Prefetch any related objects needed to render display attributes
+        self.prefetch_display_attrs(results, object_types)
 
         # Omit any results pertaining to an object the user does not have permission to view
         ret = []
@@ -253,6 +303,22 @@ class CachedValueSearchBackend(SearchBackend):
         # Call _raw_delete() on the queryset to avoid first loading instances into memory
         return qs._raw_delete(using=qs.db)
 
+    def refresh(self, object_type, object_ids):
+        # Remove all existing cached values for the objects in a single query
+        qs = CachedValue.objects.filter(object_type=object_type, object_id__in=object_ids)
+        qs._raw_delete(using=qs.db)
+
+        model = object_type.model_class()
+        return self.cache(model.objects.filter(pk__in=object_ids).iterator(), remove_existing=False)
+
+    def refresh_range(self, object_type, start, end):
+        # Remove all existing cached values for the range in a single query
+        qs = CachedValue.objects.filter(object_type=object_type, object_id__gte=start, object_id__lt=end)
+        qs._raw_delete(using=qs.db)
+
+        model = object_type.model_class()
+        return self.cache(model.objects.filter(pk__gte=start, pk__lt=end).iterator(), remove_existing=False)
+
     def clear(self, object_types=None):
         qs = CachedValue.objects.all()
         if object_types:
@@ -272,6 +338,77 @@ class CachedValueSearchBackend(SearchBackend):
         return CachedValue.objects.count()
 
 
+class TrigramSearchBackend(CachedValueSearchBackend):
+    """
+    A variant of CachedValueSearchBackend which maintains a trigram (pg_trgm) GIN index over the normalized
+    (upper-cased) representation of each cached value. This allows PostgreSQL to satisfy partial, exact, and
+    starts/ends-with lookups from the index rather than by scanning the entire CachedValue table. The
+    pg_trgm extension and index are created automatically when `manage.py migrate` is run.
+    """
+    index_name = 'extras_cachedvalue_value_trgm'
+
+    def __init__(self):
+        post_migrate.connect(self.create_index, dispatch_uid='trigram_search_backend_create_index')
+
+    def create_index(self, sender, using=DEFAULT_DB_ALIAS, **kwargs):
+        """
+        Receiver for the post_migrate signal, responsible for ensuring that the trigram index exists.
+        """
+        if sender.label != 'extras':
+            return
+
+        table = CachedValue._meta.db_table
+        try:
+            with transaction.atomic(using=using), connections[using].cursor() as cursor:
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {self.index_name} ON {table} '
+                    f'USING gin (UPPER(value) gin_trgm_ops)'
+                )
+        except DatabaseError as e:
+            raise ImproperlyConfigured(
+                f"TrigramSearchBackend requires the pg_trgm PostgreSQL extension: {e}"
+            )
+
+    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+
+        # Build the filter used to find relevant CachedValue records
+        query_filter = self.get_query_filter(value, object_types=object_types, lookup=lookup)
+
+        # Select only the lowest-weight match for each object. Using DISTINCT ON avoids computing a window
+        # function across every matching row and permits the results to be evaluated as a regular QuerySet.
+        matches = CachedValue.objects.filter(query_filter).order_by(
+            'object_type', 'object_id', 'weight'
+        ).distinct(
+            'object_type', 'object_id'
+        )
+
+        # Construct a Prefetch to pre-fetch only those related objects for which the
+        # user has permission to view.
+        if user:
+            prefetch = (RestrictedPrefetch('object', user, 'view'), 'object_type')
+        else:
+            prefetch = ('object', 'object_type')
+
+        # Evaluate the results once, ranked by weight
+        results = list(
+            CachedValue.objects.filter(pk__in=matches.values('pk')).prefetch_related(*prefetch)[:MAX_RESULTS]
+        )
+
+        # Prefetch any related objects needed to render display attributes
+        object_types = {r.object_type for r in results}
+        self.prefetch_display_attrs(results, object_types)
+
+        # Omit any results pertaining to an object the user does not have permission to view
+        ret = []
+        for r in results:
+            if r.object is not None:
+                r.name = str(r.object)
+                ret.append(r)
+
+        return ret
+
+
 def get_backend():
     """
     Initializes and returns the configured search backend.
@@ -285,6 +422,19 @@ def get_backend():
     return backend_cls()
 
 
+def flush_cache_queue(queue):
+    """
+    Refresh the cached representations of all objects recorded in the given queue, which maps ContentType IDs to
+    sets of object IDs. This may be called directly or executed as a background task.
+    """
+    counter = 0
+    for object_type_id, object_ids in queue.items():
+        object_type = ContentType.objects.get_for_id(object_type_id)
+        counter += search_backend.refresh(object_type, object_ids) or 0
+
+    return counter
+
+
 search_backend = get_backend()
 
 # Connect handlers to the appropriate model signals
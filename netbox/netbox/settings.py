@@ -91,6 +91,7 @@ AUTH_PASSWORD_VALIDATORS = getattr(configuration, 'AUTH_PASSWORD_VALIDATORS', [
 BASE_PATH = trailing_slash(getattr(configuration, 'BASE_PATH', ''))
 CHANGELOG_SKIP_EMPTY_CHANGES = getattr(configuration, 'CHANGELOG_SKIP_EMPTY_CHANGES', True)
 CENSUS_REPORTING_ENABLED = getattr(configuration, 'CENSUS_REPORTING_ENABLED', True)
+CONFIG_CONTEXT_CACHE_ENABLED = getattr(configuration, 'CONFIG_CONTEXT_CACHE_ENABLED', False)
 CORS_ORIGIN_ALLOW_ALL = getattr(configuration, 'CORS_ORIGIN_ALLOW_ALL', False)
 CORS_ORIGIN_REGEX_WHITELIST = getattr(configuration, 'CORS_ORIGIN_REGEX_WHITELIST', [])
 CORS_ORIGIN_WHITELIST = getattr(configuration, 'CORS_ORIGIN_WHITELIST', [])
@@ -142,6 +143,7 @@ HTTP_PROXIES = getattr(configuration, 'HTTP_PROXIES', {})
 INTERNAL_IPS = getattr(configuration, 'INTERNAL_IPS', ('127.0.0.1', '::1'))
 ISOLATED_DEPLOYMENT = getattr(configuration, 'ISOLATED_DEPLOYMENT', False)
 JINJA2_FILTERS = getattr(configuration, 'JINJA2_FILTERS', {})
+JOB_FILES_ROOT = getattr(configuration, 'JOB_FILES_ROOT', os.path.join(BASE_DIR, 'job-files')).rstrip('/')
 LANGUAGE_CODE = getattr(configuration, 'DEFAULT_LANGUAGE', 'en-us')
 LANGUAGE_COOKIE_PATH = CSRF_COOKIE_PATH
 LOGGING = getattr(configuration, 'LOGGING', {})
@@ -182,7 +184,13 @@ RQ_DEFAULT_TIMEOUT = getattr(configuration, 'RQ_DEFAULT_TIMEOUT', 300)
 RQ_RETRY_INTERVAL = getattr(configuration, 'RQ_RETRY_INTERVAL', 60)
 RQ_RETRY_MAX = getattr(configuration, 'RQ_RETRY_MAX', 0)
 SCRIPTS_ROOT = getattr(configuration, 'SCRIPTS_ROOT', os.path.join(BASE_DIR, 'scripts')).rstrip('/')
+SCRIPT_LOG_RETENTION = getattr(configuration, 'SCRIPT_LOG_RETENTION', {})
 SEARCH_BACKEND = getattr(configuration, 'SEARCH_BACKEND', 'netbox.search.backends.CachedValueSearchBackend')
+SEARCH_CACHE_MODE = getattr(configuration, 'SEARCH_CACHE_MODE', 'immediate')
+if SEARCH_CACHE_MODE not in ('immediate', 'deferred', 'background'):
+    raise ImproperlyConfigured(
+        f"SEARCH_CACHE_MODE must be 'immediate', 'deferred', or 'background' (found {SEARCH_CACHE_MODE})"
+    )
 SECRET_KEY = getattr(configuration, 'SECRET_KEY')  # Required
 SECURE_HSTS_INCLUDE_SUBDOMAINS = getattr(configuration, 'SECURE_HSTS_INCLUDE_SUBDOMAINS', False)
 SECURE_HSTS_PRELOAD = getattr(configuration, 'SECURE_HSTS_PRELOAD', False)
@@ -292,6 +300,9 @@ DEFAULT_STORAGES = {
     "scripts": {
         "BACKEND": "extras.storage.ScriptFileSystemStorage",
     },
+    "job_files": {
+        "BACKEND": "extras.storage.JobFileSystemStorage",
+    },
 }
 STORAGES = DEFAULT_STORAGES | STORAGES
 
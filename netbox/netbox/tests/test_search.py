@@ -1,10 +1,19 @@
+from io import StringIO
+
 from django.contrib.contenttypes.models import ContentType
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
 
+from core.choices import JobStatusChoices
 from dcim.models import Site
 from dcim.search import SiteIndex
+from extras.management.commands.reindex import PROGRESS_CACHE_KEY, _index_chunk
 from extras.models import CachedValue
-from netbox.search.backends import search_backend
+from netbox.context_managers import search_cache_tracking
+from netbox.jobs import JobRunner
+from netbox.search import LookupTypes
+from netbox.search.backends import TrigramSearchBackend, search_backend
 
 
 class SearchBackendTestCase(TestCase):
@@ -151,3 +160,185 @@ class SearchBackendTestCase(TestCase):
         self.assertEqual(len(results), 1)
         results = search_backend.search('xxxxx')
         self.assertEqual(len(results), 0)
+
+
+class TrigramSearchBackendTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        sites = (
+            Site(name='Site 1', slug='site-1', description='First test site'),
+            Site(name='Site 2', slug='site-2', description='Second test site'),
+            Site(name='Site 3', slug='site-3', description='Third test site'),
+        )
+        Site.objects.bulk_create(sites)
+        search_backend.cache(Site.objects.all())
+
+    def test_search(self):
+        """
+        Test various searches.
+        """
+        backend = TrigramSearchBackend()
+
+        results = backend.search('site')
+        self.assertEqual(len(results), 3)
+        results = backend.search('first')
+        self.assertEqual(len(results), 1)
+        results = backend.search('xxxxx')
+        self.assertEqual(len(results), 0)
+        results = backend.search('site-2', lookup=LookupTypes.EXACT)
+        self.assertEqual(len(results), 1)
+
+    def test_search_returns_lowest_weight_match(self):
+        """
+        Test that only the lowest-weight match is returned for each object.
+        """
+        backend = TrigramSearchBackend()
+
+        results = backend.search('site 1')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].field, 'name')
+        self.assertEqual(results[0].name, 'Site 1')
+
+
+class DeferredSearchCachingTestCase(TestCase):
+
+    @override_settings(SEARCH_CACHE_MODE='deferred')
+    def test_cache_deferred_until_request_completes(self):
+        """
+        Test that objects saved while processing a request are cached only once the request has completed.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+        site = Site(name='Site 1', slug='site-1', description='First test site')
+
+        with search_cache_tracking(None):
+            site.save()
+            site.description = 'Updated test site'
+            site.save()
+            self.assertFalse(CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists())
+
+        self.assertEqual(
+            CachedValue.objects.filter(object_type=content_type, object_id=site.pk).count(),
+            len([f for f in SiteIndex.fields if getattr(site, f[0])])
+        )
+        self.assertTrue(
+            CachedValue.objects.filter(object_type=content_type, object_id=site.pk, value='Updated test site').exists()
+        )
+
+    @override_settings(SEARCH_CACHE_MODE='deferred')
+    def test_removal_deferred_until_request_completes(self):
+        """
+        Test that cached values for objects deleted while processing a request are removed once the request has
+        completed.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+        site = Site.objects.create(name='Site 1', slug='site-1')
+        site_pk = site.pk
+        self.assertTrue(CachedValue.objects.filter(object_type=content_type, object_id=site_pk).exists())
+
+        with search_cache_tracking(None):
+            site.delete()
+            self.assertTrue(CachedValue.objects.filter(object_type=content_type, object_id=site_pk).exists())
+
+        self.assertFalse(CachedValue.objects.filter(object_type=content_type, object_id=site_pk).exists())
+
+    @override_settings(SEARCH_CACHE_MODE='deferred')
+    def test_cache_deferred_until_job_completes(self):
+        """
+        Test that objects created while running a background job are cached once the job has completed.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+        cached_during_job = []
+
+        class CreateSiteJob(JobRunner):
+            def run(self, *args, **kwargs):
+                site = Site.objects.create(name='Site 1', slug='site-1')
+                cached_during_job.append(
+                    CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists()
+                )
+
+        job = CreateSiteJob.enqueue(immediate=True)
+        self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(cached_during_job, [False])
+        site = Site.objects.get(slug='site-1')
+        self.assertTrue(CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists())
+
+    @override_settings(SEARCH_CACHE_MODE='deferred')
+    def test_nested_tracking(self):
+        """
+        Test that objects recorded within a nested context are cached only once the outermost context has completed.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+
+        with search_cache_tracking(None):
+            with search_cache_tracking(None):
+                site = Site.objects.create(name='Site 1', slug='site-1')
+            self.assertFalse(CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists())
+
+        self.assertTrue(CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists())
+
+    def test_immediate_caching(self):
+        """
+        Test that objects are cached immediately on save when deferred caching is disabled.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+
+        with search_cache_tracking(None):
+            site = Site.objects.create(name='Site 1', slug='site-1')
+            self.assertTrue(CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists())
+
+
+class ReindexCommandTestCase(TransactionTestCase):
+    """
+    Chunks are indexed by worker processes, which must be able to read the test data.
+    """
+    serialized_rollback = True
+
+    def setUp(self):
+        self.sites = [
+            Site.objects.create(name=f'Site {i}', slug=f'site-{i}') for i in range(1, 6)
+        ]
+        self.object_type = ContentType.objects.get_for_model(Site)
+        cache.delete(PROGRESS_CACHE_KEY)
+
+    def get_cached_sites(self):
+        return set(CachedValue.objects.filter(object_type=self.object_type).values_list('object_id', flat=True))
+
+    def test_index_chunk(self):
+        start = self.sites[0].pk
+        self.sites[1].delete()
+        search_backend.clear()
+
+        # Cached values for objects within the range are replaced, and those for deleted objects removed
+        deleted = CachedValue.objects.create(
+            object_type=self.object_type, object_id=start + 1, field='name', type='str', weight=100, value='Deleted'
+        )
+        stale = CachedValue.objects.create(
+            object_type=self.object_type, object_id=start, field='name', type='str', weight=100, value='Stale'
+        )
+
+        result = _index_chunk('dcim.site', start, start + 3)
+        self.assertEqual(result['objects'], 2)
+        self.assertEqual(self.get_cached_sites(), {start, start + 2})
+        self.assertFalse(CachedValue.objects.filter(pk__in=(stale.pk, deleted.pk)).exists())
+
+    def test_reindex_chunked(self):
+        search_backend.clear()
+        stdout = StringIO()
+        call_command('reindex', 'dcim.site', workers=2, chunk_size=2, stdout=stdout)
+
+        self.assertEqual(self.get_cached_sites(), {site.pk for site in self.sites})
+        self.assertIn('in 3 chunks', stdout.getvalue())
+        self.assertIsNone(cache.get(PROGRESS_CACHE_KEY))
+
+    def test_reindex_resume(self):
+        search_backend.clear()
+        cache.set(PROGRESS_CACHE_KEY, {'dcim.site': self.sites[2].pk}, timeout=None)
+
+        # Deleting objects already indexed does not affect the point from which indexing resumes
+        self.sites[0].delete()
+
+        # Indexing resumes from the recorded primary key, regardless of chunk size
+        call_command('reindex', 'dcim.site', resume=True, chunk_size=3, stdout=StringIO())
+        self.assertEqual(self.get_cached_sites(), {site.pk for site in self.sites[2:]})
+        self.assertIsNone(cache.get(PROGRESS_CACHE_KEY))
@@ -20,6 +20,7 @@ from core.exceptions import JobFailed
 from core.models import ObjectType
 from core.signals import clear_events
 from extras.choices import CustomFieldUIEditableChoices
+from extras.jobs import ExportTemplateJob
 from extras.models import CustomField, ExportTemplate
 from netbox.models.features import ChangeLoggingMixin
 from netbox.object_actions import AddObject, BulkDelete, BulkEdit, BulkExport, BulkImport, BulkRename
@@ -108,14 +109,31 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
 
     def export_template(self, template, request):
         """
-        Render an ExportTemplate using the current queryset.
+        Render an ExportTemplate using the current queryset. The rendered template is streamed to the client, or (if
+        the `background` parameter is set) saved to storage by a background job.
 
         Args:
             template: ExportTemplate instance
             request: The current request
         """
+        if request.GET.get('background'):
+            job = ExportTemplateJob.enqueue(
+                instance=template,
+                user=request.user,
+                model=self.queryset.model._meta.label_lower,
+                query=self.queryset.query,
+                prefetch_related=self.queryset._prefetch_related_lookups
+            )
+            msg = _('Created background job {id}: <a href="{url}">{name}</a>').format(
+                id=job.pk,
+                url=job.get_absolute_url(),
+                name=job.name
+            )
+            messages.info(request, mark_safe(msg))
+            return redirect(job.get_absolute_url())
+
         try:
-            return template.render_to_response(queryset=self.queryset)
+            return template.render_to_response(queryset=self.queryset, stream=True)
         except Exception as e:
             messages.error(
                 request,
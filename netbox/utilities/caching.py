@@ -0,0 +1,75 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+__all__ = (
+    'VersionedCache',
+)
+
+
+class VersionedCache:
+    """
+    A value loaded from the database and retained in memory by each process until it is invalidated. The current
+    version of the value is shared among all processes via the cache, so that a change made by any one of them
+    invalidates the copy held by each.
+
+    Args:
+        cache_key: The cache key under which the current version is stored
+        loader: A callable which loads the value from the database
+    """
+    def __init__(self, cache_key, loader):
+        self.cache_key = cache_key
+        self.loader = loader
+        self.version = None
+        self.value = None
+
+        # Whether the value has been modified by the current transaction (tracked per thread, as is each connection)
+        self._local = threading.local()
+
+    @property
+    def modified(self):
+        return getattr(self._local, 'modified', False)
+
+    @modified.setter
+    def modified(self, value):
+        self._local.modified = value
+
+    def get(self):
+        """
+        Return the value, loading it anew if the local copy is out of date.
+        """
+        # The transaction which modified the value has since been committed or rolled back
+        if self.modified and not connection.in_atomic_block:
+            self.modified = False
+
+        version = cache.get(self.cache_key)
+        if version is None:
+            cache.add(self.cache_key, uuid.uuid4().hex, None)
+            version = cache.get(self.cache_key)
+
+        if version == self.version and not self.modified:
+            return self.value
+
+        value = self.loader()
+
+        # Never retain a value reflecting changes made by the current transaction, as it may yet be rolled back
+        if not self.modified:
+            self.version = version
+            self.value = value
+
+        return value
+
+    def invalidate(self):
+        """
+        Invalidate the value held in memory by all processes once the current transaction has been committed. (The
+        local copy is bypassed for the remainder of the current transaction, as it may already reflect the change.)
+        """
+        if connection.in_atomic_block:
+            self.modified = True
+        transaction.on_commit(self._commit)
+
+    def _commit(self):
+        self.modified = False
+        cache.set(self.cache_key, uuid.uuid4().hex, None)
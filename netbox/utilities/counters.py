@@ -122,3 +122,13 @@ def connect_counters(*models):
                 weak=False,
                 dispatch_uid=f'{model._meta.label}.{field.name}'
             )
+
+
+def register_utilization(*models):
+    """
+    Register models which cache their utilization. The default manager of each model must provide an
+    update_utilization() method, which is called to recalculate all cached values.
+    """
+    for model in models:
+        if model not in registry['utilization_models']:
+            registry['utilization_models'].append(model)
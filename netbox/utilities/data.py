@@ -10,9 +10,12 @@ __all__ = (
     'deepmerge',
     'drange',
     'flatten_dict',
+    'get_range_gaps',
+    'range_bounds',
     'ranges_to_string',
     'ranges_to_string_list',
     'shallow_compare_dict',
+    'slice_range_gaps',
     'string_to_ranges',
 )
 
@@ -140,6 +143,64 @@ def check_ranges_overlap(ranges):
     return False
 
 
+def range_bounds(numeric_range):
+    """
+    Return the inclusive lower and upper bounds of an integer NumericRange.
+
+    Example:
+        NumericRange(10, 20, bounds='[)') => (10, 19)
+    """
+    lower = numeric_range.lower if numeric_range.lower_inc else numeric_range.lower + 1
+    upper = numeric_range.upper if numeric_range.upper_inc else numeric_range.upper - 1
+    return lower, upper
+
+
+def get_range_gaps(bounds, values):
+    """
+    Yield each gap within a series of integer ranges which is not occupied by any of the given values, as a tuple of
+    inclusive bounds. Both the ranges (expressed as tuples of inclusive bounds) and the values must be sorted in
+    ascending order; values are consumed lazily, so they may be streamed directly from the database.
+
+    Example:
+        [(1, 10), (20, 25)], [2, 3, 7, 20] => (1, 1), (4, 6), (8, 10), (21, 25)
+    """
+    values = iter(values)
+    value = next(values, None)
+    for lower, upper in bounds:
+        first = lower
+        while value is not None and value <= upper:
+            if value > first:
+                yield first, value - 1
+            first = max(first, value + 1)
+            value = next(values, None)
+        if first <= upper:
+            yield first, upper
+
+
+def slice_range_gaps(gaps, offset=0, limit=None):
+    """
+    Return a list of the individual values within a series of gaps (see get_range_gaps()), omitting the first offset
+    values and returning at most limit values. Gaps which fall entirely before the offset are skipped without
+    enumerating their values.
+
+    Example:
+        [(1, 1), (4, 6), (8, 10)], offset=2, limit=3 => [5, 6, 8]
+    """
+    values = []
+    for first, last in gaps:
+        if limit is not None and len(values) >= limit:
+            break
+        size = last - first + 1
+        if offset >= size:
+            offset -= size
+            continue
+        first, offset = first + offset, 0
+        if limit is not None:
+            last = min(last, first + limit - len(values) - 1)
+        values.extend(range(first, last + 1))
+    return values
+
+
 def ranges_to_string_list(ranges):
     """
     Convert numeric ranges to a list of display strings.
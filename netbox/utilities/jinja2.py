@@ -1,5 +1,12 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
 from jinja2 import BaseLoader, TemplateNotFound
+from jinja2.bccache import MemcachedBytecodeCache
 from jinja2.meta import find_referenced_templates
 from jinja2.sandbox import SandboxedEnvironment
 
@@ -7,9 +14,29 @@ from netbox.config import get_config
 
 __all__ = (
     'DataFileLoader',
+    'clear_template_cache',
+    'get_template',
+    'get_template_cache_info',
     'render_jinja2',
 )
 
+# The maximum number of compiled templates retained in memory
+TEMPLATE_CACHE_SIZE = 400
+
+# Compiled template bytecode is shared among processes via the cache
+BYTECODE_CACHE_PREFIX = 'jinja2_bytecode:'
+BYTECODE_CACHE_TIMEOUT = 60 * 60 * 24
+
+TemplateCacheInfo = namedtuple('TemplateCacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+# A local LRU cache of compiled templates
+_template_cache = OrderedDict()
+_template_cache_lock = threading.Lock()
+_template_cache_stats = {
+    'hits': 0,
+    'misses': 0,
+}
+
 
 class DataFileLoader(BaseLoader):
     """
@@ -28,13 +55,14 @@ class DataFileLoader(BaseLoader):
         except KeyError:
             raise TemplateNotFound(template)
 
-        # Find and pre-fetch referenced templates
-        if referenced_templates := tuple(find_referenced_templates(environment.parse(template_source))):
+        # Find and pre-fetch any referenced templates which have not already been retrieved
+        referenced_templates = tuple(find_referenced_templates(environment.parse(template_source)))
+        if missing_templates := [t for t in referenced_templates if t not in self._template_cache]:
             related_files = DataFile.objects.filter(source=self.data_source)
             # None indicates the use of dynamic resolution. If dependent files are statically
             # defined, we can filter by path for optimization.
-            if None not in referenced_templates:
-                related_files = related_files.filter(path__in=referenced_templates)
+            if None not in missing_templates:
+                related_files = related_files.filter(path__in=missing_templates)
             self.cache_templates({
                 df.path: df.data_as_string for df in related_files
             })
@@ -46,15 +74,21 @@ class DataFileLoader(BaseLoader):
 
 
 #
-# Utility functions
+# Template caching
 #
 
-def render_jinja2(template_code, context, environment_params=None, data_file=None):
+def _get_environment_key(environment_params):
     """
-    Render a Jinja2 template with the provided context. Return the rendered content.
+    Return a digest of the given Jinja2 environment parameters (excluding any loader).
     """
-    environment_params = environment_params or {}
+    params = sorted((name, value) for name, value in environment_params.items() if name != 'loader')
+    return hashlib.sha256(repr(params).encode()).hexdigest()
+
 
+def _compile_template(template_code, environment_params, data_file, environment_key):
+    """
+    Construct a new Jinja2 environment and compile the template within it.
+    """
     if 'loader' not in environment_params:
         if data_file:
             loader = DataFileLoader(data_file.source)
@@ -64,12 +98,113 @@ def render_jinja2(template_code, context, environment_params=None, data_file=Non
         else:
             loader = BaseLoader()
         environment_params['loader'] = loader
+    environment_params.setdefault('bytecode_cache', MemcachedBytecodeCache(
+        cache,
+        prefix=f'{BYTECODE_CACHE_PREFIX}{environment_key}:',
+        timeout=BYTECODE_CACHE_TIMEOUT
+    ))
 
     environment = SandboxedEnvironment(**environment_params)
     environment.filters.update(get_config().JINJA2_FILTERS)
 
     if data_file:
-        template = environment.get_template(data_file.path)
-    else:
-        template = environment.from_string(source=template_code)
+        return environment.get_template(data_file.path)
+
+    # Compile the template from its source (as Environment.from_string() does), employing the bytecode cache
+    bytecode_cache = environment.bytecode_cache
+    bucket = bytecode_cache.get_bucket(
+        environment, hashlib.sha256(template_code.encode()).hexdigest(), None, template_code
+    )
+    if bucket.code is None:
+        bucket.code = environment.compile(template_code)
+        bytecode_cache.set_bucket(bucket)
+    return environment.template_class.from_code(environment, bucket.code, environment.make_globals(None))
+
+
+def _record_template_cache_lookup(hit):
+    with _template_cache_lock:
+        _template_cache_stats['hits' if hit else 'misses'] += 1
+
+    if settings.METRICS_ENABLED:
+        from netbox.metrics import Metrics
+        metrics = Metrics.get_instance()
+        if hit:
+            metrics.jinja2_template_cache_hits.inc()
+        else:
+            metrics.jinja2_template_cache_misses.inc()
+
+
+def get_template(template_code, environment_params=None, data_file=None):
+    """
+    Return the compiled Jinja2 template for the given template code. Compiled templates are retained in memory,
+    keyed by the template code, the environment parameters, and the DataSource (if any) from which referenced
+    templates are loaded. Templates for which a custom loader has been specified are never retained.
+    """
+    environment_params = dict(environment_params or {})
+    environment_key = _get_environment_key(environment_params)
+
+    if 'loader' in environment_params:
+        return _compile_template(template_code, environment_params, data_file, environment_key)
+
+    # Referenced DataFiles may change only when the DataSource is synchronized
+    data_source = data_file.source if data_file else None
+    key = (
+        hashlib.sha256(template_code.encode()).hexdigest(),
+        environment_key,
+        data_file.path if data_file else None,
+        data_source.pk if data_source else None,
+        data_source.last_synced if data_source else None,
+    )
+
+    with _template_cache_lock:
+        template = _template_cache.get(key)
+        if template is not None:
+            _template_cache.move_to_end(key)
+    _record_template_cache_lookup(hit=template is not None)
+
+    if template is None:
+        template = _compile_template(template_code, environment_params, data_file, environment_key)
+        with _template_cache_lock:
+            _template_cache[key] = template
+            while len(_template_cache) > TEMPLATE_CACHE_SIZE:
+                _template_cache.popitem(last=False)
+
+    return template
+
+
+def clear_template_cache(data_source=None):
+    """
+    Remove compiled templates from the local cache. If a DataSource is specified, only templates which reference
+    its DataFiles are removed.
+    """
+    with _template_cache_lock:
+        if data_source is None:
+            _template_cache.clear()
+        else:
+            for key in [key for key in _template_cache if key[3] == data_source.pk]:
+                del _template_cache[key]
+
+
+def get_template_cache_info():
+    """
+    Return the number of hits and misses, maximum size, and current size of the local template cache.
+    """
+    with _template_cache_lock:
+        return TemplateCacheInfo(
+            hits=_template_cache_stats['hits'],
+            misses=_template_cache_stats['misses'],
+            maxsize=TEMPLATE_CACHE_SIZE,
+            currsize=len(_template_cache),
+        )
+
+
+#
+# Utility functions
+#
+
+def render_jinja2(template_code, context, environment_params=None, data_file=None):
+    """
+    Render a Jinja2 template with the provided context. Return the rendered content.
+    """
+    template = get_template(template_code, environment_params, data_file)
     return template.render(**context)
@@ -7,7 +7,7 @@ from utilities.counters import update_counts
 
 
 class Command(BaseCommand):
-    help = "Force a recalculation of all cached counter fields"
+    help = "Force a recalculation of all cached counter and utilization fields"
 
     @staticmethod
     def collect_models():
@@ -31,4 +31,7 @@ class Command(BaseCommand):
             for field_name, related_query in mappings.items():
                 update_counts(model, field_name, related_query)
 
+        for model in registry['utilization_models']:
+            model.objects.update_utilization()
+
         self.stdout.write(self.style.SUCCESS('Finished.'))
@@ -0,0 +1,51 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+from django.db.models import Max, Min
+
+__all__ = (
+    'get_pk_chunks',
+    'run_in_parallel',
+)
+
+
+def get_pk_chunks(queryset, chunk_size, start=None):
+    """
+    Divide the primary key space of the given QuerySet into a list of (start, end) ranges of the specified size, each
+    including its start but not its end. If a start is specified, the first range begins with it and any lesser
+    primary keys are omitted.
+    """
+    if start is not None:
+        queryset = queryset.filter(pk__gte=start)
+    pk_range = queryset.aggregate(start=Min('pk'), end=Max('pk'))
+    if pk_range['start'] is None:
+        return []
+    if start is None:
+        start = pk_range['start']
+    return [
+        (pk, pk + chunk_size) for pk in range(start, pk_range['end'] + 1, chunk_size)
+    ]
+
+
+def run_in_parallel(func, tasks, workers=None):
+    """
+    Call a function with each of the given tuples of arguments, yielding the result of each call as it is completed.
+    If a number of workers is specified, calls are distributed among a pool of forked worker processes (and results
+    may be yielded in any order); otherwise, each call is made in turn by the current process.
+
+    The function and its arguments must support pickling, and each worker process opens its own database connection.
+    """
+    if not workers:
+        for args in tasks:
+            yield func(*args)
+        return
+
+    # Close all database connections prior to forking, so that no connection is shared with a worker process
+    connections.close_all()
+
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+    with executor:
+        futures = [executor.submit(func, *args) for args in tasks]
+        for future in as_completed(futures):
+            yield future.result()
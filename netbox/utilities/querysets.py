@@ -6,6 +6,7 @@ from utilities.permissions import get_permission_for_model, permission_is_exempt
 __all__ = (
     'RestrictedPrefetch',
     'RestrictedQuerySet',
+    'StreamingQuerySet',
 )
 
 
@@ -68,3 +69,32 @@ class RestrictedQuerySet(QuerySet):
             qs = self.filter(pk__in=allowed_objects)
 
         return qs
+
+
+class StreamingQuerySet:
+    """
+    Wrap a QuerySet such that iterating over it retrieves objects from the database in chunks (applying any
+    prefetches to each chunk), rather than caching the entire result set in memory. All other attributes are passed
+    through to the underlying QuerySet. Note that each iteration executes a new query.
+
+    :param queryset: The QuerySet to wrap
+    :param chunk_size: The number of objects to retrieve from the database at once
+    """
+    def __init__(self, queryset, chunk_size=2000):
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self.queryset.iterator(chunk_size=self.chunk_size)
+
+    def __len__(self):
+        return self.queryset.count()
+
+    def __bool__(self):
+        return self.queryset.exists()
+
+    def __getitem__(self, k):
+        return self.queryset[k]
+
+    def __getattr__(self, name):
+        return getattr(self.queryset, name)
@@ -0,0 +1,91 @@
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from utilities.caching import VersionedCache
+
+
+class VersionedCacheTest(TransactionTestCase):
+    """
+    Values loaded within a transaction which has modified them are not retained, so these tests must run outside of
+    a transaction.
+    """
+    serialized_rollback = True
+
+    def setUp(self):
+        self.cache_key = 'test_versioned_cache_version'
+        cache.delete(self.cache_key)
+        self.loader = Mock(side_effect=lambda: self.loader.call_count)
+
+    def test_value_retained(self):
+        versioned_cache = VersionedCache(self.cache_key, self.loader)
+        self.assertEqual(versioned_cache.get(), 1)
+        self.assertEqual(versioned_cache.get(), 1)
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertIsNotNone(cache.get(self.cache_key))
+
+    def test_invalidate(self):
+        versioned_cache = VersionedCache(self.cache_key, self.loader)
+        versioned_cache.get()
+        version = cache.get(self.cache_key)
+
+        versioned_cache.invalidate()
+        self.assertNotEqual(cache.get(self.cache_key), version)
+        self.assertEqual(versioned_cache.get(), 2)
+        self.assertEqual(versioned_cache.get(), 2)
+
+    def test_invalidated_by_other_process(self):
+        versioned_cache1 = VersionedCache(self.cache_key, self.loader)
+        versioned_cache2 = VersionedCache(self.cache_key, self.loader)
+        self.assertEqual(versioned_cache1.get(), 1)
+        self.assertEqual(versioned_cache2.get(), 2)
+
+        versioned_cache2.invalidate()
+        self.assertEqual(versioned_cache1.get(), 3)
+
+    def test_value_retained_within_transaction(self):
+        versioned_cache = VersionedCache(self.cache_key, self.loader)
+        with transaction.atomic():
+            self.assertEqual(versioned_cache.get(), 1)
+            self.assertEqual(versioned_cache.get(), 1)
+        self.assertEqual(versioned_cache.get(), 1)
+        self.assertEqual(self.loader.call_count, 1)
+
+    def test_value_not_retained_once_modified_within_transaction(self):
+        versioned_cache = VersionedCache(self.cache_key, self.loader)
+        with transaction.atomic():
+            self.assertEqual(versioned_cache.get(), 1)
+            versioned_cache.invalidate()
+            self.assertEqual(versioned_cache.get(), 2)
+            self.assertEqual(versioned_cache.get(), 3)
+        self.assertFalse(versioned_cache.modified)
+        self.assertEqual(versioned_cache.get(), 4)
+        self.assertEqual(versioned_cache.get(), 4)
+
+    def test_rollback(self):
+        versioned_cache = VersionedCache(self.cache_key, self.loader)
+        self.assertEqual(versioned_cache.get(), 1)
+
+        # Values loaded after the modification are discarded along with the transaction
+        with self.assertRaises(ValueError), transaction.atomic():
+            versioned_cache.invalidate()
+            self.assertEqual(versioned_cache.get(), 2)
+            raise ValueError()
+        self.assertEqual(versioned_cache.get(), 1)
+        self.assertFalse(versioned_cache.modified)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_invalidate_on_commit(self):
+        versioned_cache = VersionedCache(self.cache_key, self.loader)
+        versioned_cache.get()
+        version = cache.get(self.cache_key)
+
+        with transaction.atomic():
+            versioned_cache.invalidate()
+
+            # The local copy is bypassed immediately, but other processes are notified only upon commit
+            self.assertTrue(versioned_cache.modified)
+            self.assertEqual(cache.get(self.cache_key), version)
+        self.assertNotEqual(cache.get(self.cache_key), version)
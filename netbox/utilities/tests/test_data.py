@@ -2,8 +2,11 @@ from django.db.backends.postgresql.psycopg_any import NumericRange
 from django.test import TestCase
 from utilities.data import (
     check_ranges_overlap,
+    get_range_gaps,
+    range_bounds,
     ranges_to_string,
     ranges_to_string_list,
+    slice_range_gaps,
     string_to_ranges,
 )
 
@@ -96,3 +99,34 @@ class RangeFunctionsTestCase(TestCase):
             string_to_ranges('2-10, a-b'),
             None  # Fails to convert
         )
+
+    def test_range_bounds(self):
+        self.assertEqual(range_bounds(NumericRange(10, 20, bounds='[)')), (10, 19))
+        self.assertEqual(range_bounds(NumericRange(10, 20, bounds='(]')), (11, 20))
+        self.assertEqual(range_bounds(NumericRange(10, 20, bounds='[]')), (10, 20))
+
+    def test_get_range_gaps(self):
+        self.assertEqual(
+            list(get_range_gaps([(1, 10), (20, 25)], [2, 3, 7, 20])),
+            [(1, 1), (4, 6), (8, 10), (21, 25)]
+        )
+
+        # Values outside of the ranges and duplicate values are ignored
+        self.assertEqual(
+            list(get_range_gaps([(1, 10), (20, 25)], [0, 2, 2, 10, 12, 26])),
+            [(1, 1), (3, 9), (20, 25)]
+        )
+
+        # Fully occupied ranges
+        self.assertEqual(list(get_range_gaps([(1, 3)], [1, 2, 3])), [])
+        self.assertEqual(list(get_range_gaps([(1, 3)], [])), [(1, 3)])
+
+    def test_slice_range_gaps(self):
+        gaps = [(1, 1), (4, 6), (8, 10)]
+        self.assertEqual(slice_range_gaps(gaps), [1, 4, 5, 6, 8, 9, 10])
+        self.assertEqual(slice_range_gaps(gaps, offset=2, limit=3), [5, 6, 8])
+        self.assertEqual(slice_range_gaps(gaps, limit=2), [1, 4])
+        self.assertEqual(slice_range_gaps(gaps, offset=7), [])
+
+        # Gaps preceding the offset are not enumerated
+        self.assertEqual(slice_range_gaps([(1, 2 ** 32), (2 ** 33, 2 ** 33)], offset=2 ** 32), [2 ** 33])
@@ -0,0 +1,52 @@
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+
+from core.models import DataSource
+from utilities.jinja2 import clear_template_cache, get_template, get_template_cache_info, render_jinja2
+
+
+class TemplateCacheTestCase(TestCase):
+
+    def setUp(self):
+        clear_template_cache()
+
+    def test_template_reused(self):
+        template = get_template('Hello {{ name }}')
+        hits = get_template_cache_info().hits
+
+        self.assertIs(get_template('Hello {{ name }}'), template)
+        self.assertEqual(get_template_cache_info().hits, hits + 1)
+        self.assertEqual(render_jinja2('Hello {{ name }}', {'name': 'world'}), 'Hello world')
+
+        # Changes to the template code or environment parameters require the template to be recompiled
+        misses = get_template_cache_info().misses
+        self.assertIsNot(get_template('Goodbye {{ name }}'), template)
+        self.assertIsNot(get_template('Hello {{ name }}', {'trim_blocks': True}), template)
+        self.assertEqual(get_template_cache_info().misses, misses + 2)
+
+    def test_cache_size(self):
+        for i in range(get_template_cache_info().maxsize + 10):
+            get_template(f'Template {i}')
+        self.assertEqual(get_template_cache_info().currsize, get_template_cache_info().maxsize)
+
+    def test_data_source_sync(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        templates_dir = Path(temp_dir.name)
+        (templates_dir / 'main.j2').write_text("{% include 'base.j2' %}")
+        (templates_dir / 'base.j2').write_text('Hello')
+
+        data_source = DataSource.objects.create(name='Data Source 1', type='local', source_url=str(templates_dir))
+        data_source.sync()
+        data_file = data_source.datafiles.get(path='main.j2')
+        self.assertEqual(render_jinja2(data_file.data_as_string, {}, data_file=data_file), 'Hello')
+        self.assertEqual(get_template_cache_info().currsize, 1)
+
+        # Synchronizing the DataSource evicts its templates, as any referenced DataFiles may have changed
+        (templates_dir / 'base.j2').write_text('Goodbye')
+        data_source.sync()
+        self.assertEqual(get_template_cache_info().currsize, 0)
+        data_file = data_source.datafiles.get(path='main.j2')
+        self.assertEqual(render_jinja2(data_file.data_as_string, {}, data_file=data_file), 'Goodbye')
@@ -90,7 +90,7 @@ class ClusterTypeType(OrganizationalObjectType):
 
 @strawberry_django.type(
     models.VirtualMachine,
-    fields='__all__',
+    exclude=['_config_context', '_config_context_ids', '_config_context_fingerprint'],
     filters=VirtualMachineFilter,
     pagination=True
 )
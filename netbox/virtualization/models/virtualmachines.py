@@ -10,7 +10,7 @@ from django.utils.translation import gettext_lazy as _
 
 from dcim.models import BaseInterface
 from dcim.models.mixins import RenderConfigMixin
-from extras.models import ConfigContextModel
+from extras.models import CachedConfigContextModel
 from extras.querysets import ConfigContextModelQuerySet
 from netbox.config import get_config
 from netbox.models import NetBoxModel, PrimaryModel
@@ -28,7 +28,7 @@ __all__ = (
 )
 
 
-class VirtualMachine(ContactsMixin, ImageAttachmentsMixin, RenderConfigMixin, ConfigContextModel, PrimaryModel):
+class VirtualMachine(ContactsMixin, ImageAttachmentsMixin, RenderConfigMixin, CachedConfigContextModel, PrimaryModel):
     """
     A virtual machine which runs inside a Cluster.
     """
@@ -1,3 +1,4 @@
+import json
 import logging
 
 from django.test import tag
@@ -287,6 +288,26 @@ class VirtualMachineTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_200_OK)
         self.assertEqual(response.data['content'], f'Config for virtual machine {vm.name}')
 
+    def test_render_configs(self):
+        configtemplate = ConfigTemplate.objects.create(
+            name='Config Template 1',
+            template_code='Config for virtual machine {{ virtualmachine.name }}'
+        )
+        vms = VirtualMachine.objects.order_by('pk')[:2]
+        for vm in vms:
+            vm.config_template = configtemplate
+            vm.save()
+
+        self.add_permissions('virtualization.add_virtualmachine')
+        url = reverse('virtualization-api:virtualmachine-render-configs') + f'?id={vms[0].pk}&id={vms[1].pk}'
+        response = self.client.post(url, {}, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        results = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(
+            [result['content'] for result in results],
+            [f'Config for virtual machine {vm.name}' for vm in vms]
+        )
+
 
 class VMInterfaceTest(APIViewTestCases.APIViewTestCase):
     model = VMInterface